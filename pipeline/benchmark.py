@@ -0,0 +1,901 @@
+import multiprocessing as mp
+import os
+import resource
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+import torch
+
+from .compilation import compile_gnn
+from .causal_model import (
+    bootstrap_ates,
+    estimate_causal_effect,
+    extract_causal_variables,
+    identify_root_causes,
+)
+from .config import CausalConfig, PipelineConfig
+from .data_processing import build_conversation_features
+from .discourse_graph import (
+    DiscourseGNN,
+    GraphAttentionLayer,
+    batch_graphs,
+    detect_edge_type,
+    discourse_edge_arrays,
+    discourse_edges,
+    pad_graphs,
+    window_pairs,
+)
+from .distributed import run_data_parallel
+from .export import (
+    GNN_INPUT_DIM,
+    encoder_example_inputs,
+    export_encoder,
+    export_gnn,
+    gnn_example_inputs,
+)
+from .graph_store import load_or_build_graph_store
+from .main import CausalAnalysisPipeline
+from .model_io import default_paths, load_exported, save_gnn
+from .precision import PRECISIONS, autocast
+from .similarity import SimilarityIndex
+from .transitions import TransitionStats
+from .train import (
+    _ConversationDataset,
+    _ConversationLevelDataset,
+    _FeatureEncoder,
+    _discourse_graphs,
+    _run_stage,
+    _run_stages_concurrently,
+    train_encoder,
+    train_gnn,
+)
+
+# Phrases that trigger the emotion / discourse lexicons so synthetic
+# conversations produce realistic feature densities and edge types.
+_CUSTOMER_PHRASES = [
+    "my order is still not working and this is unacceptable",
+    "I have been waiting for days, this is ridiculous",
+    "can you confirm when the refund will arrive",
+    "I want to speak to a supervisor right now",
+    "thank you, that was really helpful",
+    "I am confused, what do you mean by processing time",
+]
+_AGENT_PHRASES = [
+    "I'm sorry for the trouble, I understand your frustration",
+    "unfortunately we cannot do that at this time",
+    "please hold while I check the order",
+    "I will make sure this is resolved today, rest assured",
+    "let me explain the next steps",
+    "it usually takes 3-5 business days to process",
+]
+_INTENTS = [
+    "Delivery Investigation",
+    "Escalation - Repeated Service Failures",
+    "Refund Request",
+    "Fraud Alert Investigation",
+    "Account Access Issues",
+    "Product Inquiry",
+]
+
+
+def synthetic_records(
+    n: int,
+    num_turns: int = 12,
+    seed: int = 0,
+) -> List[dict]:
+    """Generate *n* featurised conversations without the raw dataset."""
+    rng = np.random.RandomState(seed)
+    records: List[dict] = []
+    for i in range(n):
+        length = int(rng.randint(max(num_turns // 2, 2), num_turns + 1))
+        turns = []
+        for t in range(length):
+            speaker = "Agent" if t % 2 else "Customer"
+            bank = _AGENT_PHRASES if t % 2 else _CUSTOMER_PHRASES
+            turns.append({"speaker": speaker, "text": bank[rng.randint(len(bank))]})
+        intent = _INTENTS[rng.randint(len(_INTENTS))]
+        records.append(build_conversation_features(f"S{i:07d}", turns, intent))
+    return records
+
+
+def time_per_call(fn: Callable[[], Any], n_calls: int = 100, n_warmup: int = 5) -> float:
+    """Mean wall-clock milliseconds per call of *fn* after warm-up."""
+    for _ in range(n_warmup):
+        fn()
+    start = time.perf_counter()
+    for _ in range(n_calls):
+        fn()
+    return (time.perf_counter() - start) * 1000.0 / max(n_calls, 1)
+
+
+# ── benchmarks ───────────────────────────────────────────────────────────
+
+def benchmark_export_latency(
+    num_turns: int = 16,
+    n_calls: int = 200,
+) -> Dict[str, Any]:
+    """Per-call latency of the eager modules versus the frozen exported graphs."""
+    config = PipelineConfig(device="cpu")
+    encoder = _FeatureEncoder().eval()
+    gnn = DiscourseGNN(config.discourse, input_dim=GNN_INPUT_DIM).eval()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        enc_path = os.path.join(tmp, "encoder_scripted.pt")
+        gnn_path = os.path.join(tmp, "discourse_gnn_scripted.pt")
+        export_encoder(encoder, enc_path)
+        export_gnn(gnn, gnn_path)
+        encoder_graph = load_exported(enc_path)
+        gnn_graph = load_exported(gnn_path)
+
+    enc_inputs = encoder_example_inputs(num_turns)
+    node_feat, edge_index = gnn_example_inputs(num_turns)
+
+    def _eager_gnn() -> None:
+        out = gnn(node_feat, edge_index)
+        gnn.classify_edges(out["node_embeddings"], edge_index)
+
+    with torch.no_grad():
+        results = {
+            "encoder_eager_ms": time_per_call(
+                lambda: encoder.forward_conversation(*enc_inputs), n_calls),
+            "encoder_exported_ms": time_per_call(
+                lambda: encoder_graph(*enc_inputs), n_calls),
+            "gnn_eager_ms": time_per_call(_eager_gnn, n_calls),
+            "gnn_exported_ms": time_per_call(
+                lambda: gnn_graph(node_feat, edge_index), n_calls),
+        }
+    results["encoder_speedup"] = results["encoder_eager_ms"] / results["encoder_exported_ms"]
+    results["gnn_speedup"] = results["gnn_eager_ms"] / results["gnn_exported_ms"]
+    results["num_turns"] = num_turns
+    return results
+
+
+def _mean_epoch_time(history: Dict[str, Any]) -> float:
+    times = history["epoch_time"]
+    return sum(times) / max(len(times), 1)
+
+
+def benchmark_encoder_batching(
+    n_records: int = 1000,
+    epochs: int = 2,
+    batch_size: int = 16,
+) -> Dict[str, Any]:
+    """Encoder epoch time: one conversation per step versus padded mini-batches."""
+    records = synthetic_records(n_records)
+    results: Dict[str, Any] = {"n_records": n_records, "batch_size": batch_size}
+    for label, bs in (("per_conversation", 1), ("batched", batch_size)):
+        config = PipelineConfig(device="cpu")
+        config.encoder.batch_size = bs
+        with tempfile.TemporaryDirectory() as tmp:
+            hist = train_encoder(config, records, tmp,
+                                 epochs=epochs, verbose=False)
+        results[f"{label}_epoch_s"] = _mean_epoch_time(hist)
+        results[f"{label}_val_accuracy"] = hist["val_accuracy"][-1]
+    results["speedup"] = results["per_conversation_epoch_s"] / results["batched_epoch_s"]
+    return results
+
+
+def benchmark_gnn_batching(
+    n_records: int = 1000,
+    epochs: int = 2,
+    batch_size: int = 32,
+) -> Dict[str, Any]:
+    """GNN training throughput: one graph per step versus disjoint-union batches."""
+    records = synthetic_records(n_records)
+    results: Dict[str, Any] = {"n_records": n_records, "batch_size": batch_size}
+    for label, bs in (("per_graph", 1), ("batched", batch_size)):
+        config = PipelineConfig(device="cpu")
+        config.discourse.batch_size = bs
+        with tempfile.TemporaryDirectory() as tmp:
+            hist = train_gnn(config, records, tmp, epochs=epochs, verbose=False)
+        epoch_s = _mean_epoch_time(hist)
+        results[f"{label}_epoch_s"] = epoch_s
+        results[f"{label}_graphs_per_s"] = hist["split"]["train"] / epoch_s
+        results[f"{label}_val_accuracy"] = hist["val_accuracy"][-1]
+    results["speedup"] = results["per_graph_epoch_s"] / results["batched_epoch_s"]
+    return results
+
+
+def _per_turn_conversation_tensors(records: List[dict], max_turns: int = 64) -> list:
+    """The original dataset construction: one tensor per turn, stacked per conversation."""
+    conversations = []
+    for rec in records:
+        turn_feats = rec.get("turn_features", [])[:max_turns]
+        if not turn_feats:
+            continue
+        feats = torch.stack([_ConversationDataset._feature_vector(tf) for tf in turn_feats])
+        emo = torch.tensor(
+            [_ConversationDataset._emotion_label(tf) for tf in turn_feats], dtype=torch.long,
+        )
+        conversations.append((feats, emo, rec.get("outcome_id", 0)))
+    return conversations
+
+
+_DATASET_BUILDERS: Dict[str, Callable[[List[dict]], Any]] = {
+    "per_turn": _per_turn_conversation_tensors,
+    "contiguous": _ConversationLevelDataset,
+}
+
+
+def _measure_build(name: str, n_records: int, queue) -> None:
+    """Child process: build one dataset and report time and peak-RSS growth."""
+    records = synthetic_records(n_records)
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    dataset = _DATASET_BUILDERS[name](records)
+    elapsed = time.perf_counter() - start
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put((elapsed, (rss_after - rss_before) / 1024.0, len(dataset)))
+
+
+def benchmark_dataset_construction(n_records: int = 20000) -> Dict[str, Any]:
+    """Per-turn tensor construction versus one contiguous feature matrix.
+
+    Each builder runs in a fresh process so peak RSS growth is attributable
+    to the dataset alone.
+    """
+    ctx = mp.get_context("spawn")
+    results: Dict[str, Any] = {"n_records": n_records}
+    for name in _DATASET_BUILDERS:
+        queue = ctx.Queue()
+        proc = ctx.Process(target=_measure_build, args=(name, n_records, queue))
+        proc.start()
+        elapsed, rss_mb, _ = queue.get()
+        proc.join()
+        results[f"{name}_s"] = elapsed
+        results[f"{name}_peak_rss_mb"] = rss_mb
+    results["speedup"] = results["per_turn_s"] / results["contiguous_s"]
+    results["memory_reduction"] = (
+        results["per_turn_peak_rss_mb"] / max(results["contiguous_peak_rss_mb"], 1e-6)
+    )
+    return results
+
+
+def benchmark_data_parallel(
+    n_records: int = 2000,
+    epochs: int = 2,
+    world_sizes: Tuple[int, ...] = (1, 2, 4),
+) -> Dict[str, Any]:
+    """Encoder and GNN training throughput as the number of gloo ranks grows."""
+    records = synthetic_records(n_records)
+    results: Dict[str, Any] = {"n_records": n_records, "cpu_count": os.cpu_count()}
+    for world_size in world_sizes:
+        for stage, fn in (("encoder", train_encoder), ("gnn", train_gnn)):
+            config = PipelineConfig(device="cpu")
+            with tempfile.TemporaryDirectory() as tmp:
+                if world_size == 1:
+                    hist = fn(config, records, tmp, epochs=epochs, verbose=False)
+                else:
+                    hist = run_data_parallel(
+                        fn, world_size, config, records, tmp, epochs=epochs, verbose=False,
+                    )
+            results[f"{stage}_w{world_size}_samples_per_s"] = (
+                hist["split"]["train"] / _mean_epoch_time(hist)
+            )
+    for stage in ("encoder", "gnn"):
+        base = results[f"{stage}_w{world_sizes[0]}_samples_per_s"]
+        for world_size in world_sizes[1:]:
+            results[f"{stage}_w{world_size}_scaling"] = (
+                results[f"{stage}_w{world_size}_samples_per_s"] / base
+            )
+    return results
+
+
+def benchmark_precision(
+    n_records: int = 1000,
+    epochs: int = 3,
+    num_nodes: int = 64,
+    n_calls: int = 100,
+) -> Dict[str, Any]:
+    """fp32 versus bf16 autocast: training epoch time, accuracy and GNN latency."""
+    records = synthetic_records(n_records)
+    results: Dict[str, Any] = {"n_records": n_records, "num_nodes": num_nodes}
+    for precision in PRECISIONS:
+        for stage, fn in (("encoder", train_encoder), ("gnn", train_gnn)):
+            config = PipelineConfig(device="cpu", precision=precision)
+            with tempfile.TemporaryDirectory() as tmp:
+                hist = fn(config, records, tmp, epochs=epochs, verbose=False)
+            results[f"{stage}_{precision}_epoch_s"] = _mean_epoch_time(hist)
+            results[f"{stage}_{precision}_val_accuracy"] = max(hist["val_accuracy"])
+
+        gnn = DiscourseGNN(PipelineConfig(device="cpu").discourse, GNN_INPUT_DIM).eval()
+        node_feat, edge_index = gnn_example_inputs(num_nodes)
+        node_feat = torch.randn_like(node_feat)
+
+        def _forward() -> None:
+            with autocast(precision):
+                gnn(node_feat, edge_index)
+
+        with torch.no_grad():
+            results[f"gnn_inference_{precision}_ms"] = time_per_call(_forward, n_calls)
+
+    for key in ("encoder", "gnn"):
+        results[f"{key}_train_speedup"] = (
+            results[f"{key}_fp32_epoch_s"] / results[f"{key}_bf16_epoch_s"]
+        )
+    results["gnn_inference_speedup"] = (
+        results["gnn_inference_fp32_ms"] / results["gnn_inference_bf16_ms"]
+    )
+    return results
+
+
+def benchmark_graph_store(n_records: int = 5000) -> Dict[str, Any]:
+    """Building every discourse graph from text versus loading the graph store."""
+    records = synthetic_records(n_records)
+    config = PipelineConfig(device="cpu")
+    results: Dict[str, Any] = {"n_records": n_records}
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, use_cache in (("rebuild", False), ("store_cold", True), ("store_warm", True)):
+            config.discourse.use_graph_cache = use_cache
+            start = time.perf_counter()
+            graphs, _ = _discourse_graphs(records, config, tmp)
+            results[f"{label}_s"] = time.perf_counter() - start
+        store = load_or_build_graph_store(
+            records, config.discourse.edge_types, default_paths(tmp)["graph_cache"],
+        )
+        results["store_mb"] = sum(
+            os.path.getsize(os.path.join(root, f))
+            for root, _, files in os.walk(tmp) for f in files
+        ) / 2 ** 20
+    results["num_graphs"] = len(graphs)
+    results["num_edges"] = int(len(store.col))
+    results["speedup"] = results["rebuild_s"] / results["store_warm_s"]
+    return results
+
+
+def benchmark_concurrent_stages(n_records: int = 2000, epochs: int = 2) -> Dict[str, Any]:
+    """Wall-clock time of both training stages run back to back versus concurrently."""
+    records = synthetic_records(n_records)
+    config = PipelineConfig(device="cpu")
+    results: Dict[str, Any] = {
+        "n_records": n_records, "cpu_count": os.cpu_count(), "threads": torch.get_num_threads(),
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        stages = [
+            (fn, (records, os.path.join(tmp, name)), {"epochs": epochs, "verbose": False})
+            for name, fn in (("encoder", train_encoder), ("gnn", train_gnn))
+        ]
+        start = time.perf_counter()
+        for name, (fn, args, kwargs) in zip(("encoder", "gnn"), stages):
+            stage_start = time.perf_counter()
+            _run_stage(fn, config, *args, **kwargs)
+            results[f"{name}_s"] = time.perf_counter() - stage_start
+        results["sequential_s"] = time.perf_counter() - start
+        start = time.perf_counter()
+        _run_stages_concurrently(stages, config)
+        results["concurrent_s"] = time.perf_counter() - start
+    results["speedup"] = results["sequential_s"] / results["concurrent_s"]
+    return results
+
+
+def benchmark_compile(
+    n_records: int = 1000,
+    epochs: int = 3,
+    turn_counts: Tuple[int, ...] = (4, 12, 24, 48),
+    n_calls: int = 100,
+) -> Dict[str, Any]:
+    """Eager versus ``torch.compile``: one-off compile cost and steady-state speed.
+
+    Training compares the last epoch (all shape buckets compiled) and charges
+    the first-epoch difference to compilation; inference times GNN forwards
+    over conversations of several lengths after compiling every bucket.
+    """
+    records = synthetic_records(n_records)
+    results: Dict[str, Any] = {"n_records": n_records}
+    for compiled in (False, True):
+        label = "compiled" if compiled else "eager"
+        for stage, fn in (("encoder", train_encoder), ("gnn", train_gnn)):
+            config = PipelineConfig(device="cpu", compile_models=compiled)
+            with tempfile.TemporaryDirectory() as tmp:
+                hist = fn(config, records, tmp, epochs=epochs, verbose=False)
+            results[f"{stage}_{label}_first_epoch_s"] = hist["epoch_time"][0]
+            results[f"{stage}_{label}_epoch_s"] = hist["epoch_time"][-1]
+
+        torch.manual_seed(0)
+        gnn = DiscourseGNN(PipelineConfig(device="cpu").discourse, GNN_INPUT_DIM).eval()
+        forward = compile_gnn(gnn, compiled)
+        inputs = []
+        for n in turn_counts:
+            chain = torch.arange(n)
+            inputs.append((torch.randn(n, GNN_INPUT_DIM),
+                           torch.stack([chain[:-1], chain[1:]])))
+        with torch.no_grad():
+            start = time.perf_counter()
+            for node_feat, edge_index in inputs:
+                forward(node_feat, edge_index)
+            results[f"gnn_inference_{label}_warmup_s"] = time.perf_counter() - start
+
+            def _forward() -> None:
+                for node_feat, edge_index in inputs:
+                    forward(node_feat, edge_index)
+
+            results[f"gnn_inference_{label}_ms"] = (
+                time_per_call(_forward, n_calls) / len(inputs)
+            )
+
+    for stage in ("encoder", "gnn"):
+        results[f"{stage}_train_speedup"] = (
+            results[f"{stage}_eager_epoch_s"] / results[f"{stage}_compiled_epoch_s"]
+        )
+        results[f"{stage}_compile_cost_s"] = (
+            results[f"{stage}_compiled_first_epoch_s"] - results[f"{stage}_eager_first_epoch_s"]
+        )
+    results["gnn_inference_speedup"] = (
+        results["gnn_inference_eager_ms"] / results["gnn_inference_compiled_ms"]
+    )
+    results["gnn_inference_compile_cost_s"] = (
+        results["gnn_inference_compiled_warmup_s"] - results["gnn_inference_eager_warmup_s"]
+    )
+    return results
+
+
+def benchmark_sparse_attention(
+    num_nodes: Tuple[int, ...] = (64, 256, 1024, 2048),
+    n_calls: int = 20,
+    n_records: int = 1000,
+    epochs: int = 2,
+) -> Dict[str, Any]:
+    """Dense N x N attention rows versus the O(E) segment softmax.
+
+    Times a GNN forward on chain graphs of growing length (about 2N edges)
+    and a GNN training epoch on disjoint-union batches.
+    """
+    results: Dict[str, Any] = {}
+    for n in num_nodes:
+        node_feat, edge_index = gnn_example_inputs(n)
+        node_feat = torch.randn_like(node_feat)
+        for sparse in (False, True):
+            label = "sparse" if sparse else "dense"
+            config = PipelineConfig(device="cpu")
+            config.discourse.sparse_attention = sparse
+            torch.manual_seed(0)
+            gnn = DiscourseGNN(config.discourse, GNN_INPUT_DIM).eval()
+            with torch.no_grad():
+                results[f"n{n}_{label}_ms"] = time_per_call(
+                    lambda: gnn(node_feat, edge_index), n_calls, n_warmup=2,
+                )
+        # One fp32 score matrix per layer on the dense path
+        results[f"n{n}_dense_alpha_mb"] = n * n * 4 / 2 ** 20
+        results[f"n{n}_speedup"] = results[f"n{n}_dense_ms"] / results[f"n{n}_sparse_ms"]
+
+    records = synthetic_records(n_records)
+    for sparse in (False, True):
+        label = "sparse" if sparse else "dense"
+        config = PipelineConfig(device="cpu")
+        config.discourse.sparse_attention = sparse
+        with tempfile.TemporaryDirectory() as tmp:
+            hist = train_gnn(config, records, tmp, epochs=epochs, verbose=False)
+        results[f"train_{label}_epoch_s"] = _mean_epoch_time(hist)
+        results[f"train_{label}_val_accuracy"] = max(hist["val_accuracy"])
+    results["train_speedup"] = results["train_dense_epoch_s"] / results["train_sparse_epoch_s"]
+    return results
+
+
+def benchmark_gnn_heads(
+    heads: int = 4,
+    hidden_dim: int = 256,
+    num_nodes: Tuple[int, ...] = (64, 512),
+    n_calls: int = 50,
+) -> Dict[str, Any]:
+    """Batched H-head GAT layer versus one head and versus a loop over heads.
+
+    All variants have the model's ``hidden_dim`` output: the H-head layer
+    concatenates ``hidden_dim / H``-wide heads, and the looped baseline runs
+    H single-head layers of that width and concatenates them.
+    """
+    results: Dict[str, Any] = {"heads": heads, "hidden_dim": hidden_dim}
+    head_dim = hidden_dim // heads
+    for n in num_nodes:
+        node_feat, edge_index = gnn_example_inputs(n, hidden_dim)
+        node_feat = torch.randn_like(node_feat)
+        for sparse in (False, True):
+            label = f"n{n}_{'sparse' if sparse else 'dense'}"
+            torch.manual_seed(0)
+            one = GraphAttentionLayer(hidden_dim, hidden_dim, sparse=sparse).eval()
+            multi = GraphAttentionLayer(
+                hidden_dim, hidden_dim, sparse=sparse, heads=heads,
+            ).eval()
+            looped = [
+                GraphAttentionLayer(hidden_dim, head_dim, sparse=sparse).eval()
+                for _ in range(heads)
+            ]
+            with torch.no_grad():
+                results[f"{label}_1_head_ms"] = time_per_call(
+                    lambda: one(node_feat, edge_index), n_calls,
+                )
+                results[f"{label}_{heads}_heads_ms"] = time_per_call(
+                    lambda: multi(node_feat, edge_index), n_calls,
+                )
+                results[f"{label}_{heads}_looped_ms"] = time_per_call(
+                    lambda: torch.cat([m(node_feat, edge_index) for m in looped], dim=-1),
+                    n_calls,
+                )
+            results[f"{label}_cost_vs_1_head"] = (
+                results[f"{label}_{heads}_heads_ms"] / results[f"{label}_1_head_ms"]
+            )
+            results[f"{label}_speedup_vs_loop"] = (
+                results[f"{label}_{heads}_looped_ms"] / results[f"{label}_{heads}_heads_ms"]
+            )
+    return results
+
+
+def _pairwise_edge_labels(turns: List[dict]) -> List[str]:
+    """The original edge typing: rescan the joined text of every +1 / +2 pair."""
+    return [
+        detect_edge_type(turns[i]["text"], turns[j]["text"]) or "clarification"
+        for i in range(len(turns)) for j in (i + 1, i + 2) if j < len(turns)
+    ]
+
+
+def benchmark_edge_typing(n_records: int = 5000) -> Dict[str, Any]:
+    """Per-pair keyword rescans versus edge typing from per-turn keyword masks."""
+    records = synthetic_records(n_records)
+    edge_types = PipelineConfig().discourse.edge_types
+    convs = [rec["turn_features"] for rec in records]
+    # Without featurizer masks every turn is scanned once during typing
+    unmasked = [[{"text": tf["text"]} for tf in turns] for turns in convs]
+    results: Dict[str, Any] = {"n_records": n_records}
+
+    start = time.perf_counter()
+    pairwise = [_pairwise_edge_labels(turns) for turns in convs]
+    results["pairwise_s"] = time.perf_counter() - start
+    start = time.perf_counter()
+    per_conversation = [discourse_edges(turns, edge_types)[3] for turns in convs]
+    results["per_conversation_s"] = time.perf_counter() - start
+    for label, conversations in (("batched", convs), ("batched_unmasked", unmasked)):
+        start = time.perf_counter()
+        _, _, attr, _ = discourse_edge_arrays(conversations, edge_types)
+        results[f"{label}_s"] = time.perf_counter() - start
+
+    expected = [label for labels in pairwise for label in labels]
+    results["num_edges"] = len(expected)
+    results["identical"] = (
+        per_conversation == pairwise
+        and attr.tolist() == [edge_types.index(label) for label in expected]
+    )
+    results["speedup"] = results["pairwise_s"] / results["batched_s"]
+    return results
+
+
+def _nested_loop_pairs(node_offsets: np.ndarray, window: int) -> Tuple[List[int], List[int]]:
+    """The original construction: Python loops over turns and offsets."""
+    src_list, tgt_list = [], []
+    for start, end in zip(node_offsets[:-1].tolist(), node_offsets[1:].tolist()):
+        for i in range(start, end):
+            for offset in range(1, window + 1):
+                if i + offset >= end:
+                    break
+                src_list.append(i)
+                tgt_list.append(i + offset)
+    return src_list, tgt_list
+
+
+def benchmark_edge_window(n_records: int = 5000, windows: Tuple[int, ...] = (1, 2, 4, 8)) -> Dict[str, Any]:
+    """Edge construction cost as the connectivity window widens.
+
+    Times pair generation alone (nested loops versus ``window_pairs``) and
+    full keyword-typed construction, with and without speaker edges.
+    """
+    records = synthetic_records(n_records)
+    edge_types = PipelineConfig().discourse.edge_types
+    convs = [rec["turn_features"] for rec in records]
+    node_offsets = np.concatenate([[0], np.cumsum([len(c) for c in convs])])
+    is_agent = np.array([tf["is_agent"] for c in convs for tf in c], dtype=bool)
+    results: Dict[str, Any] = {"n_records": n_records, "num_turns": int(node_offsets[-1])}
+    for window in windows:
+        start = time.perf_counter()
+        _nested_loop_pairs(node_offsets, window)
+        results[f"w{window}_loops_ms"] = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        src, _ = window_pairs(node_offsets, window, is_agent)
+        results[f"w{window}_vectorized_ms"] = (time.perf_counter() - start) * 1000
+        results[f"w{window}_num_edges"] = len(src)
+        start = time.perf_counter()
+        discourse_edge_arrays(convs, edge_types, window, speaker_edges=True)
+        results[f"w{window}_typed_ms"] = (time.perf_counter() - start) * 1000
+    return results
+
+
+def benchmark_padded_gnn(
+    batch_size: int = 32,
+    sizes: Tuple[int, ...] = (4, 8, 16, 32, 64, 128, 256),
+    n_calls: int = 10,
+) -> Dict[str, Any]:
+    """Padded ``(B, N, H)`` bmm attention versus edge-list batches by graph size.
+
+    For each node count, times one inference batch of *batch_size* chain
+    graphs through ``forward_padded`` and through the disjoint-union
+    forward with the dense and the sparse (segment-softmax) layers.  The
+    smallest size where the sparse union wins is the crossover that
+    ``DiscourseConfig.padded_max_nodes`` should sit below.
+    """
+    results: Dict[str, Any] = {"batch_size": batch_size}
+    models = {}
+    for sparse in (False, True):
+        config = PipelineConfig(device="cpu")
+        config.discourse.sparse_attention = sparse
+        torch.manual_seed(0)
+        models[sparse] = DiscourseGNN(config.discourse, input_dim=GNN_INPUT_DIM).eval()
+    crossover = None
+    with torch.no_grad():
+        for n in sizes:
+            graphs = []
+            for _ in range(batch_size):
+                x, edge_index = gnn_example_inputs(n)
+                graphs.append({
+                    "node_features": torch.randn_like(x),
+                    "edge_index": edge_index,
+                    "edge_attr": torch.zeros(edge_index.shape[1], dtype=torch.long),
+                })
+            merged = batch_graphs(graphs)
+            union = (merged["node_features"], merged["edge_index"], merged["batch"], batch_size)
+            padded = pad_graphs(graphs)
+            results[f"n{n}_padded_ms"] = time_per_call(
+                lambda: models[True].forward_padded(*padded), n_calls)
+            results[f"n{n}_sparse_ms"] = time_per_call(lambda: models[True](*union), n_calls)
+            # The dense union is O((B * N)^2); skip it once that gets huge
+            if batch_size * n <= 2048:
+                results[f"n{n}_dense_union_ms"] = time_per_call(
+                    lambda: models[False](*union), n_calls)
+            if crossover is None and results[f"n{n}_sparse_ms"] < results[f"n{n}_padded_ms"]:
+                crossover = n
+    results["crossover_nodes"] = crossover
+    return results
+
+
+def benchmark_transition_stats(n_records: int = 20000, n_queries: int = 1000) -> Dict[str, Any]:
+    """Corpus transition queries from the aggregates versus rebuilding graphs.
+
+    The baseline answers "how often does apology follow denial within two
+    turns in one domain" the way it was done before: type the edges of every
+    conversation in that domain again and scan the chains.
+    """
+    records = synthetic_records(n_records)
+    domains = ["Banking & Finance", "Insurance", "Telecommunications", "Travel & Hospitality"]
+    for i, rec in enumerate(records):
+        rec["domain"] = domains[i % len(domains)]
+    discourse_cfg = PipelineConfig().discourse
+    results: Dict[str, Any] = {"n_records": n_records}
+
+    start = time.perf_counter()
+    stats = TransitionStats(
+        discourse_cfg.edge_types, discourse_cfg.transition_max_lag, discourse_cfg.transition_max_ngram,
+    )
+    stats.add_records(records[:-100])
+    results["build_ms"] = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    for rec in records[-100:]:
+        stats.add_records([rec])
+    results["incremental_add_ms"] = (time.perf_counter() - start) * 1000 / 100
+
+    results["query_us"] = time_per_call(
+        lambda: stats.follow_rate("denial", "apology", within=2, domain="Insurance"), n_queries,
+    ) * 1000
+
+    def rebuild() -> float:
+        convs = [rec["turn_features"] for rec in records if rec["domain"] == "Insurance"]
+        _, _, attr, node_offsets = discourse_edge_arrays(convs, discourse_cfg.edge_types, window=1)
+        bounds = node_offsets - np.arange(len(node_offsets))  # n - 1 edges per conversation
+        denial, apology = (discourse_cfg.edge_types.index(t) for t in ("denial", "apology"))
+        hits = total = 0
+        for c in range(len(convs)):
+            chain = attr[bounds[c]:bounds[c + 1]].tolist()
+            for p, label in enumerate(chain):
+                if label == denial:
+                    total += 1
+                    hits += apology in chain[p + 1:p + 3]
+        return hits / max(total, 1)
+
+    start = time.perf_counter()
+    expected = rebuild()
+    results["rebuild_query_ms"] = (time.perf_counter() - start) * 1000
+    results["rate"] = stats.follow_rate("denial", "apology", within=2, domain="Insurance")
+    results["rate_matches"] = abs(results["rate"] - expected) < 1e-12
+    results["speedup"] = results["rebuild_query_ms"] * 1000 / max(results["query_us"], 1e-9)
+    results["tensor_mb"] = (
+        stats.follows.nbytes + sum(t.nbytes for t in stats.ngrams.values())
+    ) / 2 ** 20
+    return results
+
+
+def _loop_bootstrap_ates(
+    t_vals: np.ndarray,
+    y_vals: np.ndarray,
+    n_bootstrap: int,
+    rng: np.random.RandomState,
+) -> List[float]:
+    """One resample per Python iteration, as ``estimate_causal_effect`` used to."""
+    n = len(t_vals)
+    boot_ates: List[float] = []
+    for _ in range(n_bootstrap):
+        idx = rng.choice(n, size=n, replace=True)
+        t_b = t_vals[idx]
+        y_b = y_vals[idx]
+        tr = t_b >= float(np.median(t_b))
+        ct = ~tr
+        if tr.sum() > 0 and ct.sum() > 0:
+            boot_ates.append(float(y_b[tr].mean() - y_b[ct].mean()))
+    return boot_ates
+
+
+def benchmark_bootstrap(
+    sizes: Tuple[int, ...] = (5000, 1_000_000),
+    n_bootstrap: Tuple[int, ...] = (1000, 50),
+) -> Dict[str, Any]:
+    """Per-resample bootstrap loop versus chunked ``(B, n)`` resampling.
+
+    Runs *n_bootstrap[i]* resamples on *sizes[i]* synthetic samples with
+    the same seed through both, checking that the ATEs agree.
+    """
+    results: Dict[str, Any] = {}
+    memory_mb = CausalConfig().bootstrap_memory_mb
+    for n, n_boot in zip(sizes, n_bootstrap):
+        rng = np.random.RandomState(0)
+        t_vals = rng.exponential(size=n)
+        y_vals = (rng.uniform(size=n) < 0.2 + 0.1 * (t_vals > 1)).astype(np.float64)
+        start = time.perf_counter()
+        loop = _loop_bootstrap_ates(t_vals, y_vals, n_boot, np.random.RandomState(n_boot))
+        results[f"n{n}_loop_ms"] = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        batched = bootstrap_ates(t_vals, y_vals, n_boot, np.random.RandomState(n_boot), memory_mb)
+        results[f"n{n}_vectorized_ms"] = (time.perf_counter() - start) * 1000
+        results[f"n{n}_n_bootstrap"] = n_boot
+        results[f"n{n}_speedup"] = results[f"n{n}_loop_ms"] / results[f"n{n}_vectorized_ms"]
+        results[f"n{n}_max_abs_diff"] = float(np.max(np.abs(np.asarray(loop) - batched)))
+    return results
+
+
+def benchmark_causal_cache(n_records: int = 2000, n_analysed: int = 20) -> Dict[str, Any]:
+    """Per-record causal analysis with and without the population cache.
+
+    The uncached path is what ``analyse_conversation`` did before: extract
+    the whole corpus's causal variables, estimate the ATE and run the
+    root-cause bootstraps for every record.
+    """
+    config = PipelineConfig(device="cpu")
+    pipe = CausalAnalysisPipeline(config)
+    pipe.records = synthetic_records(n_records)
+    records = pipe.records[:n_analysed]
+    causal_cfg = config.causal
+
+    start = time.perf_counter()
+    for record in records:
+        data = [extract_causal_variables(r) for r in pipe.records]
+        estimate_causal_effect(data, causal_cfg.treatment, causal_cfg.outcome, pipe.causal_dag, causal_cfg)
+        identify_root_causes(data, causal_cfg.outcome, pipe.causal_dag, causal_cfg)
+        extract_causal_variables(record)
+    uncached = (time.perf_counter() - start) * 1000 / n_analysed
+
+    start = time.perf_counter()
+    pipe._run_causal_analysis(records[0])
+    first = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    for record in records:
+        pipe._run_causal_analysis(record)
+    cached = (time.perf_counter() - start) * 1000 / n_analysed
+    return {
+        "n_records": n_records,
+        "uncached_per_record_ms": uncached,
+        "first_call_ms": first,
+        "cached_per_record_ms": cached,
+        "speedup": uncached / max(cached, 1e-9),
+    }
+
+
+def benchmark_graph_inference(n_records: int = 1000, batch_size: int = 32) -> Dict[str, Any]:
+    """Pipeline GNN inference one graph per forward versus disjoint-union batches."""
+    records = synthetic_records(n_records)
+    config = PipelineConfig(device="cpu")
+    results: Dict[str, Any] = {"n_records": n_records, "batch_size": batch_size}
+    with tempfile.TemporaryDirectory() as tmp:
+        gnn = DiscourseGNN(config.discourse, input_dim=GNN_INPUT_DIM)
+        save_gnn(gnn, default_paths(tmp)["gnn"])
+        pipe = CausalAnalysisPipeline(config, checkpoint_dir=tmp)
+        pipe._gnn()  # load the checkpoint outside the timed regions
+
+        start = time.perf_counter()
+        for rec in records:
+            tf = rec["turn_features"]
+            pipe._build_graph(tf, pipe._encode_turns(tf))
+        results["per_graph_s"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        pipe.embed_graphs(records, batch_size)
+        results["batched_s"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for rec in records:
+            tf = rec["turn_features"]
+            pipe._build_graph(tf, pipe._encode_turns(tf), rec["transcript_id"])
+        results["cached_s"] = time.perf_counter() - start
+    results["speedup"] = results["per_graph_s"] / results["batched_s"]
+    return results
+
+
+def benchmark_similarity_index(
+    n_conversations: int = 1_000_000,
+    n_clusters: int = 2000,
+    n_queries: int = 200,
+    k: int = 10,
+) -> Dict[str, Any]:
+    """IVF graph-embedding search versus brute force at corpus scale.
+
+    Embeddings are synthetic (clustered Gaussians at the GNN's hidden size),
+    so the recall figure reflects clustered data rather than a trained GNN.
+    """
+    dim = PipelineConfig().discourse.gnn_hidden_dim
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(n_clusters, dim)).astype(np.float32)
+    vectors = np.empty((n_conversations, dim), dtype=np.float32)
+    for start in range(0, n_conversations, 100_000):
+        rows = min(100_000, n_conversations - start)
+        chunk = centers[rng.integers(0, n_clusters, rows)] + rng.normal(size=(rows, dim))
+        vectors[start:start + rows] = chunk / np.linalg.norm(chunk, axis=1, keepdims=True)
+    ids = [f"T{i:07d}" for i in range(n_conversations)]
+    results: Dict[str, Any] = {"n_conversations": n_conversations, "dim": dim, "k": k}
+
+    start = time.perf_counter()
+    index = SimilarityIndex.build(ids, vectors)
+    results["build_s"] = time.perf_counter() - start
+    results["n_lists"] = len(index.centroids)
+    results["n_probe"] = index.n_probe
+
+    queries = rng.choice(n_conversations, n_queries, replace=False).tolist()
+    latencies, found = [], []
+    for q in queries:
+        start = time.perf_counter()
+        found.append(index.search(vectors[q], k))
+        latencies.append((time.perf_counter() - start) * 1000)
+    # Brute force separately: its full scans would evict the index from cache
+    recall, brute_ms = 0.0, 0.0
+    for q, hits in zip(queries, found):
+        start = time.perf_counter()
+        exact = np.argpartition(-(vectors @ vectors[q]), k)[:k]
+        brute_ms += (time.perf_counter() - start) * 1000
+        recall += len({tid for tid, _ in hits} & {ids[i] for i in exact.tolist()}) / k
+    results["query_p50_ms"] = float(np.percentile(latencies, 50))
+    results["query_p99_ms"] = float(np.percentile(latencies, 99))
+    results["brute_force_ms"] = brute_ms / n_queries
+    results["recall_at_k"] = recall / n_queries
+
+    new = rng.normal(size=(1000, dim)).astype(np.float32)
+    start = time.perf_counter()
+    for i in range(len(new)):
+        index.add([f"N{i}"], new[i:i + 1])
+    results["insert_ms"] = (time.perf_counter() - start) * 1000 / len(new)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "similarity_index.npz")
+        start = time.perf_counter()
+        index.save(path)
+        results["save_s"] = time.perf_counter() - start
+        results["index_mb"] = os.path.getsize(path) / 2 ** 20
+        start = time.perf_counter()
+        SimilarityIndex.load(path)
+        results["load_s"] = time.perf_counter() - start
+    return results
+
+
+BENCHMARKS: Dict[str, Callable[[], Dict[str, Any]]] = {
+    "export": benchmark_export_latency,
+    "encoder_batching": benchmark_encoder_batching,
+    "gnn_batching": benchmark_gnn_batching,
+    "dataset_construction": benchmark_dataset_construction,
+    "data_parallel": benchmark_data_parallel,
+    "precision": benchmark_precision,
+    "graph_store": benchmark_graph_store,
+    "concurrent_stages": benchmark_concurrent_stages,
+    "compile": benchmark_compile,
+    "sparse_attention": benchmark_sparse_attention,
+    "gnn_heads": benchmark_gnn_heads,
+    "edge_typing": benchmark_edge_typing,
+    "graph_inference": benchmark_graph_inference,
+    "similarity_index": benchmark_similarity_index,
+    "edge_window": benchmark_edge_window,
+    "padded_gnn": benchmark_padded_gnn,
+    "transition_stats": benchmark_transition_stats,
+    "bootstrap": benchmark_bootstrap,
+    "causal_cache": benchmark_causal_cache,
+}
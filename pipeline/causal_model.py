@@ -1,3 +1,5 @@
+import hashlib
+import json
 from typing import Any, Dict, List, Optional, Tuple
 
 import numpy as np
@@ -130,8 +132,114 @@ def extract_causal_variables(conversation_record: dict) -> Dict[str, float]:
     }
 
 
+def causal_records_fingerprint(records: List[dict]) -> str:
+    """Hash of the transcript ids and every record field the causal variables use.
+
+    A few dict lookups per turn, so much cheaper than re-extracting the
+    variables; it changes when a record is edited in place or swapped.
+    """
+    ids: List[str] = []
+    texts: List[str] = []
+    record_values: List[Tuple[float, ...]] = []
+    turn_values: List[Tuple[float, ...]] = []
+    for rec in records:
+        turns = rec.get("turn_features", [])
+        ids.append(str(rec.get("transcript_id")))
+        # The fields extract_causal_variables reads, spelled out: this runs
+        # on every analysed record, so no per-field generator
+        record_values.append((
+            len(turns), rec.get("max_anger", 0.0), rec.get("max_frustration", 0.0),
+            rec.get("has_escalation_request", 0),
+        ))
+        for tf in turns:
+            texts.append(tf.get("text", ""))
+            turn_values.append((
+                tf.get("discourse_delay", 0.0), tf.get("discourse_denial", 0.0),
+                tf.get("word_count", 0), tf.get("is_agent", 0),
+            ))
+    h = hashlib.sha256("\0".join(ids).encode())
+    h.update("\0".join(texts).encode())
+    h.update(np.asarray(record_values, dtype=np.float64).tobytes())
+    h.update(np.asarray(turn_values, dtype=np.float64).tobytes())
+    return h.hexdigest()[:16]
+
+
+def causal_data_fingerprint(data: List[Dict[str, float]]) -> str:
+    """Hash of a population's causal variables (names and exact values)."""
+    names = sorted(data[0]) if data else []
+    h = hashlib.sha256(json.dumps(names).encode())
+    h.update(np.asarray([[d[name] for name in names] for d in data], dtype=np.float64).tobytes())
+    return h.hexdigest()[:16]
+
+
 # ── Causal effect estimation ─────────────────────────────────────────────
 
+def bootstrap_ates(
+    t_vals: np.ndarray,
+    y_vals: np.ndarray,
+    n_bootstrap: int,
+    rng: np.random.RandomState,
+    memory_mb: float = 256.0,
+) -> np.ndarray:
+    """Median-split ATEs of *n_bootstrap* resamples, in draw order.
+
+    Resamples are drawn as ``(B, n)`` index matrices, with ``B`` chosen so a
+    chunk fits in *memory_mb*, and each row is reduced to how often it drew
+    every sample in treatment order.  Cumulative sums of those counts then
+    give every row's median and its treated / control counts and outcome
+    sums without sorting or partitioning resamples.  ``rng`` yields the same
+    stream as *n_bootstrap* successive ``rng.choice(n, n)`` calls, so the
+    result matches a per-resample loop.  Resamples with an empty treated or
+    control group are dropped.
+    """
+    n = len(t_vals)
+    order = np.argsort(t_vals, kind="stable")
+    t_sorted, y_sorted = t_vals[order], y_vals[order].astype(np.float64)
+    rank = np.empty(n, dtype=np.int64)
+    rank[order] = np.arange(n)
+    del order
+    # Peak per resample cell: two int64 arrays at a time (indices -> ranks,
+    # ranks -> counts, counts -> cumsum or weighted outcomes) plus one bool
+    # scan.  t_sorted, y_sorted and rank are live throughout.
+    bytes_per_row = n * (8 + 8 + 1)
+    budget = memory_mb * 2 ** 20 - 3 * 8 * n
+    chunk = max(1, min(n_bootstrap, int(budget // max(bytes_per_row, 1))))
+    ates: List[np.ndarray] = []
+    for start in range(0, n_bootstrap, chunk):
+        rows = min(chunk, n_bootstrap - start)
+        row_ids = np.arange(rows)
+        idx = rng.randint(0, n, size=(rows, n))
+        flat = rank[idx]
+        del idx
+        flat += (row_ids * n)[:, None]
+        counts = np.bincount(flat.ravel(), minlength=rows * n).reshape(rows, n)
+        del flat
+        cum_counts = np.cumsum(counts, axis=1)
+        # Sorted position of a row's k-th smallest draw: first cumsum above k
+        lower = (cum_counts <= (n - 1) // 2).sum(axis=1)
+        upper = (cum_counts <= n // 2).sum(axis=1)
+        median = (t_sorted[lower] + t_sorted[upper]) / 2
+        # Samples before ``first`` in treatment order are the control group
+        first = np.searchsorted(t_sorted, median, side="left")
+        has_control = first > 0
+        n_control = np.where(has_control, cum_counts[row_ids, np.maximum(first - 1, 0)], 0)
+        del cum_counts
+        # Outcome sums over [row start, first) and [first, row end)
+        bounds = np.stack([row_ids * n, row_ids * n + first], axis=1).ravel()
+        weighted = counts * y_sorted
+        del counts
+        sums = np.add.reduceat(weighted.ravel(), bounds)
+        del weighted
+        control_sum = np.where(has_control, sums[0::2], 0.0)
+        treated_sum = sums[1::2]
+        n_treated = n - n_control
+        valid = (n_treated > 0) & (n_control > 0)
+        ates.append(
+            treated_sum[valid] / n_treated[valid] - control_sum[valid] / n_control[valid],
+        )
+    return np.concatenate(ates) if ates else np.zeros(0)
+
+
 def estimate_causal_effect(
     data: List[Dict[str, float]],
     treatment: str,
@@ -164,19 +272,11 @@ def estimate_causal_effect(
 
     # Bootstrap confidence interval
     bootstrap_rng = np.random.RandomState(config.n_bootstrap)
-    boot_ates: List[float] = []
-    n = len(data)
-    for _ in range(config.n_bootstrap):
-        idx = bootstrap_rng.choice(n, size=n, replace=True)
-        t_b = t_vals[idx]
-        y_b = y_vals[idx]
-        med = float(np.median(t_b))
-        tr = t_b >= med
-        ct = ~tr
-        if tr.sum() > 0 and ct.sum() > 0:
-            boot_ates.append(float(y_b[tr].mean() - y_b[ct].mean()))
-
-    if boot_ates:
+    boot_ates = bootstrap_ates(
+        t_vals, y_vals, config.n_bootstrap, bootstrap_rng, config.bootstrap_memory_mb,
+    )
+
+    if len(boot_ates):
         ci_lower = float(np.percentile(boot_ates, 2.5))
         ci_upper = float(np.percentile(boot_ates, 97.5))
     else:
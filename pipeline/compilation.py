@@ -0,0 +1,174 @@
+import logging
+from typing import Any, Callable, Dict, Optional
+
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+
+logger = logging.getLogger(__name__)
+
+# Smallest padded size; shapes below it all share one compiled graph
+MIN_BUCKET = 8
+# Padded edges per padded node in a GNN bucket (discourse graphs link each
+# turn to the next ``edge_window`` turns, so real graphs rarely need more)
+EDGES_PER_NODE = 4
+
+
+def bucket_size(n: int, minimum: int = MIN_BUCKET) -> int:
+    """Next power of two ``>= n`` (at least *minimum*)."""
+    size = minimum
+    while size < n:
+        size *= 2
+    return size
+
+
+def _recompile_limit() -> int:
+    """Shapes one ``torch.compile``d function may specialise on before dynamo
+    stops recompiling and silently runs it eagerly (8 by default)."""
+    config = torch._dynamo.config
+    return int(getattr(config, "recompile_limit", getattr(config, "cache_size_limit", 8)))
+
+
+def _shape_key(args: tuple, kwargs: dict) -> tuple:
+    """What a ``dynamic=False`` compile specialises on: tensor shapes and other values."""
+    return tuple(
+        tuple(a.shape) if isinstance(a, torch.Tensor) else a
+        for a in (*args, *sorted(kwargs.items()))
+    )
+
+
+def _pad_dim(t: torch.Tensor, size: int, dim: int, value: float = 0) -> torch.Tensor:
+    """Pad *t* at the end of dimension *dim* up to *size*."""
+    extra = size - t.shape[dim]
+    if extra <= 0:
+        return t
+    pad = [0, 0] * (t.dim() - dim - 1) + [0, extra]
+    return F.pad(t, pad, value=value)
+
+
+class CompiledForward:
+    """``torch.compile``d callable that falls back to eager mode on failure.
+
+    Compilation is lazy, so errors from dynamo or inductor surface on the
+    first call; the callable then logs once and runs *fn* eagerly for good.
+    Each distinct input shape is a separate graph; once dynamo's recompile
+    limit is reached, new shapes run eagerly, with a warning the first time.
+    """
+
+    def __init__(self, fn: Callable[..., Any], enabled: bool = True):
+        self.eager = fn
+        self._compiled: Optional[Callable[..., Any]] = None
+        self._shapes: set = set()
+        self._warned_limit = False
+        if enabled:
+            try:
+                self._compiled = torch.compile(fn, dynamic=False)
+            except Exception as exc:  # e.g. unsupported Python/platform
+                logger.warning("torch.compile unavailable (%s); using eager mode", exc)
+
+    @property
+    def compiled(self) -> bool:
+        return self._compiled is not None
+
+    def _forward(self, *args: Any, **kwargs: Any) -> Any:
+        if self._compiled is not None:
+            key = _shape_key(args, kwargs)
+            if key not in self._shapes and len(self._shapes) >= _recompile_limit():
+                if not self._warned_limit:
+                    logger.warning(
+                        "%d input shapes compiled, torch._dynamo's recompile limit; "
+                        "running new shapes such as %s eagerly", len(self._shapes), key,
+                    )
+                    self._warned_limit = True
+                return self.eager(*args, **kwargs)
+            try:
+                out = self._compiled(*args, **kwargs)
+            except Exception as exc:
+                logger.warning("torch.compile failed (%s); falling back to eager mode", exc)
+                self._compiled = None
+            else:
+                self._shapes.add(key)
+                return out
+        return self.eager(*args, **kwargs)
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        return self._forward(*args, **kwargs)
+
+
+class _BucketedEncoderBatch(CompiledForward):
+    """``_FeatureEncoder.forward_batch`` with the turn axis padded to a bucket."""
+
+    def __call__(self, turn_features: torch.Tensor, mask: torch.Tensor) -> Dict[str, torch.Tensor]:
+        num_turns = turn_features.shape[1]
+        size = bucket_size(num_turns)
+        out = self._forward(_pad_dim(turn_features, size, 1), _pad_dim(mask, size, 1, False))
+        for key in ("turn_embeddings", "emotion_logits"):
+            out[key] = out[key][:, :num_turns]
+        return out
+
+
+class _BucketedGNN(CompiledForward):
+    """``DiscourseGNN.forward`` padded to one bucket size.
+
+    A bucket of *size* holds *size* nodes, ``EDGES_PER_NODE * size`` edges
+    and *size* graph slots, so there is one compiled shape per bucket rather
+    than one per (nodes, edges, graphs) combination.  Padding nodes form one
+    extra graph, joined by self-loop padding edges, so the batch mask keeps
+    them out of the real graphs' attention and pooling; unused graph slots
+    pool to zero.  The outputs are sliced back to the real nodes and graphs.
+    """
+
+    def __call__(
+        self,
+        node_features: torch.Tensor,
+        edge_index: torch.Tensor,
+        batch: Optional[torch.Tensor] = None,
+        num_graphs: Optional[int] = None,
+    ) -> Dict[str, torch.Tensor]:
+        num_nodes, num_edges = node_features.shape[0], edge_index.shape[1]
+        single = batch is None
+        if single:
+            batch = torch.zeros(num_nodes, dtype=torch.long, device=node_features.device)
+            num_graphs = 1
+        elif num_graphs is None:
+            num_graphs = int(batch.max()) + 1
+
+        # At least one padding node so padding edges have somewhere to go
+        size = bucket_size(max(num_nodes + 1, -(-num_edges // EDGES_PER_NODE)))
+        x = _pad_dim(node_features, size, 0)
+        batch = _pad_dim(batch, size, 0, num_graphs)
+        edge_index = _pad_dim(edge_index, EDGES_PER_NODE * size, 1, num_nodes)
+
+        out = self._forward(x, edge_index, batch, size)
+        graph_emb = out["graph_embedding"][:num_graphs]
+        return {
+            "node_embeddings": out["node_embeddings"][:num_nodes],
+            "graph_embedding": graph_emb[0] if single else graph_emb,
+        }
+
+
+class _BucketedTurnEncoder(CompiledForward):
+    """``TurnEncoder.forward`` with the token axis padded to a bucket."""
+
+    def __call__(self, input_ids: torch.Tensor, attention_mask: torch.Tensor) -> Dict[str, torch.Tensor]:
+        seq_len = input_ids.shape[1]
+        size = bucket_size(seq_len)
+        out = self._forward(_pad_dim(input_ids, size, 1), _pad_dim(attention_mask, size, 1))
+        out["evidence_logits"] = out["evidence_logits"][:, :seq_len]
+        return out
+
+
+def compile_encoder_batch(model: nn.Module, enabled: bool) -> Callable[..., Dict[str, torch.Tensor]]:
+    """``model.forward_batch``, compiled over turn-count buckets when *enabled*."""
+    return _BucketedEncoderBatch(model.forward_batch) if enabled else model.forward_batch
+
+
+def compile_gnn(model: nn.Module, enabled: bool) -> Callable[..., Dict[str, torch.Tensor]]:
+    """*model*'s forward, compiled over graph-size buckets when *enabled*."""
+    return _BucketedGNN(model) if enabled else model
+
+
+def compile_turn_encoder(model: nn.Module, enabled: bool) -> Callable[..., Dict[str, torch.Tensor]]:
+    """*model*'s forward, compiled over token-length buckets when *enabled*."""
+    return _BucketedTurnEncoder(model) if enabled else model
+
@@ -1,5 +1,5 @@
 from dataclasses import dataclass, field
-from typing import List
+from typing import List, Optional
 
 
 @dataclass
@@ -13,6 +13,10 @@ class DataConfig:
     val_size: float = 0.1
     test_size: float = 0.1
     random_seed: int = 42
+    # Training DataLoader settings
+    num_workers: int = 0
+    prefetch_factor: int = 2
+    persistent_workers: bool = False
 
 
 @dataclass
@@ -27,6 +31,10 @@ class EncoderConfig:
     learning_rate: float = 2e-5
     epochs: int = 10
     batch_size: int = 16
+    # Early stopping / LR plateau schedule (on validation loss)
+    early_stopping_patience: int = 5
+    lr_patience: int = 2
+    lr_factor: float = 0.5
 
 
 @dataclass
@@ -44,13 +52,37 @@ class DiscourseConfig:
             "escalation_request",
         ]
     )
+    # Each turn links to the next ``edge_window`` turns; ``speaker_edges`` also
+    # links a customer turn to the next agent reply beyond that window
+    edge_window: int = 2
+    speaker_edges: bool = False
     gnn_hidden_dim: int = 256
     gnn_num_layers: int = 3
     gnn_heads: int = 4
+    gnn_head_merge: str = "concat"  # "concat" (hidden / heads per head) or "mean"
     dropout: float = 0.3
     learning_rate: float = 1e-3
     epochs: int = 30
     batch_size: int = 32
+    # Early stopping / LR plateau schedule (on validation loss)
+    early_stopping_patience: int = 5
+    lr_patience: int = 2
+    lr_factor: float = 0.5
+    # O(E) segment softmax over edges instead of dense N x N attention rows
+    sparse_attention: bool = False
+    # Batched inference pads graphs up to this many nodes into one (B, N, H)
+    # tensor with masked bmm attention; larger graphs (or 0) use edge lists
+    padded_max_nodes: int = 32
+    # Persisted discourse-graph store; None places it under the checkpoint dir
+    use_graph_cache: bool = True
+    graph_cache_dir: Optional[str] = None
+    # IVF similarity index over graph embeddings; None lists is ~2 * sqrt(N)
+    similarity_n_lists: Optional[int] = None
+    similarity_n_probe: int = 8
+    # Corpus transition statistics: follow-within windows up to this many
+    # edges and edge-type n-grams up to this length
+    transition_max_lag: int = 4
+    transition_max_ngram: int = 3
 
 
 @dataclass
@@ -70,6 +102,8 @@ class CausalConfig:
     treatment: str = "delay"
     outcome: str = "escalation"
     n_bootstrap: int = 100
+    # Bootstrap resamples are drawn and evaluated in chunks of this many MB
+    bootstrap_memory_mb: float = 256.0
     significance_level: float = 0.05
 
 
@@ -82,6 +116,22 @@ class ExplanationConfig:
     max_generation_len: int = 512
     context_window: int = 10
 
+@dataclass
+class TrainingConfig:
+    """Settings shared by the encoder and GNN training loops."""
+
+    checkpoint_every: int = 1  # epochs between resumable training-state saves
+    # Local data-parallel training over gloo; 1 trains in-process
+    world_size: int = 1
+    master_port: int = 0  # 0 picks a free port
+    # Train the encoder and GNN in parallel processes with split thread budgets
+    concurrent_stages: bool = False
+    # Warm-start fine-tuning on new transcripts (train_incremental)
+    incremental_epochs: int = 3
+    replay_ratio: float = 1.0  # old records replayed per new record
+    incremental_lr_scale: float = 0.1  # fine-tuning LR relative to the stage LR
+
+
 def _resolve_device(device: str) -> str:
     """Resolve ``'auto'`` to the best available device."""
     if device == "auto":
@@ -98,7 +148,15 @@ class PipelineConfig:
     discourse: DiscourseConfig = field(default_factory=DiscourseConfig)
     causal: CausalConfig = field(default_factory=CausalConfig)
     explanation: ExplanationConfig = field(default_factory=ExplanationConfig)
+    training: TrainingConfig = field(default_factory=TrainingConfig)
     device: str = "auto"  # "cpu", "cuda", or "auto" (auto-detect)
+    precision: str = "fp32"  # "fp32", or "bf16" for autocast forward passes
+    # torch.compile the model forwards (shape-bucketed; falls back to eager)
+    compile_models: bool = False
 
     def __post_init__(self) -> None:
         self.device = _resolve_device(self.device)
+        if self.precision not in ("fp32", "bf16"):
+            raise ValueError(
+                f"precision must be 'fp32' or 'bf16', got {self.precision!r}"
+            )
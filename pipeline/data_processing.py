@@ -1,6 +1,6 @@
 import json
 import re
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
@@ -10,6 +10,30 @@ from .constants import EMOTION_KEYWORDS, DISCOURSE_KEYWORDS, OUTCOME_MAP
 
 _INTENT_TO_OUTCOME: Dict[str, str] = {}
 
+# Order and normalisation of the 17 numeric turn features used by the models
+TURN_FEATURE_KEYS: List[str] = [
+    "is_agent",
+    "turn_position",
+    "word_count",
+    "question_marks",
+    "exclamation_marks",
+    "emotion_anger",
+    "emotion_frustration",
+    "emotion_satisfaction",
+    "emotion_confusion",
+    "emotion_urgency",
+    "discourse_complaint",
+    "discourse_denial",
+    "discourse_delay",
+    "discourse_apology",
+    "discourse_clarification",
+    "discourse_promise",
+    "discourse_escalation_request",
+]
+_TURN_FEATURE_DIVISORS = np.array(
+    [1.0, 1.0, 100.0, 5.0, 5.0] + [1.0] * 12, dtype=np.float64,
+)
+
 
 def _infer_outcome(intent: str) -> str:
     """Heuristically map an intent string to a coarse outcome label."""
@@ -25,6 +49,60 @@ def _infer_outcome(intent: str) -> str:
     return "resolved"
 
 
+def turn_feature_array(turn_features: List[dict]) -> np.ndarray:
+    """Return a ``(num_turns, 17)`` float32 matrix of normalised turn features.
+
+    Filled one column at a time so the only float64 temporary is a single
+    column, never a full row-of-lists copy of the data.
+    """
+    n = len(turn_features)
+    out = np.empty((n, len(TURN_FEATURE_KEYS)), dtype=np.float32)
+    for j, key in enumerate(TURN_FEATURE_KEYS):
+        col = np.fromiter(
+            (tf.get(key, 0.0) for tf in turn_features), dtype=np.float64, count=n,
+        )
+        col /= _TURN_FEATURE_DIVISORS[j]
+        out[:, j] = col
+    return out
+
+
+def turn_embedding_matrix(turn_features: List[dict], embed_dim: int = 32) -> np.ndarray:
+    """Turn features zero-padded (or truncated) to ``(num_turns, embed_dim)``."""
+    return pad_feature_matrix(turn_feature_array(turn_features), embed_dim)
+
+
+def pad_feature_matrix(features: np.ndarray, embed_dim: int = 32) -> np.ndarray:
+    """Zero-pad (or truncate) a ``(num_turns, 17)`` feature matrix to *embed_dim* columns."""
+    emb = np.zeros((features.shape[0], embed_dim), dtype=np.float32)
+    width = min(embed_dim, features.shape[1])
+    emb[:, :width] = features[:, :width]
+    return emb
+
+
+def conversation_feature_matrix(
+    records: List[dict],
+    max_turns: Optional[int] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Stack the turns of every record into one contiguous feature matrix.
+
+    Returns ``(features, offsets)`` where conversation *i* occupies rows
+    ``offsets[i]:offsets[i + 1]`` of the ``(total_turns, 17)`` float32 matrix.
+    """
+    convs = [rec.get("turn_features", [])[:max_turns] for rec in records]
+    offsets = np.zeros(len(convs) + 1, dtype=np.int64)
+    np.cumsum([len(c) for c in convs], out=offsets[1:])
+    features = turn_feature_array([tf for conv in convs for tf in conv])
+    return features, offsets
+
+
+def emotion_labels(features: np.ndarray) -> np.ndarray:
+    """Dominant emotion per turn (0 = neutral, 1-based emotion index otherwise)."""
+    emotions = features[:, 5:10]
+    labels = emotions.argmax(axis=1) + 1
+    labels[emotions.max(axis=1) == 0] = 0
+    return labels.astype(np.int64)
+
+
 # ── public API ─────────────────────────────────────────────────────────────
 
 def load_data(cfg: PipelineConfig) -> Tuple[pd.DataFrame, Dict[str, list]]:
@@ -35,6 +113,26 @@ def load_data(cfg: PipelineConfig) -> Tuple[pd.DataFrame, Dict[str, list]]:
     return df, conversations
 
 
+# Bit k of a turn's ``discourse_keyword_mask`` is DISCOURSE_KEYWORD_LIST[k]
+DISCOURSE_KEYWORD_LIST: List[Tuple[str, str]] = [
+    (relation, kw) for relation, keywords in DISCOURSE_KEYWORDS.items() for kw in keywords
+]
+_RELATION_BITS: Dict[str, int] = {
+    relation: sum(1 << k for k, (rel, _) in enumerate(DISCOURSE_KEYWORD_LIST) if rel == relation)
+    for relation in DISCOURSE_KEYWORDS
+}
+
+
+def discourse_keyword_mask(text: str) -> int:
+    """Bitmask of the DISCOURSE_KEYWORDS found in *text* (case-insensitive)."""
+    text_lower = text.lower()
+    mask = 0
+    for k, (_, kw) in enumerate(DISCOURSE_KEYWORD_LIST):
+        if kw in text_lower:
+            mask |= 1 << k
+    return mask
+
+
 def _keyword_score(text: str, keywords: List[str]) -> float:
     """Return fraction of keywords that appear in *text*."""
     text_lower = text.lower()
@@ -63,9 +161,12 @@ def extract_turn_features(turn: dict, turn_idx: int, total_turns: int) -> dict:
     for emotion, keywords in EMOTION_KEYWORDS.items():
         features[f"emotion_{emotion}"] = _keyword_score(text, keywords)
 
-    # discourse keyword scores
+    # discourse keyword scores, from one scan that discourse edge typing reuses
+    mask = discourse_keyword_mask(text)
+    features["discourse_keyword_mask"] = mask
     for relation, keywords in DISCOURSE_KEYWORDS.items():
-        features[f"discourse_{relation}"] = _keyword_score(text, keywords)
+        hits = bin(mask & _RELATION_BITS[relation]).count("1")
+        features[f"discourse_{relation}"] = hits / max(len(keywords), 1)
 
     return features
 
@@ -74,6 +175,7 @@ def build_conversation_features(
     transcript_id: str,
     turns: list,
     intent: str,
+    domain: str = "Unknown",
 ) -> dict:
     outcome = _infer_outcome(intent)
     outcome_id = OUTCOME_MAP.get(outcome, 0)
@@ -92,6 +194,7 @@ def build_conversation_features(
         "outcome": outcome,
         "outcome_id": outcome_id,
         "intent": intent,
+        "domain": domain,
         "num_turns": len(turns),
         "avg_turn_len": float(np.mean([tf["word_count"] for tf in turn_feats])),
         "max_anger": float(max(anger_scores)) if anger_scores else 0.0,
@@ -111,15 +214,18 @@ def process_dataset(cfg: PipelineConfig) -> List[dict]:
     """
     df, conversations = load_data(cfg)
 
-    # Build a fast look-up from transcript_id → intent
-    id_to_intent: Dict[str, str] = dict(
-        zip(df["transcript_id"].astype(str), df["intent"])
+    # Build fast look-ups from transcript_id → intent / domain
+    ids = df["transcript_id"].astype(str)
+    id_to_intent: Dict[str, str] = dict(zip(ids, df["intent"]))
+    id_to_domain: Dict[str, str] = (
+        dict(zip(ids, df["domain"])) if "domain" in df.columns else {}
     )
 
     records: List[dict] = []
     for tid, turns in conversations.items():
         intent = id_to_intent.get(tid, "Unknown")
-        record = build_conversation_features(tid, turns, intent)
+        domain = id_to_domain.get(tid, "Unknown")
+        record = build_conversation_features(tid, turns, intent, domain)
         records.append(record)
 
     return records
@@ -1,12 +1,14 @@
 import math
 from typing import Dict, List, Optional, Tuple
 
+import numpy as np
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
 
 from .config import DiscourseConfig
 from .constants import DISCOURSE_KEYWORDS
+from .data_processing import DISCOURSE_KEYWORD_LIST, discourse_keyword_mask
 
 
 # ── edge-type detection (keyword-based bootstrap) ────────────────────────
@@ -27,28 +29,177 @@ def detect_edge_type(source_text: str, target_text: str) -> Optional[str]:
     return best_type
 
 
+# Relation order matches detect_edge_type's scan, so argmax breaks ties alike
+_RELATIONS = list(_EDGE_KEYWORDS)
+_KEYWORD_RELATION = np.array(
+    [_RELATIONS.index(rel) for rel, _ in DISCOURSE_KEYWORD_LIST], dtype=np.int64,
+)
+# Edge labels by relation index; pairs without any keyword default to the last
+_LABELS = _RELATIONS + ["clarification"]
+_RELATION_ONEHOT = np.eye(len(_RELATIONS), dtype=np.int64)[_KEYWORD_RELATION]
+_RELATION_SIZES = np.array([len(_EDGE_KEYWORDS[rel]) for rel in _RELATIONS], dtype=np.float64)
+# A keyword straddles the " " joining two turns only at one of its own
+# spaces: the part before it ends the first turn, the part after starts the next
+_KEYWORD_SPLITS = [
+    (k, kw[:p], kw[p + 1:])
+    for k, (_, kw) in enumerate(DISCOURSE_KEYWORD_LIST)
+    for p, ch in enumerate(kw) if ch == " "
+]
+_SPLIT_KEYWORD = np.array([k for k, _, _ in _KEYWORD_SPLITS], dtype=np.int64)
+_SPLIT_HEADS = tuple(head for _, head, _ in _KEYWORD_SPLITS)
+_SPLIT_TAILS = tuple(tail for _, _, tail in _KEYWORD_SPLITS)
+
+
+def _keyword_bits(masks: List[int]) -> np.ndarray:
+    """``(T, K)`` bool matrix of per-turn ``discourse_keyword_mask`` ints."""
+    num_keywords = len(DISCOURSE_KEYWORD_LIST)
+    nbytes = (num_keywords + 7) // 8
+    raw = np.frombuffer(b"".join(m.to_bytes(nbytes, "little") for m in masks), dtype=np.uint8)
+    bits = np.unpackbits(raw.reshape(len(masks), nbytes), axis=1, bitorder="little")
+    return bits[:, :num_keywords].astype(bool)
+
+
+def _split_bits(lowered: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Per turn and keyword split: does the turn end with the head / start with the tail?"""
+    ends = np.zeros((len(lowered), len(_KEYWORD_SPLITS)), dtype=bool)
+    starts = np.zeros_like(ends)
+    for i, text in enumerate(lowered):
+        # One C-level check per turn rules out almost every turn
+        if text.endswith(_SPLIT_HEADS):
+            ends[i] = [text.endswith(head) for head in _SPLIT_HEADS]
+        if text.startswith(_SPLIT_TAILS):
+            starts[i] = [text.startswith(tail) for tail in _SPLIT_TAILS]
+    return ends, starts
+
+
+def _turn_is_agent(turn: dict) -> bool:
+    if "is_agent" in turn:
+        return bool(turn["is_agent"])
+    return str(turn.get("speaker", "")).lower() == "agent"
+
+
+def window_pairs(
+    node_offsets: np.ndarray,
+    window: int = 2,
+    is_agent: Optional[np.ndarray] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """``(src, tgt)`` node pairs of the discourse graphs, in CSR order.
+
+    Every turn links to each of the next *window* turns of its conversation
+    (conversation ``c`` owns nodes ``node_offsets[c]:node_offsets[c + 1]``).
+    With *is_agent* (a bool per node), each customer turn also links to the
+    next agent reply when that lies beyond the window.
+    """
+    if window < 1:
+        raise ValueError(f"window must be at least 1, got {window}")
+    num_nodes = int(node_offsets[-1])
+    nodes = np.arange(num_nodes)
+    conv_end = np.repeat(node_offsets[1:], np.diff(node_offsets))
+    # Source-major with increasing offsets, so already in CSR order
+    src = np.repeat(nodes, window)
+    tgt = src + np.tile(np.arange(1, window + 1), num_nodes)
+    keep = tgt < conv_end[src]
+    src, tgt = src[keep], tgt[keep]
+    if is_agent is None:
+        return src, tgt
+
+    agents = np.nonzero(is_agent)[0]
+    after = np.searchsorted(agents, nodes, side="right")
+    reply = np.append(agents, num_nodes)[after]  # num_nodes: no later agent turn
+    customers = np.nonzero(~is_agent & (reply < conv_end) & (reply - nodes > window))[0]
+    src = np.concatenate([src, customers])
+    tgt = np.concatenate([tgt, reply[customers]])
+    order = np.lexsort((tgt, src))
+    return src[order], tgt[order]
+
+
+def _typed_pairs(
+    conversations: List[List[dict]],
+    window: int = 2,
+    speaker_edges: bool = False,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """``(src, tgt, relation, node_offsets)`` with relations indexing ``_LABELS``.
+
+    Equivalent to running :func:`detect_edge_type` on every pair from
+    :func:`window_pairs`, but each turn's keywords are scanned once (reusing
+    the featurizer's ``discourse_keyword_mask`` when present) and every
+    pair is scored with array ops.
+    """
+    turns = [t for conv in conversations for t in conv]
+    node_offsets = np.zeros(len(conversations) + 1, dtype=np.int64)
+    np.cumsum([len(conv) for conv in conversations], out=node_offsets[1:])
+    is_agent = np.array([_turn_is_agent(t) for t in turns], dtype=bool) if speaker_edges else None
+    src, tgt = window_pairs(node_offsets, window, is_agent)
+
+    lowered = [t["text"].lower() for t in turns]
+    masks = [
+        t["discourse_keyword_mask"] if "discourse_keyword_mask" in t
+        else discourse_keyword_mask(text)
+        for t, text in zip(turns, lowered)
+    ]
+    bits = _keyword_bits(masks)
+    ends, starts = _split_bits(lowered)
+
+    hits = bits[src] | bits[tgt]
+    rows, splits = np.nonzero(ends[src] & starts[tgt])
+    hits[rows, _SPLIT_KEYWORD[splits]] = True
+    scores = (hits.astype(np.int64) @ _RELATION_ONEHOT) / _RELATION_SIZES
+    relation = scores.argmax(axis=1)
+    # No keyword at all: default relation for adjacent turns
+    relation[scores.max(axis=1) == 0] = len(_RELATIONS)
+    return src, tgt, relation, node_offsets
+
+
+def _relation_attrs(edge_types: List[str]) -> np.ndarray:
+    """``edge_types`` index of each ``_LABELS`` relation (0 when not a type)."""
+    etype_to_idx = {et: i for i, et in enumerate(edge_types)}
+    return np.array([etype_to_idx.get(label, 0) for label in _LABELS], dtype=np.int64)
+
+
+def discourse_edge_arrays(
+    conversations: List[List[dict]],
+    edge_types: List[str],
+    window: int = 2,
+    speaker_edges: bool = False,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Keyword-typed discourse edges of many conversations in one pass.
+
+    Returns ``(src, tgt, edge_type_idx, node_offsets)``.  Node ids run over
+    the concatenated turns, conversation ``c`` owning
+    ``node_offsets[c]:node_offsets[c + 1]``, and edges are in CSR order.
+    See :func:`window_pairs` for *window* and *speaker_edges*.
+    """
+    src, tgt, relation, node_offsets = _typed_pairs(conversations, window, speaker_edges)
+    return src, tgt, _relation_attrs(edge_types)[relation], node_offsets
+
+
+def discourse_edges(
+    turns: List[dict],
+    edge_types: List[str],
+    window: int = 2,
+    speaker_edges: bool = False,
+) -> Tuple[List[int], List[int], List[int], List[str]]:
+    """Keyword-typed edges as ``(src, tgt, edge_type_idx, edge_labels)``.
+
+    Edges are emitted in source order, i.e. already in CSR order.
+    """
+    src, tgt, relation, _ = _typed_pairs([turns], window, speaker_edges)
+    etype_to_idx = {et: i for i, et in enumerate(edge_types)}
+    label_list = [_LABELS[r] for r in relation.tolist()]
+    attr_list = [etype_to_idx.get(label, 0) for label in label_list]
+    return src.tolist(), tgt.tolist(), attr_list, label_list
+
+
 def build_discourse_graph(
     turns: List[dict],
     turn_embeddings: torch.Tensor,
     edge_types: List[str],
+    window: int = 2,
+    speaker_edges: bool = False,
 ) -> dict:
-    etype_to_idx = {et: i for i, et in enumerate(edge_types)}
-    src_list, tgt_list, attr_list, label_list = [], [], [], []
-
-    for i in range(len(turns)):
-        # Connect to next and +2 turns (captures adjacency + skip relations)
-        for offset in (1, 2):
-            j = i + offset
-            if j >= len(turns):
-                break
-            etype = detect_edge_type(turns[i]["text"], turns[j]["text"])
-            if etype is None:
-                etype = "clarification"  # default relation for adjacent turns
-            src_list.append(i)
-            tgt_list.append(j)
-            attr_list.append(etype_to_idx.get(etype, 0))
-            label_list.append(etype)
-
+    src_list, tgt_list, attr_list, label_list = discourse_edges(
+        turns, edge_types, window, speaker_edges,
+    )
     edge_index = torch.tensor([src_list, tgt_list], dtype=torch.long)
     edge_attr = torch.tensor(attr_list, dtype=torch.long)
 
@@ -60,49 +211,227 @@ def build_discourse_graph(
     }
 
 
+def batch_graphs(graphs: List[dict]) -> dict:
+    """Merge *graphs* into one disjoint-union graph.
+
+    Node features are concatenated, each graph's ``edge_index`` is offset by
+    the number of nodes before it, and ``batch`` maps every node to the index
+    of the graph it came from.
+    """
+    node_feats = [g["node_features"] for g in graphs]
+    counts = [nf.shape[0] for nf in node_feats]
+    offsets = np.cumsum([0] + counts[:-1])
+    edge_index = torch.cat(
+        [g["edge_index"] + int(off) for g, off in zip(graphs, offsets)], dim=1,
+    )
+    edge_attr = torch.cat([g["edge_attr"] for g in graphs])
+    batch = torch.repeat_interleave(
+        torch.arange(len(graphs)), torch.tensor(counts, dtype=torch.long),
+    )
+    return {
+        "node_features": torch.cat(node_feats, dim=0),
+        "edge_index": edge_index,
+        "edge_attr": edge_attr,
+        "batch": batch,
+        "num_graphs": len(graphs),
+    }
+
+
+def pad_graphs(graphs: List[dict]) -> Tuple[torch.Tensor, torch.Tensor, torch.Tensor]:
+    """Pack *graphs* as ``(B, N_max, D)`` features, ``(B, N_max, N_max)`` adjacency and a node mask.
+
+    ``adjacency[b, i, j]`` is True for an edge ``i -> j`` of graph *b*;
+    ``node_mask[b, i]`` is False for padding nodes.
+    """
+    merged = batch_graphs(graphs)
+    counts = torch.tensor([g["node_features"].shape[0] for g in graphs], dtype=torch.long)
+    starts = torch.cumsum(counts, 0) - counts
+    batch = merged["batch"]
+    pos = torch.arange(batch.numel()) - starts[batch]  # node index within its graph
+    num_graphs, max_nodes = len(graphs), int(counts.max()) if len(graphs) else 0
+
+    feats = merged["node_features"]
+    x = feats.new_zeros(num_graphs, max_nodes, feats.shape[1])
+    x[batch, pos] = feats
+    src, tgt = merged["edge_index"]
+    adjacency = torch.zeros(num_graphs, max_nodes, max_nodes, dtype=torch.bool)
+    adjacency[batch[src], pos[src], pos[tgt]] = True
+    node_mask = torch.arange(max_nodes).unsqueeze(0) < counts.unsqueeze(1)
+    return x, adjacency, node_mask
+
+
 # ── GNN model ────────────────────────────────────────────────────────────
 
 class GraphAttentionLayer(nn.Module):
+    """Multi-head graph attention.
+
+    All heads share one projection ``W`` to ``heads x head_dim`` features and
+    are scored, softmaxed and aggregated together in batched ops.  Head
+    outputs are concatenated (``merge="concat"``, ``head_dim = out_dim /
+    heads``) or averaged (``merge="mean"``, ``head_dim = out_dim``).
+
+    The dense path softmaxes each node's full row of an ``N x N`` score
+    matrix per head, where non-edges score 0.  With ``sparse=True`` the
+    softmax runs only over each node's out-edges (a segment softmax via
+    scatter-max and ``index_add_``), so memory and compute are O(E) instead
+    of O(N²).
+    """
 
-    def __init__(self, in_dim: int, out_dim: int, dropout: float = 0.3):
+    def __init__(
+        self,
+        in_dim: int,
+        out_dim: int,
+        dropout: float = 0.3,
+        sparse: bool = False,
+        heads: int = 1,
+        merge: str = "concat",
+    ):
         super().__init__()
-        self.W = nn.Linear(in_dim, out_dim, bias=False)
-        self.attn = nn.Linear(2 * out_dim, 1, bias=False)
+        if merge not in ("concat", "mean"):
+            raise ValueError(f"merge must be 'concat' or 'mean', got {merge!r}")
+        if merge == "concat" and out_dim % heads:
+            raise ValueError(f"out_dim {out_dim} is not divisible by {heads} heads")
+        self.heads = heads
+        self.concat = merge == "concat"
+        self.head_dim = out_dim // heads if self.concat else out_dim
+        self.W = nn.Linear(in_dim, heads * self.head_dim, bias=False)
+        # Row k scores head k's [h_src, h_tgt]; with one head this is the
+        # original single-head scorer, so its checkpoints load unchanged
+        self.attn = nn.Linear(2 * self.head_dim, heads, bias=False)
         self.leaky_relu = nn.LeakyReLU(0.2)
         self.dropout = nn.Dropout(dropout)
+        self.sparse = sparse
 
     def forward(
         self,
         x: torch.Tensor,
         edge_index: torch.Tensor,
+        batch: Optional[torch.Tensor] = None,
     ) -> torch.Tensor:
         """
         Parameters
         ----------
         x : (N, in_dim)
         edge_index : (2, E)
+        batch : (N,) optional graph index per node for disjoint-union
+            batches; attention never crosses graph boundaries.
 
         Returns
         -------
         (N, out_dim)
         """
-        h = self.W(x)  # (N, out_dim)
-        src, tgt = edge_index  # each (E,)
-
-        # Compute attention scores
-        edge_h = torch.cat([h[src], h[tgt]], dim=-1)  # (E, 2*out_dim)
-        e = self.leaky_relu(self.attn(edge_h)).squeeze(-1)  # (E,)
-
-        # Softmax over neighbours
         num_nodes = x.size(0)
-        alpha = torch.zeros(num_nodes, num_nodes, device=x.device)
-        alpha[src, tgt] = e
+        h = self.W(x).view(num_nodes, self.heads, self.head_dim)  # (N, H, d)
+        src, tgt = edge_index[0], edge_index[1]  # each (E,)
+
+        # Attention scores for every head at once.  a·[h_src, h_tgt] splits
+        # into a per-node source and target score, so no (E, H, 2d) tensor
+        # of edge features is built.
+        a_src, a_tgt = self.attn.weight.to(h.dtype).split(self.head_dim, dim=-1)  # (H, d) each
+        score_src = (h * a_src).sum(dim=-1)  # (N, H)
+        score_tgt = (h * a_tgt).sum(dim=-1)  # (N, H)
+        e = self.leaky_relu(score_src[src] + score_tgt[tgt])  # (E, H)
+
+        if self.sparse:
+            out = self._segment_attention(h, e, src, tgt, num_nodes)
+        else:
+            out = self._dense_attention(h, e, src, tgt, batch)
+        if self.concat:
+            return out.reshape(num_nodes, self.heads * self.head_dim)  # (N, out_dim)
+        return out.mean(dim=1)  # (N, out_dim)
+
+    def _dense_attention(
+        self,
+        h: torch.Tensor,
+        e: torch.Tensor,
+        src: torch.Tensor,
+        tgt: torch.Tensor,
+        batch: Optional[torch.Tensor],
+    ) -> torch.Tensor:
+        """Softmax over each node's full row of the per-head score matrix."""
+        num_nodes = h.size(0)
+        alpha = torch.zeros(self.heads, num_nodes, num_nodes, dtype=e.dtype, device=h.device)
+        alpha[:, src, tgt] = e.t()
+        if batch is not None:
+            same_graph = batch.unsqueeze(1) == batch.unsqueeze(0)
+            alpha = alpha.masked_fill(~same_graph, float("-inf"))
         alpha = F.softmax(alpha, dim=-1)
         alpha = self.dropout(alpha)
 
-        # Aggregate
-        out = torch.matmul(alpha, h)  # (N, out_dim)
-        return out
+        # Aggregate: (H, N, N) @ (H, N, d) -> (N, H, d)
+        return torch.matmul(alpha, h.transpose(0, 1)).transpose(0, 1)
+
+    def forward_padded(
+        self,
+        x: torch.Tensor,
+        adjacency: torch.Tensor,
+        node_mask: torch.Tensor,
+    ) -> torch.Tensor:
+        """:meth:`forward` for a padded batch of graphs (see ``pad_graphs``).
+
+        Scores every ``(B, H, N_max, N_max)`` node pair with batched matmuls
+        and masks them to the same attention rows as the dense or sparse
+        path, so the result matches per-graph calls on the real nodes.
+
+        Parameters
+        ----------
+        x : (B, N_max, in_dim)
+        adjacency : (B, N_max, N_max) bool, True for edges
+        node_mask : (B, N_max) bool, False for padding nodes
+
+        Returns
+        -------
+        (B, N_max, out_dim)
+        """
+        num_graphs, max_nodes = x.shape[:2]
+        h = self.W(x).view(num_graphs, max_nodes, self.heads, self.head_dim)
+        h = h.transpose(1, 2)  # (B, H, N, d)
+        a_src, a_tgt = self.attn.weight.to(h.dtype).split(self.head_dim, dim=-1)  # (H, d) each
+        score_src = (h * a_src.unsqueeze(1)).sum(dim=-1)  # (B, H, N)
+        score_tgt = (h * a_tgt.unsqueeze(1)).sum(dim=-1)  # (B, H, N)
+        e = self.leaky_relu(score_src.unsqueeze(-1) + score_tgt.unsqueeze(-2))  # (B, H, N, N)
+
+        edges = adjacency.unsqueeze(1)
+        if self.sparse:
+            # Only edges compete; rows without out-edges get a zero message
+            e = e.masked_fill(~edges, float("-inf"))
+            alpha = torch.nan_to_num(F.softmax(e, dim=-1), nan=0.0)
+        else:
+            # Non-edges score 0 within a graph; padding columns never count
+            e = torch.where(edges, e, torch.zeros((), dtype=e.dtype, device=e.device))
+            e = e.masked_fill(~node_mask[:, None, None, :], float("-inf"))
+            alpha = F.softmax(e, dim=-1)
+        alpha = self.dropout(alpha)
+
+        out = torch.matmul(alpha, h).transpose(1, 2)  # (B, N, H, d)
+        if self.concat:
+            return out.reshape(num_graphs, max_nodes, self.heads * self.head_dim)
+        return out.mean(dim=2)
+
+    def _segment_attention(
+        self,
+        h: torch.Tensor,
+        e: torch.Tensor,
+        src: torch.Tensor,
+        tgt: torch.Tensor,
+        num_nodes: int,
+    ) -> torch.Tensor:
+        """Softmax of *e* over each source node's edges, then aggregate ``h[tgt]``.
+
+        Edges never cross graphs in a disjoint-union batch, so no batch mask
+        is needed; nodes without out-edges receive a zero message.
+        """
+        index = src.unsqueeze(1).expand_as(e)  # (E, H)
+        # Subtract the per-node max before exp for numerical stability
+        e_max = torch.full((num_nodes, self.heads), float("-inf"), dtype=e.dtype, device=e.device)
+        e_max = e_max.scatter_reduce(0, index, e, reduce="amax", include_self=True)
+        w = torch.exp(e - e_max[src])  # (E, H)
+        denom = torch.zeros(num_nodes, self.heads, dtype=w.dtype, device=w.device)
+        denom = denom.index_add_(0, src, w)
+        w = self.dropout(w / denom[src])
+
+        out = torch.zeros(num_nodes, self.heads, self.head_dim, dtype=h.dtype, device=h.device)
+        return out.index_add_(0, src, w.unsqueeze(-1).to(h.dtype) * h[tgt])  # (N, H, d)
 
 
 class DiscourseGNN(nn.Module):
@@ -116,7 +445,10 @@ class DiscourseGNN(nn.Module):
 
         self.gat_layers = nn.ModuleList()
         for _ in range(config.gnn_num_layers):
-            self.gat_layers.append(GraphAttentionLayer(hidden, hidden, config.dropout))
+            self.gat_layers.append(GraphAttentionLayer(
+                hidden, hidden, config.dropout, sparse=config.sparse_attention,
+                heads=config.gnn_heads, merge=config.gnn_head_merge,
+            ))
 
         self.layer_norms = nn.ModuleList(
             [nn.LayerNorm(hidden) for _ in range(config.gnn_num_layers)]
@@ -132,42 +464,86 @@ class DiscourseGNN(nn.Module):
         self,
         node_features: torch.Tensor,
         edge_index: torch.Tensor,
-    ) -> dict:
+        batch: Optional[torch.Tensor] = None,
+        num_graphs: Optional[int] = None,
+    ) -> Dict[str, torch.Tensor]:
         """
         Parameters
         ----------
         node_features : (N, D_in)
         edge_index : (2, E)
+        batch : (N,) optional graph index per node (see ``batch_graphs``)
+        num_graphs : number of graphs in the batch; inferred from *batch*
+            when omitted
 
         Returns
         -------
         dict with keys:
             node_embeddings  – (N, H)
-            graph_embedding  – (H,)
+            graph_embedding  – (H,), or (G, H) when *batch* is given
         """
         h = self.input_proj(node_features)  # (N, H)
 
         for gat, ln in zip(self.gat_layers, self.layer_norms):
-            h_new = gat(h, edge_index)
+            h_new = gat(h, edge_index, batch)
             h = ln(h + h_new)  # residual + layer-norm
             h = F.elu(h)
 
-        # Attention pooling → single graph-level embedding
+        # Attention pooling → graph-level embedding(s)
         gate = torch.sigmoid(self.pool_gate(h))  # (N, 1)
-        graph_emb = (gate * h).sum(dim=0)          # (H,)
+        if batch is None:
+            graph_emb = (gate * h).sum(dim=0)      # (H,)
+        else:
+            if num_graphs is None:
+                num_graphs = int(batch.max()) + 1
+            graph_emb = torch.zeros(
+                num_graphs, h.shape[1], dtype=h.dtype, device=h.device,
+            ).index_add_(0, batch, gate * h)       # (G, H)
 
         return {
             "node_embeddings": h,
             "graph_embedding": graph_emb,
         }
 
+    def forward_padded(
+        self,
+        node_features: torch.Tensor,
+        adjacency: torch.Tensor,
+        node_mask: torch.Tensor,
+    ) -> Dict[str, torch.Tensor]:
+        """:meth:`forward` over a padded batch from ``pad_graphs``.
+
+        Returns
+        -------
+        dict with keys:
+            node_embeddings  – (B, N_max, H); padding rows are meaningless
+            graph_embedding  – (B, H)
+        """
+        h = self.input_proj(node_features)  # (B, N, H)
+
+        for gat, ln in zip(self.gat_layers, self.layer_norms):
+            h_new = gat.forward_padded(h, adjacency, node_mask)
+            h = ln(h + h_new)  # residual + layer-norm
+            h = F.elu(h)
+
+        gate = torch.sigmoid(self.pool_gate(h)) * node_mask.unsqueeze(-1).to(h.dtype)
+        return {
+            "node_embeddings": h,
+            "graph_embedding": (gate * h).sum(dim=1),  # (B, H)
+        }
+
+    def use_padded(self, num_nodes: List[int]) -> bool:
+        """Whether graphs of these sizes run faster through :meth:`forward_padded`."""
+        limit = self.config.padded_max_nodes
+        return bool(num_nodes) and limit > 0 and max(num_nodes) <= limit
+
     def classify_edges(
         self,
         node_embeddings: torch.Tensor,
         edge_index: torch.Tensor,
     ) -> torch.Tensor:
         """Predict edge types from node embeddings.  Returns (E, num_edge_types)."""
-        src, tgt = edge_index
+        src, tgt = edge_index[0], edge_index[1]
         edge_repr = torch.cat([node_embeddings[src], node_embeddings[tgt]], dim=-1)
         return self.edge_classifier(edge_repr)
 
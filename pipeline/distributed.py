@@ -0,0 +1,162 @@
+import logging
+import os
+import socket
+import tempfile
+from typing import Any, Callable, List, Optional, Sequence
+
+import torch
+import torch.distributed as dist
+import torch.multiprocessing as mp
+import torch.nn as nn
+from torch.utils.data import DistributedSampler, Sampler
+
+logger = logging.getLogger(__name__)
+
+
+# ── process-group queries ────────────────────────────────────────────────
+
+def is_distributed() -> bool:
+    return dist.is_available() and dist.is_initialized()
+
+
+def get_rank() -> int:
+    return dist.get_rank() if is_distributed() else 0
+
+
+def get_world_size() -> int:
+    return dist.get_world_size() if is_distributed() else 1
+
+
+def is_main_process() -> bool:
+    """Only rank 0 logs and writes checkpoints."""
+    return get_rank() == 0
+
+
+# ── collectives used by the training loops ───────────────────────────────
+
+class _StridedShard(Sampler):
+    """Indices ``rank, rank + num_replicas, ...`` of *dataset*, in order.
+
+    Unlike ``DistributedSampler`` the shards are not padded to equal length
+    with repeated samples, so summing over ranks counts every sample once.
+    """
+
+    def __init__(self, dataset: Sequence, num_replicas: int, rank: int):
+        self.indices = range(rank, len(dataset), num_replicas)
+
+    def __iter__(self):
+        return iter(self.indices)
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+
+def shard_sampler(
+    dataset: Sequence,
+    shuffle: bool,
+    seed: int,
+) -> Optional[Sampler]:
+    """Sampler giving this rank its shard of *dataset*; None when not distributed.
+
+    Shuffled (training) shards are padded to equal length; unshuffled
+    (evaluation) shards are not, so all-reduced metrics match one process.
+    """
+    if not is_distributed():
+        return None
+    if not shuffle:
+        return _StridedShard(dataset, get_world_size(), get_rank())
+    return DistributedSampler(
+        dataset, num_replicas=get_world_size(), rank=get_rank(),
+        shuffle=shuffle, seed=seed,
+    )
+
+
+def broadcast_parameters(model: nn.Module) -> None:
+    """Start every rank from rank 0's weights."""
+    if not is_distributed():
+        return
+    for tensor in model.state_dict().values():
+        dist.broadcast(tensor, src=0)
+
+
+def average_gradients(model: nn.Module) -> None:
+    """All-reduce gradients as one flat buffer and divide by the world size."""
+    if not is_distributed():
+        return
+    grads = [p.grad for p in model.parameters() if p.grad is not None]
+    if not grads:
+        return
+    flat = torch.cat([g.reshape(-1) for g in grads])
+    dist.all_reduce(flat)
+    flat /= get_world_size()
+    offset = 0
+    for g in grads:
+        n = g.numel()
+        g.copy_(flat[offset:offset + n].view_as(g))
+        offset += n
+
+
+def all_reduce_sum(*values: float) -> List[float]:
+    """Sum scalar metrics across ranks so every rank sees the global value."""
+    if not is_distributed():
+        return list(values)
+    buf = torch.tensor(values, dtype=torch.float64)
+    dist.all_reduce(buf)
+    return buf.tolist()
+
+
+# ── local launcher ───────────────────────────────────────────────────────
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _worker(
+    rank: int,
+    fn: Callable[..., Any],
+    world_size: int,
+    port: int,
+    num_threads: int,
+    result_path: str,
+    args: tuple,
+    kwargs: dict,
+) -> None:
+    torch.set_num_threads(num_threads)
+    dist.init_process_group(
+        "gloo", init_method=f"tcp://127.0.0.1:{port}",
+        rank=rank, world_size=world_size,
+    )
+    try:
+        result = fn(*args, **kwargs)
+        if rank == 0:
+            torch.save(result, result_path)
+    finally:
+        dist.destroy_process_group()
+
+
+def run_data_parallel(
+    fn: Callable[..., Any],
+    world_size: int,
+    *args: Any,
+    master_port: int = 0,
+    **kwargs: Any,
+) -> Any:
+    """Run ``fn(*args, **kwargs)`` on *world_size* local gloo ranks.
+
+    Returns rank 0's result.  A *master_port* of 0 picks a free port.  The
+    caller's intra-op thread budget is split evenly across the ranks.
+    """
+    port = master_port or _free_port()
+    num_threads = max(1, torch.get_num_threads() // world_size)
+    logger.info("Launching %s on %d ranks (port %d)", fn.__name__, world_size, port)
+    with tempfile.TemporaryDirectory() as tmp:
+        result_path = os.path.join(tmp, "rank0_result.pt")
+        mp.start_processes(
+            _worker,
+            args=(fn, world_size, port, num_threads, result_path, args, kwargs),
+            nprocs=world_size,
+            start_method="spawn",
+        )
+        return torch.load(result_path, weights_only=False)
@@ -1,8 +1,11 @@
+from typing import Callable, Optional
+
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
 
 from .config import EncoderConfig
+from .precision import autocast
 
 
 class TurnEncoder(nn.Module):
@@ -101,7 +104,14 @@ def encode_turns(
     model: TurnEncoder,
     max_length: int = 128,
     device: str = "cpu",
+    precision: str = "fp32",
+    forward: Optional[Callable[..., dict]] = None,
 ) -> dict:
+    """Encode *texts* with *model*.
+
+    *forward* replaces ``model.forward``, e.g. ``compile_turn_encoder(model, True)``
+    to reuse one compiled, length-bucketed forward across calls.
+    """
     encoding = tokenizer(
         texts,
         padding=True,
@@ -113,5 +123,6 @@ def encode_turns(
     attention_mask = encoding["attention_mask"].to(device)
 
     model.eval()
-    with torch.no_grad():
-        return model(input_ids, attention_mask)
+    with torch.no_grad(), autocast(precision, device):
+        out = (forward or model)(input_ids, attention_mask)
+    return {k: v.float() for k, v in out.items()}
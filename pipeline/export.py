@@ -0,0 +1,154 @@
+import logging
+import os
+import warnings
+from typing import Dict, Optional, Tuple
+
+import torch
+import torch.nn as nn
+
+from .config import PipelineConfig
+from .discourse_graph import DiscourseGNN
+from .model_io import (
+    default_paths,
+    gnn_config_for_checkpoint,
+    load_encoder,
+    load_gnn,
+    save_exported,
+)
+
+logger = logging.getLogger(__name__)
+
+# Input widths used by the training code and CausalAnalysisPipeline._encode_turns
+ENCODER_INPUT_DIM = 17
+GNN_INPUT_DIM = 32
+
+
+# ── inference-only wrappers ──────────────────────────────────────────────
+
+class _EncoderInference(nn.Module):
+    """Inference view of ``_FeatureEncoder.forward_conversation``."""
+
+    def __init__(self, model: nn.Module):
+        super().__init__()
+        self.model = model
+
+    def forward(self, turn_features: torch.Tensor) -> Dict[str, torch.Tensor]:
+        return self.model.forward_conversation(turn_features)
+
+
+class _GNNInference(nn.Module):
+    """``DiscourseGNN.forward`` followed by ``classify_edges`` as one graph."""
+
+    def __init__(self, model: DiscourseGNN):
+        super().__init__()
+        self.gnn = model
+
+    def forward(
+        self,
+        node_features: torch.Tensor,
+        edge_index: torch.Tensor,
+    ) -> Dict[str, torch.Tensor]:
+        out = self.gnn(node_features, edge_index)
+        out["edge_logits"] = self.gnn.classify_edges(
+            out["node_embeddings"], edge_index,
+        )
+        return out
+
+
+def _freeze(module: nn.Module) -> torch.jit.ScriptModule:
+    """Script, freeze and optimise *module* for inference."""
+    module.eval()
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", FutureWarning)
+        scripted = torch.jit.script(module)
+        frozen = torch.jit.freeze(scripted)
+        return torch.jit.optimize_for_inference(frozen)
+
+
+# ── example inputs & warm-up ─────────────────────────────────────────────
+
+def encoder_example_inputs(
+    num_turns: int = 8,
+    device: str = "cpu",
+) -> Tuple[torch.Tensor]:
+    return (torch.zeros(num_turns, ENCODER_INPUT_DIM, device=device),)
+
+
+def gnn_example_inputs(
+    num_nodes: int = 8,
+    input_dim: int = GNN_INPUT_DIM,
+    device: str = "cpu",
+) -> Tuple[torch.Tensor, torch.Tensor]:
+    """Chain graph with +1 / +2 edges, matching ``build_discourse_graph``."""
+    src = list(range(num_nodes - 1)) + list(range(num_nodes - 2))
+    tgt = list(range(1, num_nodes)) + list(range(2, num_nodes))
+    edge_index = torch.tensor([src, tgt], dtype=torch.long, device=device)
+    return torch.zeros(num_nodes, input_dim, device=device), edge_index
+
+
+def warmup(module: nn.Module, example_inputs: tuple, n_iter: int = 3) -> None:
+    """Run a few forward passes so the JIT profiles and specialises its graph."""
+    with torch.no_grad():
+        for _ in range(n_iter):
+            module(*example_inputs)
+
+
+# ── export ───────────────────────────────────────────────────────────────
+
+def export_encoder(
+    model: nn.Module,
+    path: Optional[str] = None,
+) -> torch.jit.ScriptModule:
+    """Export a trained ``_FeatureEncoder`` to a frozen TorchScript graph."""
+    graph = _freeze(_EncoderInference(model))
+    if path:
+        save_exported(graph, path)
+    return graph
+
+
+def export_gnn(
+    model: DiscourseGNN,
+    path: Optional[str] = None,
+) -> torch.jit.ScriptModule:
+    """Export a trained ``DiscourseGNN`` (forward + edge classifier)."""
+    graph = _freeze(_GNNInference(model))
+    if path:
+        save_exported(graph, path)
+    return graph
+
+
+def export_checkpoints(
+    config: PipelineConfig,
+    checkpoint_dir: str = "checkpoints",
+) -> Dict[str, str]:
+    """Export every trained checkpoint found in *checkpoint_dir*.
+
+    Returns a mapping of artifact name → exported path for the graphs written.
+    """
+    from .train import _FeatureEncoder
+
+    paths = default_paths(checkpoint_dir)
+    exported: Dict[str, str] = {}
+
+    if os.path.exists(paths["encoder"]):
+        encoder = _FeatureEncoder(
+            input_dim=ENCODER_INPUT_DIM,
+            hidden_dim=64,
+            num_emotion_classes=config.encoder.num_emotion_classes,
+            num_outcome_classes=config.encoder.num_outcome_classes,
+        )
+        load_encoder(encoder, paths["encoder"], device="cpu")
+        export_encoder(encoder, paths["encoder_export"])
+        exported["encoder"] = paths["encoder_export"]
+
+    if os.path.exists(paths["gnn"]):
+        gnn = DiscourseGNN(
+            gnn_config_for_checkpoint(config.discourse, paths["gnn"]), input_dim=GNN_INPUT_DIM,
+        )
+        load_gnn(gnn, paths["gnn"], device="cpu")
+        export_gnn(gnn, paths["gnn_export"])
+        exported["gnn"] = paths["gnn_export"]
+
+    if not exported:
+        logger.warning("No checkpoints found in %s; nothing exported.", checkpoint_dir)
+    return exported
@@ -0,0 +1,207 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from typing import List, Optional, Tuple
+
+import numpy as np
+import torch
+
+from .constants import DISCOURSE_KEYWORDS
+from .discourse_graph import _LABELS, _relation_attrs, _turn_is_agent, _typed_pairs
+
+logger = logging.getLogger(__name__)
+
+# Bump when the stored arrays change; it is part of the file name, so a
+# store of another layout is never loaded
+_STORE_VERSION = 2
+
+
+def graph_fingerprint(
+    records: List[dict],
+    edge_types: List[str],
+    window: int = 2,
+    speaker_edges: bool = False,
+) -> str:
+    """Hash of everything the discourse edges depend on.
+
+    Covers each record's id, turn texts (and speakers), the edge-type
+    vocabulary, the connectivity window and the keyword lexicon, so editing
+    any of them invalidates the stored graphs.
+    """
+    h = hashlib.sha256()
+    h.update(f"v{_STORE_VERSION}".encode())
+    h.update(json.dumps(edge_types).encode())
+    h.update(json.dumps({"window": window, "speaker_edges": speaker_edges}).encode())
+    h.update(json.dumps(DISCOURSE_KEYWORDS, sort_keys=True).encode())
+    for rec in records:
+        h.update(str(rec.get("transcript_id", "")).encode())
+        h.update(b"\x1e")
+        for tf in rec.get("turn_features", []):
+            h.update(tf["text"].encode())
+            # Speakers only matter for speaker edges
+            h.update(b"\x1d" if speaker_edges and _turn_is_agent(tf) else b"\x1f")
+    return h.hexdigest()[:16]
+
+
+class GraphStore:
+    """Discourse-graph edges of many conversations in one CSR layout.
+
+    Conversation *i* owns global nodes ``node_offsets[i]:node_offsets[i + 1]``;
+    the out-edges of global node *u* are ``col[row_ptr[u]:row_ptr[u + 1]]``
+    (local target indices) with types ``edge_attr[...]`` over the same range.
+    ``edge_label[...]`` indexes ``labels``, the relation names
+    ``build_discourse_graph`` reports as ``edge_labels``; they differ from
+    ``edge_types[edge_attr]`` for relations missing from ``edge_types``.
+    """
+
+    def __init__(
+        self,
+        node_offsets: np.ndarray,
+        row_ptr: np.ndarray,
+        col: np.ndarray,
+        edge_attr: np.ndarray,
+        edge_label: np.ndarray,
+        labels: List[str],
+        transcript_ids: List[str],
+        edge_types: List[str],
+        fingerprint: str,
+    ):
+        self.node_offsets = node_offsets
+        self.row_ptr = row_ptr
+        self.col = col
+        self.edge_attr = edge_attr
+        self.edge_label = edge_label
+        self.labels = list(labels)
+        self.transcript_ids = list(transcript_ids)
+        self.edge_types = list(edge_types)
+        self.fingerprint = fingerprint
+        self._position = {tid: i for i, tid in enumerate(self.transcript_ids)}
+
+    @classmethod
+    def build(
+        cls,
+        records: List[dict],
+        edge_types: List[str],
+        fingerprint: Optional[str] = None,
+        window: int = 2,
+        speaker_edges: bool = False,
+    ) -> "GraphStore":
+        """Detect the edges of every record once and pack them."""
+        src, tgt, relation, node_offsets = _typed_pairs(
+            [rec.get("turn_features", []) for rec in records], window, speaker_edges,
+        )
+        row_ptr = np.zeros(int(node_offsets[-1]) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=len(row_ptr) - 1), out=row_ptr[1:])
+        # Columns are conversation-local node ids
+        starts = np.repeat(node_offsets[:-1], np.diff(node_offsets))
+        cols = tgt - starts[src]
+        return cls(
+            node_offsets,
+            row_ptr,
+            cols.astype(np.int32),
+            _relation_attrs(edge_types)[relation].astype(np.int16),
+            relation.astype(np.int16),
+            _LABELS,
+            [str(rec.get("transcript_id", "")) for rec in records],
+            edge_types,
+            fingerprint or graph_fingerprint(records, edge_types, window, speaker_edges),
+        )
+
+    # ── persistence ──────────────────────────────────────────────────────
+
+    def save(self, path: str) -> None:
+        """Write atomically so concurrent builders never expose a partial file."""
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".npz.tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(
+                    f,
+                    node_offsets=self.node_offsets,
+                    row_ptr=self.row_ptr,
+                    col=self.col,
+                    edge_attr=self.edge_attr,
+                    edge_label=self.edge_label,
+                    labels=np.asarray(self.labels),
+                    transcript_ids=np.asarray(self.transcript_ids),
+                    edge_types=np.asarray(self.edge_types),
+                    fingerprint=np.asarray(self.fingerprint),
+                )
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path: str) -> "GraphStore":
+        with np.load(path) as data:
+            return cls(
+                data["node_offsets"],
+                data["row_ptr"],
+                data["col"],
+                data["edge_attr"],
+                data["edge_label"],
+                data["labels"].tolist(),
+                data["transcript_ids"].tolist(),
+                data["edge_types"].tolist(),
+                str(data["fingerprint"]),
+            )
+
+    # ── access ───────────────────────────────────────────────────────────
+
+    def __len__(self) -> int:
+        return len(self.transcript_ids)
+
+    def position(self, transcript_id: str) -> Optional[int]:
+        return self._position.get(str(transcript_id))
+
+    def num_nodes(self, i: int) -> int:
+        return int(self.node_offsets[i + 1] - self.node_offsets[i])
+
+    def _edge_range(self, i: int) -> Tuple[int, int, np.ndarray]:
+        start, end = self.node_offsets[i], self.node_offsets[i + 1]
+        ptr = self.row_ptr[start:end + 1]
+        return int(ptr[0]), int(ptr[-1]), np.repeat(np.arange(end - start), np.diff(ptr))
+
+    def edges(self, i: int) -> Tuple[torch.Tensor, torch.Tensor]:
+        """``(edge_index (2, E), edge_attr (E,))`` of conversation *i*."""
+        e0, e1, src = self._edge_range(i)
+        edge_index = np.stack([src, self.col[e0:e1].astype(np.int64)])
+        return (
+            torch.from_numpy(edge_index),
+            torch.from_numpy(self.edge_attr[e0:e1].astype(np.int64)),
+        )
+
+    def graph(self, i: int, node_features: torch.Tensor) -> dict:
+        """Conversation *i* in the ``build_discourse_graph`` format."""
+        edge_index, edge_attr = self.edges(i)
+        e0, e1, _ = self._edge_range(i)
+        return {
+            "node_features": node_features,
+            "edge_index": edge_index,
+            "edge_attr": edge_attr,
+            "edge_labels": [self.labels[r] for r in self.edge_label[e0:e1].tolist()],
+        }
+
+
+def load_or_build_graph_store(
+    records: List[dict],
+    edge_types: List[str],
+    cache_dir: str,
+    window: int = 2,
+    speaker_edges: bool = False,
+) -> GraphStore:
+    """Load the store matching *records* and the lexicon, building it on a miss."""
+    fingerprint = graph_fingerprint(records, edge_types, window, speaker_edges)
+    path = os.path.join(cache_dir, f"graphs_v{_STORE_VERSION}_{fingerprint}.npz")
+    if os.path.exists(path):
+        logger.info("Loading discourse graphs from %s", path)
+        return GraphStore.load(path)
+    logger.info("Building discourse graph store for %d records", len(records))
+    store = GraphStore.build(records, edge_types, fingerprint, window, speaker_edges)
+    store.save(path)
+    return store
@@ -1,13 +1,23 @@
-from typing import Any, Dict, List, Optional
+import copy
+import logging
+import os
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import numpy as np
 import torch
 
 from .config import PipelineConfig
-from .data_processing import process_dataset, build_conversation_features
-from .discourse_graph import build_discourse_graph, DiscourseGNN
+from .constants import OUTCOME_MAP
+from .data_processing import (
+    build_conversation_features,
+    process_dataset,
+    turn_embedding_matrix,
+)
+from .discourse_graph import batch_graphs, build_discourse_graph, DiscourseGNN, pad_graphs
 from .causal_model import (
     CausalDAG,
+    causal_data_fingerprint,
+    causal_records_fingerprint,
     extract_causal_variables,
     estimate_causal_effect,
     counterfactual_query,
@@ -19,110 +29,367 @@ from .explanation import (
     generate_explanation,
     InteractionContext,
 )
+from .compilation import compile_gnn
 from .evaluation import compute_all_metrics
+from .export import (
+    ENCODER_INPUT_DIM,
+    GNN_INPUT_DIM,
+    encoder_example_inputs,
+    gnn_example_inputs,
+    warmup,
+)
+from .model_io import (
+    DEFAULT_CHECKPOINT_DIR,
+    default_paths,
+    export_is_current,
+    gnn_config_for_checkpoint,
+    load_exported,
+    load_gnn,
+)
+from .graph_store import GraphStore, load_or_build_graph_store
+from .precision import autocast
+from .similarity import SimilarityIndex
+from .transitions import TransitionStats
+
+logger = logging.getLogger(__name__)
+
+_OUTCOME_NAMES = {v: k for k, v in OUTCOME_MAP.items()}
+
+# Trained GNNs keyed by checkpoint file, mtime, device and DiscourseConfig,
+# so every pipeline in a process shares one loaded copy
+_TRAINED_GNNS: Dict[tuple, DiscourseGNN] = {}
+
+# Population causal results kept per pipeline (one per dataset/config/DAG)
+_CAUSAL_CACHE_SIZE = 8
+
+
+def _load_trained_gnn(config: PipelineConfig, checkpoint_dir: str, device: torch.device) -> DiscourseGNN:
+    """The ``DiscourseGNN`` in *checkpoint_dir* in eval mode, loaded once per process.
+
+    Without a checkpoint the GNN keeps its random initialisation (and is not
+    shared), so graph embeddings are only meaningful after ``run_training``.
+    """
+    path = os.path.abspath(default_paths(checkpoint_dir)["gnn"])
+    if not os.path.exists(path):
+        logger.warning("No GNN checkpoint at %s; using untrained weights", path)
+        return DiscourseGNN(config.discourse, input_dim=GNN_INPUT_DIM).to(device).eval()
+    key = (path, os.path.getmtime(path), str(device), repr(config.discourse))
+    if key not in _TRAINED_GNNS:
+        model = DiscourseGNN(gnn_config_for_checkpoint(config.discourse, path), input_dim=GNN_INPUT_DIM)
+        load_gnn(model, path, str(device))
+        _TRAINED_GNNS[key] = model.eval()
+    return _TRAINED_GNNS[key]
+
 
 class CausalAnalysisPipeline:
-    def __init__(self, config: PipelineConfig):
+    def __init__(
+        self,
+        config: PipelineConfig,
+        checkpoint_dir: str = DEFAULT_CHECKPOINT_DIR,
+    ):
         self.config = config
         self.device = torch.device(config.device)
+        self.checkpoint_dir = checkpoint_dir
         self.records: List[dict] = []
         self.causal_dag = CausalDAG(config.causal.causal_variables)
         self.interaction_ctx = InteractionContext(config.explanation)
 
-        # Discourse GNN (initialised with default input dim; adjusted after encoding)
+        # Trained discourse GNN, loaded on first use (see ``_load_trained_gnn``)
         self.discourse_gnn: Optional[DiscourseGNN] = None
+        # Its forward, compiled over shape buckets when ``compile_models`` is set
+        self._gnn_forward: Optional[Callable[..., Dict[str, torch.Tensor]]] = None
+
+        # Frozen TorchScript graphs written by ``pipeline.export``; used in
+        # place of the eager modules when present.
+        self.encoder_graph: Optional[torch.jit.ScriptModule] = None
+        self.gnn_graph: Optional[torch.jit.ScriptModule] = None
+        self._load_exported_graphs()
+
+        # Persisted discourse edges for ``self.records``; see ``load_data``
+        self.graph_store: Optional[GraphStore] = None
+        # GNN outputs per transcript id; see ``embed_graphs``
+        self.graph_embeddings: Dict[str, Dict[str, torch.Tensor]] = {}
+        # Nearest-neighbour index over graph embeddings; see ``similar_conversations``
+        self.similarity_index: Optional[SimilarityIndex] = None
+        # Edge-type transition counts; see ``discourse_transitions``
+        self.transition_stats: Optional[TransitionStats] = None
+        # Population causal variables and results; see ``_population_causal_results``
+        self._causal_data: Optional[Tuple[list, int, str, str, List[Dict[str, float]]]] = None
+        self._causal_data_current = False
+        self._causal_results: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+
+    def _load_exported_graphs(self) -> None:
+        """Load and warm up exported inference graphs, if any were exported.
+
+        An export older than its checkpoint is skipped, so a retrained model
+        is served eagerly until it is exported again.
+        """
+        paths = default_paths(self.checkpoint_dir)
+        device = str(self.device)
+        for name, attr, example_inputs in (
+            ("encoder", "encoder_graph", encoder_example_inputs),
+            ("gnn", "gnn_graph", gnn_example_inputs),
+        ):
+            export_path = paths[f"{name}_export"]
+            if not os.path.exists(export_path):
+                continue
+            if not export_is_current(export_path, paths[name]):
+                logger.warning(
+                    "Ignoring %s: %s was retrained after it was exported", export_path, paths[name],
+                )
+                continue
+            graph = load_exported(export_path, device)
+            warmup(graph, example_inputs(device=device))
+            setattr(self, attr, graph)
 
     # ── Layer 0: data loading ─────────────────────────────────────────
 
     def load_data(self) -> None:
-        """Load and preprocess the dataset."""
+        """Load and preprocess the dataset and its discourse-graph store."""
         self.records = process_dataset(self.config)
+        self.graph_embeddings.clear()
+        self.similarity_index = self._load_similarity_index()
+        self.transition_stats = None
+        discourse_cfg = self.config.discourse
+        if discourse_cfg.use_graph_cache:
+            cache_dir = (discourse_cfg.graph_cache_dir
+                         or default_paths(self.checkpoint_dir)["graph_cache"])
+            self.graph_store = load_or_build_graph_store(
+                self.records, discourse_cfg.edge_types, cache_dir,
+                discourse_cfg.edge_window, discourse_cfg.speaker_edges,
+            )
 
     # ── Layer 1: encoding (feature-based, no GPU needed) ──────────────
 
     def _encode_turns(self, turn_features: List[dict]) -> torch.Tensor:
         embed_dim = 32  # lightweight feature embedding
-        embeddings = []
-        for tf in turn_features:
-            vec = [
-                tf.get("is_agent", 0),
-                tf.get("turn_position", 0.0),
-                tf.get("word_count", 0) / 100.0,
-                tf.get("question_marks", 0) / 5.0,
-                tf.get("exclamation_marks", 0) / 5.0,
-                tf.get("emotion_anger", 0.0),
-                tf.get("emotion_frustration", 0.0),
-                tf.get("emotion_satisfaction", 0.0),
-                tf.get("emotion_confusion", 0.0),
-                tf.get("emotion_urgency", 0.0),
-                tf.get("discourse_complaint", 0.0),
-                tf.get("discourse_denial", 0.0),
-                tf.get("discourse_delay", 0.0),
-                tf.get("discourse_apology", 0.0),
-                tf.get("discourse_clarification", 0.0),
-                tf.get("discourse_promise", 0.0),
-                tf.get("discourse_escalation_request", 0.0),
-            ]
-            # Pad to embed_dim
-            vec.extend([0.0] * (embed_dim - len(vec)))
-            embeddings.append(vec[:embed_dim])
-        return torch.tensor(embeddings, dtype=torch.float32).to(self.device)
+        emb = turn_embedding_matrix(turn_features, embed_dim)
+        return torch.from_numpy(emb).to(self.device)
 
-    def _build_graph(
+    def _stored_graph(
         self,
+        transcript_id: Optional[str],
         turn_features: List[dict],
         turn_embeddings: torch.Tensor,
+    ) -> Optional[dict]:
+        """The graph from ``graph_store`` if it holds this conversation."""
+        if self.graph_store is None or transcript_id is None:
+            return None
+        i = self.graph_store.position(transcript_id)
+        if i is None or self.graph_store.num_nodes(i) != len(turn_features):
+            return None
+        return self.graph_store.graph(i, turn_embeddings)
+
+    # ── Layer 2: discourse graph ──────────────────────────────────────
+
+    def _gnn(self) -> Callable[..., Dict[str, torch.Tensor]]:
+        """The exported GNN graph if present, else the trained eager GNN."""
+        if self.gnn_graph is not None:
+            return self.gnn_graph
+        if self._gnn_forward is None:
+            self.discourse_gnn = _load_trained_gnn(self.config, self.checkpoint_dir, self.device)
+            self._gnn_forward = compile_gnn(self.discourse_gnn, self.config.compile_models)
+        return self._gnn_forward
+
+    def _graph_structure(
+        self,
+        turn_features: List[dict],
+        turn_embeddings: torch.Tensor,
+        transcript_id: Optional[str] = None,
     ) -> dict:
-        graph = build_discourse_graph(
-            turns=turn_features,
-            turn_embeddings=turn_embeddings,
-            edge_types=self.config.discourse.edge_types,
-        )
+        graph = self._stored_graph(transcript_id, turn_features, turn_embeddings)
+        if graph is None:
+            graph = build_discourse_graph(
+                turns=turn_features,
+                turn_embeddings=turn_embeddings,
+                edge_types=self.config.discourse.edge_types,
+                window=self.config.discourse.edge_window,
+                speaker_edges=self.config.discourse.speaker_edges,
+            )
+        return graph
 
-        if self.discourse_gnn is None:
-            self.discourse_gnn = DiscourseGNN(
-                self.config.discourse,
-                input_dim=turn_embeddings.shape[1],
-            ).to(self.device)
+    def _cached_embeddings(
+        self,
+        transcript_id: Optional[str],
+        num_nodes: int,
+    ) -> Optional[Dict[str, torch.Tensor]]:
+        if transcript_id is None:
+            return None
+        out = self.graph_embeddings.get(transcript_id)
+        if out is None or out["node_embeddings"].shape[0] != num_nodes:
+            return None
+        return out
 
-        with torch.no_grad():
+    def _build_graph(
+        self,
+        turn_features: List[dict],
+        turn_embeddings: torch.Tensor,
+        transcript_id: Optional[str] = None,
+    ) -> dict:
+        graph = self._graph_structure(turn_features, turn_embeddings, transcript_id)
+        gnn_out = self._cached_embeddings(transcript_id, len(turn_features))
+        if gnn_out is None:
             node_feat = graph["node_features"].to(self.device)
             edge_idx = graph["edge_index"].to(self.device)
-            gnn_out = self.discourse_gnn(node_feat, edge_idx)
+            with torch.no_grad(), autocast(self.config.precision, self.device):
+                gnn_out = self._gnn()(node_feat, edge_idx)
+            gnn_out = {k: v.float() for k, v in gnn_out.items()}
+            if transcript_id is not None:
+                self.graph_embeddings[transcript_id] = gnn_out
 
         graph.update(gnn_out)
         return graph
 
-    def _run_causal_analysis(
+    def embed_graphs(
         self,
-        record: dict,
-        all_causal_data: Optional[List[Dict[str, float]]] = None,
-    ) -> dict:
-        cv = extract_causal_variables(record)
-
-        # If we have population-level data, estimate ATE
-        if all_causal_data is None:
-            all_causal_data = [
-                extract_causal_variables(r) for r in self.records
+        records: List[dict],
+        batch_size: Optional[int] = None,
+    ) -> None:
+        """Fill ``graph_embeddings`` for *records*, many graphs per GNN forward.
+
+        Conversations are grouped by size into batches of *batch_size*
+        graphs (``DiscourseConfig.batch_size`` by default).  Batches of small
+        graphs (see ``DiscourseGNN.use_padded``) run padded with batched
+        attention; the rest as disjoint-union edge lists.  The exported GNN
+        graph takes one graph per call, so it embeds them one by one.
+        """
+        pending = [
+            rec for rec in records
+            if rec.get("turn_features")
+            and self._cached_embeddings(rec.get("transcript_id"), len(rec["turn_features"])) is None
+        ]
+        if self.gnn_graph is not None:
+            for rec in pending:
+                tf = rec["turn_features"]
+                self._build_graph(tf, self._encode_turns(tf), rec.get("transcript_id"))
+            return
+
+        gnn = self._gnn()
+        batch_size = batch_size or self.config.discourse.batch_size
+        # Similar sizes per batch keep the padding small
+        pending.sort(key=lambda rec: len(rec["turn_features"]))
+        for start in range(0, len(pending), batch_size):
+            chunk = pending[start:start + batch_size]
+            graphs = [
+                self._graph_structure(
+                    rec["turn_features"], self._encode_turns(rec["turn_features"]),
+                    rec.get("transcript_id"),
+                )
+                for rec in chunk
             ]
+            counts = [g["node_features"].shape[0] for g in graphs]
+            if self.discourse_gnn.use_padded(counts):
+                x, adjacency, node_mask = pad_graphs(graphs)
+                with torch.no_grad(), autocast(self.config.precision, self.device):
+                    out = self.discourse_gnn.forward_padded(
+                        x.to(self.device), adjacency.to(self.device), node_mask.to(self.device),
+                    )
+                padded = out["node_embeddings"].float()
+                node_embs = [padded[i, :n] for i, n in enumerate(counts)]
+            else:
+                merged = batch_graphs(graphs)
+                with torch.no_grad(), autocast(self.config.precision, self.device):
+                    out = gnn(
+                        merged["node_features"].to(self.device),
+                        merged["edge_index"].to(self.device),
+                        merged["batch"].to(self.device),
+                        merged["num_graphs"],
+                    )
+                node_embs = out["node_embeddings"].float().split(counts)
+            graph_embs = out["graph_embedding"].float()
+            for i, rec in enumerate(chunk):
+                if rec.get("transcript_id") is not None:
+                    self.graph_embeddings[rec["transcript_id"]] = {
+                        "node_embeddings": node_embs[i],
+                        "graph_embedding": graph_embs[i],
+                    }
+
+    def _predict_outcome(self, turn_embeddings: torch.Tensor) -> Optional[str]:
+        """Conversation-level outcome from the exported encoder, if loaded."""
+        if self.encoder_graph is None or turn_embeddings.shape[0] == 0:
+            return None
+        feats = turn_embeddings[: self.config.data.max_turns, :ENCODER_INPUT_DIM]
+        with torch.no_grad(), autocast(self.config.precision, self.device):
+            out = self.encoder_graph(feats)
+        return _OUTCOME_NAMES.get(int(out["outcome_logits"].argmax(dim=1)[0]))
+
+    def invalidate_causal_cache(self) -> None:
+        """Re-check the records' causal fields on the next causal analysis.
+
+        Call after editing ``self.records`` in place; replacing the list or
+        changing its length is noticed without this.  ``analyse_all`` calls
+        it once per run.
+        """
+        self._causal_data_current = False
+
+    def _population_causal_data(self) -> Tuple[str, List[Dict[str, float]]]:
+        """``(fingerprint, causal variables)`` of every loaded record.
+
+        The records are hashed (``causal_records_fingerprint``) only when
+        ``self.records`` was replaced, changed length or was invalidated, so
+        a lookup is O(1) otherwise; the variables are re-extracted only when
+        that hash changes.
+        """
+        cached = self._causal_data
+        if (cached is None or not self._causal_data_current
+                or cached[0] is not self.records or cached[1] != len(self.records)):
+            records_key = causal_records_fingerprint(self.records)
+            if cached is None or cached[2] != records_key:
+                data = [extract_causal_variables(r) for r in self.records]
+                cached = (self.records, len(self.records), records_key,
+                          causal_data_fingerprint(data), data)
+            else:
+                cached = (self.records, len(self.records)) + cached[2:]
+            self._causal_data = cached
+            self._causal_data_current = True
+        return cached[3], cached[4]
+
+    def _population_causal_results(self) -> Dict[str, Any]:
+        """Population ATE, root causes and causal chain.
+
+        These are the same for every record, so they are computed once per
+        (dataset fingerprint, ``CausalConfig``, DAG) and reused until one of
+        them changes.
+        """
+        fingerprint, data = self._population_causal_data()
+        causal_cfg = self.config.causal
+        key = (
+            fingerprint,
+            repr(causal_cfg),
+            repr((self.causal_dag.variables, self.causal_dag.edges)),
+        )
+        results = self._causal_results.get(key)
+        if results is not None:
+            return results
 
         ate = estimate_causal_effect(
-            data=all_causal_data,
-            treatment=self.config.causal.treatment,
-            outcome=self.config.causal.outcome,
+            data=data,
+            treatment=causal_cfg.treatment,
+            outcome=causal_cfg.outcome,
             dag=self.causal_dag,
-            config=self.config.causal,
+            config=causal_cfg,
         )
 
         root_causes = identify_root_causes(
-            data=all_causal_data,
-            outcome=self.config.causal.outcome,
+            data=data,
+            outcome=causal_cfg.outcome,
             dag=self.causal_dag,
-            config=self.config.causal,
+            config=causal_cfg,
         )
 
         # Determine most likely causal chain
-        chain = [rc["variable"] for rc in root_causes[:3]] + [self.config.causal.outcome]
+        chain = [rc["variable"] for rc in root_causes[:3]] + [causal_cfg.outcome]
+
+        results = {"ate": ate, "root_causes": root_causes, "causal_chain": chain}
+        if len(self._causal_results) >= _CAUSAL_CACHE_SIZE:
+            self._causal_results.pop(next(iter(self._causal_results)))
+        self._causal_results[key] = results
+        return results
+
+    def _run_causal_analysis(self, record: dict) -> dict:
+        cv = extract_causal_variables(record)
+        # A copy, so callers editing their result cannot alter the cache
+        population = copy.deepcopy(self._population_causal_results())
 
         # Counterfactual: what if treatment had been zero?
         cf = counterfactual_query(
@@ -133,9 +400,9 @@ class CausalAnalysisPipeline:
 
         return {
             "causal_variables": cv,
-            "ate": ate,
-            "root_causes": root_causes,
-            "causal_chain": chain,
+            "ate": population["ate"],
+            "root_causes": population["root_causes"],
+            "causal_chain": population["causal_chain"],
             "counterfactual": cf,
         }
 
@@ -177,8 +444,12 @@ class CausalAnalysisPipeline:
         # Layer 1: Encode
         turn_embeddings = self._encode_turns(turn_features)
 
+        predicted_outcome = self._predict_outcome(turn_embeddings)
+
         # Layer 2: Discourse graph
-        graph = self._build_graph(turn_features, turn_embeddings)
+        graph = self._build_graph(
+            turn_features, turn_embeddings, record.get("transcript_id"),
+        )
 
         # Layer 3: Causal analysis
         causal_result = self._run_causal_analysis(record)
@@ -196,6 +467,7 @@ class CausalAnalysisPipeline:
         return {
             "transcript_id": record.get("transcript_id"),
             "turn_embeddings": turn_embeddings,
+            "predicted_outcome": predicted_outcome,
             "graph": {
                 "num_nodes": graph["node_features"].shape[0],
                 "num_edges": graph["edge_index"].shape[1],
@@ -213,20 +485,24 @@ class CausalAnalysisPipeline:
         """
         records = self.records[:max_records] if max_records else self.records
 
-        # Pre-compute causal data for ATE estimation
-        all_causal = [extract_causal_variables(r) for r in self.records]
+        self.embed_graphs(records)
+        self.invalidate_causal_cache()
 
         results: List[Dict[str, Any]] = []
         for record in records:
             turn_features = record.get("turn_features", [])
             turn_embeddings = self._encode_turns(turn_features)
-            graph = self._build_graph(turn_features, turn_embeddings)
-            causal_result = self._run_causal_analysis(record, all_causal)
+            predicted_outcome = self._predict_outcome(turn_embeddings)
+            graph = self._build_graph(
+                turn_features, turn_embeddings, record.get("transcript_id"),
+            )
+            causal_result = self._run_causal_analysis(record)
             expl_result = self._generate_explanation(record, causal_result)
 
             results.append({
                 "transcript_id": record.get("transcript_id"),
                 "outcome": record.get("outcome"),
+                "predicted_outcome": predicted_outcome,
                 "causal_chain": causal_result["causal_chain"],
                 "ate": causal_result["ate"]["ate"],
                 "explanation": expl_result["explanation"],
@@ -234,6 +510,109 @@ class CausalAnalysisPipeline:
 
         return results
 
+    # ── similar conversations ─────────────────────────────────────────
+
+    def _gnn_fingerprint(self) -> str:
+        """Identifies the GNN weights behind the graph embeddings ("" if untrained)."""
+        paths = default_paths(self.checkpoint_dir)
+        path = paths["gnn_export"] if self.gnn_graph is not None else paths["gnn"]
+        if not os.path.exists(path):
+            return ""
+        return f"{os.path.basename(path)}@{os.stat(path).st_mtime_ns}"
+
+    def _load_similarity_index(self) -> Optional[SimilarityIndex]:
+        path = default_paths(self.checkpoint_dir)["similarity_index"]
+        if not os.path.exists(path):
+            return None
+        index = SimilarityIndex.load(path)
+        if not index.fingerprint or index.fingerprint != self._gnn_fingerprint():
+            logger.info("Ignoring similarity index built with other GNN weights: %s", path)
+            return None
+        index.n_probe = self.config.discourse.similarity_n_probe
+        return index
+
+    def _save_similarity_index(self) -> None:
+        # Embeddings from untrained (random) weights are not reusable
+        if self.similarity_index is not None and self.similarity_index.fingerprint:
+            self.similarity_index.save(default_paths(self.checkpoint_dir)["similarity_index"])
+
+    def _graph_embedding_matrix(self, records: List[dict]) -> Tuple[List[str], np.ndarray]:
+        self.embed_graphs(records)
+        ids = [
+            rec["transcript_id"] for rec in records
+            if rec.get("transcript_id") in self.graph_embeddings
+        ]
+        if not ids:
+            return ids, np.zeros((0, self.config.discourse.gnn_hidden_dim), dtype=np.float32)
+        vectors = torch.stack([self.graph_embeddings[tid]["graph_embedding"] for tid in ids])
+        return ids, vectors.cpu().numpy()
+
+    def build_similarity_index(self, records: Optional[List[dict]] = None) -> SimilarityIndex:
+        """Index the graph embeddings of *records* (default: all loaded records)."""
+        ids, vectors = self._graph_embedding_matrix(self.records if records is None else records)
+        discourse_cfg = self.config.discourse
+        self.similarity_index = SimilarityIndex.build(
+            ids, vectors,
+            n_lists=discourse_cfg.similarity_n_lists,
+            n_probe=discourse_cfg.similarity_n_probe,
+            fingerprint=self._gnn_fingerprint(),
+        )
+        self._save_similarity_index()
+        return self.similarity_index
+
+    def index_conversations(self, records: List[dict]) -> None:
+        """Insert *records* missing from the similarity index and persist it."""
+        if self.similarity_index is None:
+            self.build_similarity_index(records)
+            return
+        new = [rec for rec in records if rec.get("transcript_id") not in self.similarity_index]
+        ids, vectors = self._graph_embedding_matrix(new)
+        if ids:
+            self.similarity_index.add(ids, vectors)
+            self._save_similarity_index()
+
+    def similar_conversations(self, transcript_id: str, k: int = 5) -> List[Dict[str, Any]]:
+        """The *k* indexed conversations whose graph embeddings are closest.
+
+        Builds the index over the loaded records on first use; a transcript
+        that is not indexed yet is embedded and inserted first.
+        """
+        if self.similarity_index is None:
+            self.build_similarity_index()
+        if transcript_id not in self.similarity_index:
+            record = next(
+                (r for r in self.records if r.get("transcript_id") == transcript_id), None,
+            )
+            if record is None:
+                raise KeyError(f"Unknown transcript: {transcript_id}")
+            self.index_conversations([record])
+        query = self.similarity_index.vector(transcript_id)
+        if query is None:
+            raise ValueError(f"Transcript {transcript_id} has no turns to embed")
+        return [
+            {"transcript_id": tid, "similarity": score}
+            for tid, score in self.similarity_index.search(query, k, exclude=transcript_id)
+        ]
+
+    # ── discourse transition statistics ───────────────────────────────
+
+    def discourse_transitions(self, records: Optional[List[dict]] = None) -> TransitionStats:
+        """Corpus edge-type transition counts, built over the loaded records on first use.
+
+        *records* not counted yet are added incrementally.
+        """
+        if self.transition_stats is None:
+            discourse_cfg = self.config.discourse
+            self.transition_stats = TransitionStats(
+                discourse_cfg.edge_types,
+                max_lag=discourse_cfg.transition_max_lag,
+                max_ngram=discourse_cfg.transition_max_ngram,
+            )
+            self.transition_stats.add_records(self.records)
+        if records:
+            self.transition_stats.add_records(records)
+        return self.transition_stats
+
     def interactive_query(self, query: str) -> str:
         """Handle a follow-up query using the interaction context."""
         if not self.records:
@@ -1,7 +1,10 @@
+import dataclasses
 import json
 import logging
 import os
+import re
 import tempfile
+import warnings
 from typing import Any, Dict, Optional
 
 import torch
@@ -68,15 +71,89 @@ def load_encoder(
     return meta
 
 
+# DiscourseConfig fields that decide a DiscourseGNN's parameter shapes
+# Dense and sparse attention are different functions of the same weights,
+# so the attention mode is saved alongside the shapes
+GNN_ARCHITECTURE_FIELDS = (
+    "gnn_hidden_dim", "gnn_num_layers", "gnn_heads", "gnn_head_merge", "sparse_attention",
+)
+
+
 def save_gnn(model: torch.nn.Module, path: str, metadata: Optional[dict] = None) -> None:
-    """Save GNN weights and optional metadata."""
+    """Save GNN weights and optional metadata.
+
+    The model's architecture (``GNN_ARCHITECTURE_FIELDS``) is always
+    recorded, so the checkpoint loads regardless of the loader's config.
+    """
     payload: Dict[str, Any] = {"model_state_dict": model.state_dict()}
+    model_config = getattr(model, "config", None)
+    if isinstance(model_config, DiscourseConfig):
+        metadata = {
+            **{name: getattr(model_config, name) for name in GNN_ARCHITECTURE_FIELDS},
+            **(metadata or {}),
+        }
     if metadata:
         payload["metadata"] = metadata
     logger.info("Saving GNN checkpoint to %s", path)
     _atomic_save(payload, path)
 
 
+def _check_gnn_heads(model: torch.nn.Module, state_dict: dict, path: str) -> None:
+    """Explain an attention-head mismatch instead of failing on tensor shapes.
+
+    Each GAT layer's ``attn.weight`` has one row per head; checkpoints from
+    before multi-head attention have a single row.
+    """
+    key = "gat_layers.0.attn.weight"
+    if key not in state_dict or key not in model.state_dict():
+        return
+    ckpt_heads = state_dict[key].shape[0]
+    model_heads = model.state_dict()[key].shape[0]
+    if ckpt_heads != model_heads:
+        raise ValueError(
+            f"GNN checkpoint {path} has {ckpt_heads} attention head(s) but the model "
+            f"has {model_heads}; set DiscourseConfig.gnn_heads={ckpt_heads} to load it"
+        )
+
+
+def gnn_architecture(state_dict: dict, metadata: Optional[dict] = None) -> Dict[str, Any]:
+    """The ``GNN_ARCHITECTURE_FIELDS`` a checkpoint was trained with.
+
+    Saved metadata wins; older checkpoints without it are read from the
+    weight shapes (``attn.weight`` has one row per head and
+    ``2 * head_dim`` columns) and were trained with dense attention.
+    """
+    metadata = metadata or {}
+    arch: Dict[str, Any] = {"sparse_attention": False}
+    if "input_proj.weight" in state_dict:
+        arch["gnn_hidden_dim"] = int(state_dict["input_proj.weight"].shape[0])
+    layers = {int(m.group(1)) for m in map(re.compile(r"gat_layers\.(\d+)\.").match, state_dict) if m}
+    if layers:
+        arch["gnn_num_layers"] = max(layers) + 1
+    attn = state_dict.get("gat_layers.0.attn.weight")
+    if attn is not None:
+        heads, head_dim = int(attn.shape[0]), int(attn.shape[1]) // 2
+        arch["gnn_heads"] = heads
+        if heads > 1 and "gnn_hidden_dim" in arch:
+            arch["gnn_head_merge"] = "concat" if heads * head_dim == arch["gnn_hidden_dim"] else "mean"
+    arch.update({name: metadata[name] for name in GNN_ARCHITECTURE_FIELDS if name in metadata})
+    return arch
+
+
+def gnn_config_for_checkpoint(config: DiscourseConfig, path: str) -> DiscourseConfig:
+    """*config* with the architecture of the GNN checkpoint at *path*.
+
+    Lets a default config load checkpoints trained with other head counts,
+    widths or depths (older single-head ones, sweep winners).
+    """
+    checkpoint = torch.load(path, map_location="cpu", weights_only=False)
+    arch = gnn_architecture(checkpoint["model_state_dict"], checkpoint.get("metadata"))
+    changed = {k: v for k, v in arch.items() if getattr(config, k) != v}
+    if changed:
+        logger.info("Building GNN with checkpoint architecture %s from %s", changed, path)
+    return dataclasses.replace(config, **changed)
+
+
 def load_gnn(
     model: torch.nn.Module,
     path: str,
@@ -97,6 +174,7 @@ def load_gnn(
             "Checkpoint key mismatch - missing: %s, unexpected: %s",
             missing, unexpected,
         )
+    _check_gnn_heads(model, state_dict, path)
     model.load_state_dict(state_dict)
     model.to(device)
     meta = checkpoint.get("metadata", {})
@@ -104,6 +182,65 @@ def load_gnn(
     return meta
 
 
+def save_training_state(state: dict, path: str) -> None:
+    """Persist a resumable training state (weights, optimiser, epoch, RNG)."""
+    logger.info("Saving training state (epoch %s) to %s", state.get("epoch"), path)
+    _atomic_save(state, path)
+
+
+def load_training_state(path: str) -> dict:
+    """Load a training state saved by :func:`save_training_state` onto the CPU."""
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Training state not found: {path}")
+    state = torch.load(path, map_location="cpu", weights_only=False)
+    logger.info("Loaded training state from %s (epoch %s)", path, state.get("epoch"))
+    return state
+
+
+def save_exported(module: torch.jit.ScriptModule, path: str) -> None:
+    """Save a frozen TorchScript inference graph atomically."""
+    _ensure_dir(os.path.dirname(path) or ".")
+    fd, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(path) or ".", suffix=".tmp"
+    )
+    try:
+        os.close(fd)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", FutureWarning)
+            torch.jit.save(module, tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    logger.info("Saved exported inference graph to %s", path)
+
+
+def load_exported(path: str, device: str = "cpu") -> torch.jit.ScriptModule:
+    """Load a TorchScript inference graph written by :func:`save_exported`."""
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Exported graph not found: {path}")
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", FutureWarning)
+        module = torch.jit.load(path, map_location=device)
+    module.eval()
+    logger.info("Loaded exported inference graph from %s", path)
+    return module
+
+
+def export_is_current(export_path: str, checkpoint_path: str) -> bool:
+    """Whether *export_path* exists and is not older than *checkpoint_path*.
+
+    A checkpoint rewritten after its export (retraining, a sweep winner or
+    an incremental update) makes the scripted graph stale.
+    """
+    if not os.path.exists(export_path):
+        return False
+    if not os.path.exists(checkpoint_path):
+        return True
+    return os.stat(export_path).st_mtime_ns >= os.stat(checkpoint_path).st_mtime_ns
+
+
 def save_training_history(history: dict, path: str) -> None:
     """Persist training metrics as JSON."""
     _ensure_dir(os.path.dirname(path) or ".")
@@ -117,10 +254,33 @@ def load_training_history(path: str) -> dict:
         return json.load(f)
 
 
+def save_trained_ids(transcript_ids, path: str) -> None:
+    """Record which transcripts the current checkpoints have been trained on."""
+    _ensure_dir(os.path.dirname(path) or ".")
+    with open(path, "w") as f:
+        json.dump(sorted(str(t) for t in transcript_ids), f)
+
+
+def load_trained_ids(path: str) -> set:
+    """Transcript ids seen by the current checkpoints; empty when none are recorded."""
+    if not os.path.exists(path):
+        return set()
+    with open(path, "r") as f:
+        return set(json.load(f))
+
+
 def default_paths(checkpoint_dir: str = DEFAULT_CHECKPOINT_DIR) -> dict:
     """Return canonical file paths for all artifacts."""
     return {
         "encoder": os.path.join(checkpoint_dir, "encoder.pt"),
         "gnn": os.path.join(checkpoint_dir, "discourse_gnn.pt"),
         "history": os.path.join(checkpoint_dir, "training_history.json"),
+        "encoder_state": os.path.join(checkpoint_dir, "encoder_state.pt"),
+        "gnn_state": os.path.join(checkpoint_dir, "discourse_gnn_state.pt"),
+        "graph_cache": os.path.join(checkpoint_dir, "graph_cache"),
+        "similarity_index": os.path.join(checkpoint_dir, "similarity_index.npz"),
+        "trained_ids": os.path.join(checkpoint_dir, "trained_transcripts.json"),
+        "versions": os.path.join(checkpoint_dir, "versions"),
+        "encoder_export": os.path.join(checkpoint_dir, "encoder_scripted.pt"),
+        "gnn_export": os.path.join(checkpoint_dir, "discourse_gnn_scripted.pt"),
     }
\ No newline at end of file
@@ -0,0 +1,21 @@
+from typing import Union
+
+import torch
+
+PRECISIONS = ("fp32", "bf16")
+
+
+def autocast(
+    precision: str,
+    device: Union[str, torch.device] = "cpu",
+) -> torch.autocast:
+    """Autocast context for *precision*; a disabled (fp32) context otherwise.
+
+    Matmul-heavy ops (linear, bmm, attention) run in bfloat16 under ``"bf16"``;
+    callers compute losses on ``.float()`` logits so reductions stay in fp32.
+    """
+    return torch.autocast(
+        torch.device(device).type,
+        dtype=torch.bfloat16,
+        enabled=precision == "bf16",
+    )
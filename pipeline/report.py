@@ -1,13 +1,72 @@
+import json
 import os
 from datetime import datetime
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
+
+
+def _mean(values: List[float]) -> float:
+    return sum(values) / len(values)
+
+
+def _throughput_lines(history: Dict[str, Any]) -> List[str]:
+    """Speed and memory bullets for one training stage's history."""
+    lines = []
+    if history.get("epoch_time"):
+        lines.append(f"- Mean epoch time: {_mean(history['epoch_time']):.2f}s")
+    if history.get("samples_per_sec"):
+        lines.append(f"- Mean throughput: {_mean(history['samples_per_sec']):.1f} samples/s")
+    if history.get("epoch_data_time") and history.get("epoch_compute_time"):
+        lines.append(
+            f"- Mean data wait / compute per epoch: "
+            f"{_mean(history['epoch_data_time']):.2f}s / "
+            f"{_mean(history['epoch_compute_time']):.2f}s"
+        )
+    if history.get("epoch_forward_time"):
+        lines.append(
+            f"- Mean forward / backward / optimizer step per epoch: "
+            f"{_mean(history['epoch_forward_time']):.2f}s / "
+            f"{_mean(history['epoch_backward_time']):.2f}s / "
+            f"{_mean(history['epoch_optimizer_time']):.2f}s"
+        )
+    if history.get("peak_rss_mb"):
+        lines.append(f"- Peak RSS: {max(history['peak_rss_mb']):.0f} MiB")
+    return lines
+
+
+def _merge_report_inputs(output_path: str, inputs: Dict[str, Any]) -> Dict[str, Any]:
+    """*inputs* over those of earlier reports, saved beside *output_path*.
+
+    Training, evaluation and benchmark runs each supply one section, so a
+    section missing from this call keeps the results of the last run that
+    supplied it instead of being reset to "not available".
+    """
+    path = os.path.splitext(output_path)[0] + "_inputs.json"
+    merged: Dict[str, Any] = {}
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            merged = json.load(f)
+    merged.update({key: value for key, value in inputs.items() if value})
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(merged, f, indent=2, default=str)
+    return merged
 
 
 def generate_report(
     training_history: Optional[Dict[str, Any]] = None,
     evaluation_results: Optional[Dict[str, Any]] = None,
     output_path: str = "outputs/technical_report.md",
+    benchmark_results: Optional[Dict[str, Any]] = None,
 ) -> str:
+    merged = _merge_report_inputs(output_path, {
+        "training_history": training_history,
+        "evaluation_results": evaluation_results,
+        "benchmark_results": benchmark_results,
+    })
+    training_history = merged.get("training_history")
+    evaluation_results = merged.get("evaluation_results")
+    benchmark_results = merged.get("benchmark_results")
+
     lines = []
 
     lines.append("# Technical Report: Causal Analysis and Interactive Reasoning")
@@ -57,21 +116,29 @@ def generate_report(
         if enc.get("train_loss"):
             lines.append("### Encoder Training\n")
             lines.append(f"- Epochs: {len(enc['train_loss'])}")
+            if enc.get("best_epoch"):
+                stop_note = " (early stopped)" if enc.get("stopped_early") else ""
+                lines.append(f"- Saved weights from epoch: {enc['best_epoch']}{stop_note}")
             lines.append(f"- Final training loss: {enc['train_loss'][-1]:.4f}")
             if enc.get("val_loss"):
                 lines.append(f"- Final validation loss: {enc['val_loss'][-1]:.4f}")
             if enc.get("val_accuracy"):
                 lines.append(f"- Final validation accuracy: {enc['val_accuracy'][-1]:.4f}")
+            lines.extend(_throughput_lines(enc))
             lines.append("")
 
         if gnn.get("train_loss"):
             lines.append("### GNN Training\n")
             lines.append(f"- Epochs: {len(gnn['train_loss'])}")
+            if gnn.get("best_epoch"):
+                stop_note = " (early stopped)" if gnn.get("stopped_early") else ""
+                lines.append(f"- Saved weights from epoch: {gnn['best_epoch']}{stop_note}")
             lines.append(f"- Final training loss: {gnn['train_loss'][-1]:.4f}")
             if gnn.get("val_loss"):
                 lines.append(f"- Final validation loss: {gnn['val_loss'][-1]:.4f}")
             if gnn.get("val_accuracy"):
                 lines.append(f"- Final validation accuracy: {gnn['val_accuracy'][-1]:.4f}")
+            lines.extend(_throughput_lines(gnn))
             lines.append("")
     else:
         lines.append("Training history not available.\n")
@@ -89,7 +156,21 @@ def generate_report(
     else:
         lines.append("Evaluation results not available.\n")
 
-    lines.append("## 5. Task Coverage\n")
+    lines.append("## 5. Performance Benchmarks\n")
+    if benchmark_results:
+        for name, result in benchmark_results.items():
+            lines.append(f"### {name}\n")
+            lines.append("| Measurement | Value |")
+            lines.append("|-------------|-------|")
+            for key, value in result.items():
+                if isinstance(value, float):
+                    value = f"{value:.4f}"
+                lines.append(f"| {key} | {value} |")
+            lines.append("")
+    else:
+        lines.append("Benchmark results not available (`python -m pipeline.run_benchmark`).\n")
+
+    lines.append("## 6. Task Coverage\n")
     lines.append("### Task 1: Query-Driven Causal Explanation\n")
     lines.append("- Accepts natural-language queries about conversation outcomes")
     lines.append("- Analyses relevant conversations using the causal DAG")
@@ -101,7 +182,7 @@ def generate_report(
     lines.append("- Preserves causal chain and evidence across turns")
     lines.append("- Deterministic context handling with explicit state tracking\n")
 
-    lines.append("## 6. Reproducibility\n")
+    lines.append("## 7. Reproducibility\n")
     lines.append("- All random seeds are fixed (default: 42)")
     lines.append("- Training runs on CPU by default")
     lines.append("- Dependencies listed in `requirements.txt`")
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import os
+
+from pipeline.benchmark import BENCHMARKS
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Run performance benchmarks for the Causal Analysis Pipeline",
+    )
+    parser.add_argument(
+        "benchmarks", nargs="*", default=sorted(BENCHMARKS),
+        choices=sorted(BENCHMARKS), metavar="BENCHMARK",
+        help=f"Benchmarks to run (default: all of {', '.join(sorted(BENCHMARKS))})",
+    )
+    parser.add_argument(
+        "--output", type=str, default="outputs/benchmark_results.json",
+        help="JSON file the results are merged into",
+    )
+    parser.add_argument(
+        "--report", action="store_true",
+        help="Generate a technical report including the benchmark results",
+    )
+    args = parser.parse_args()
+
+    results = {}
+    if os.path.exists(args.output):
+        with open(args.output, "r") as f:
+            results = json.load(f)
+
+    for name in args.benchmarks:
+        print(f"Running benchmark '{name}'...")
+        results[name] = BENCHMARKS[name]()
+        for key, value in results[name].items():
+            if isinstance(value, float):
+                print(f"  {key}: {value:.4f}")
+            else:
+                print(f"  {key}: {value}")
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2, default=str)
+    print(f"\nBenchmark results saved to {args.output}")
+
+    if args.report:
+        from pipeline.report import generate_report
+        generate_report(benchmark_results=results)
+        print("Technical report saved to outputs/technical_report.md")
+
+
+if __name__ == "__main__":
+    main()
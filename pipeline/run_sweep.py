@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+import argparse
+import ast
+import logging
+
+from pipeline.config import PipelineConfig
+from pipeline.sweep import DEFAULT_SPACES, run_sweep
+
+
+def _parse_param(spec: str):
+    """``section.field=v1,v2,...`` → (key, [values])."""
+    key, sep, values = spec.partition("=")
+    if not sep or not values:
+        raise argparse.ArgumentTypeError(f"Expected section.field=v1,v2,... got {spec!r}")
+    return key, [ast.literal_eval(v) for v in values.split(",")]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Successive-halving hyper-parameter sweep for the training stages",
+    )
+    parser.add_argument(
+        "--stage", type=str, required=True, choices=sorted(DEFAULT_SPACES),
+        help="Training stage to tune",
+    )
+    parser.add_argument(
+        "--param", type=_parse_param, action="append", default=None,
+        metavar="SECTION.FIELD=V1,V2",
+        help="Values to search for one config field; repeatable "
+             "(default: the built-in space for the stage)",
+    )
+    parser.add_argument(
+        "--min-epochs", type=int, default=1,
+        help="Epoch budget of the first rung (default: 1)",
+    )
+    parser.add_argument(
+        "--max-epochs", type=int, default=None,
+        help="Epoch budget of the final rung (default: the stage's configured epochs)",
+    )
+    parser.add_argument(
+        "--eta", type=int, default=3,
+        help="Keep the best 1/eta trials after each rung (default: 3)",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=2,
+        help="Concurrent trial processes; 0 runs trials in-process (default: 2)",
+    )
+    parser.add_argument(
+        "--sweep-dir", type=str, default="outputs/sweep",
+        help="Directory for trial checkpoints and leaderboard.json",
+    )
+    parser.add_argument(
+        "--checkpoint-dir", type=str, default="checkpoints",
+        help="Directory the winning checkpoint is pinned to",
+    )
+    parser.add_argument(
+        "--device", type=str, default="auto",
+        choices=["cpu", "cuda", "auto"],
+        help="Device for training: cpu, cuda, or auto (default: auto)",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+    )
+
+    space = dict(args.param) if args.param else None
+    leaderboard = run_sweep(
+        PipelineConfig(device=args.device),
+        args.stage,
+        space=space,
+        sweep_dir=args.sweep_dir,
+        checkpoint_dir=args.checkpoint_dir,
+        min_epochs=args.min_epochs,
+        max_epochs=args.max_epochs,
+        eta=args.eta,
+        n_workers=args.workers,
+    )
+
+    print("\nLeaderboard:")
+    for entry in leaderboard:
+        print(f"  trial {entry['trial']:3d}  rung {entry['rung']}  "
+              f"val_loss={entry['val_loss']:.4f}  val_acc={entry['val_accuracy']:.4f}  "
+              f"{entry['params']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,7 @@ import logging
 import sys
 
 from pipeline.config import PipelineConfig
-from pipeline.train import train_all
+from pipeline.train import train_all, train_incremental
 
 
 def main() -> None:
@@ -28,6 +28,14 @@ def main() -> None:
         choices=["cpu", "cuda", "auto"],
         help="Device for training: cpu, cuda, or auto (default: auto)",
     )
+    parser.add_argument(
+        "--precision", type=str, default="fp32", choices=["fp32", "bf16"],
+        help="Forward-pass precision; bf16 uses autocast (default: fp32)",
+    )
+    parser.add_argument(
+        "--compile", action="store_true",
+        help="torch.compile model forwards (shape-bucketed, eager fallback)",
+    )
     parser.add_argument(
         "--report", action="store_true",
         help="Generate a technical report after training",
@@ -52,6 +60,38 @@ def main() -> None:
         "--skip-tests", action="store_true",
         help="Skip test-set evaluation after training",
     )
+    parser.add_argument(
+        "--num-workers", type=int, default=None,
+        help="DataLoader worker processes for training (default: 0, main process)",
+    )
+    parser.add_argument(
+        "--prefetch-factor", type=int, default=None,
+        help="Batches prefetched per DataLoader worker (default: 2)",
+    )
+    parser.add_argument(
+        "--persistent-workers", action="store_true",
+        help="Keep DataLoader workers alive between epochs",
+    )
+    parser.add_argument(
+        "--world-size", type=int, default=None,
+        help="Train each stage data-parallel across this many local processes (gloo)",
+    )
+    parser.add_argument(
+        "--concurrent-stages", action="store_true",
+        help="Train the encoder and GNN at the same time in separate processes",
+    )
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="Fine-tune the current checkpoints on transcripts added since the last run",
+    )
+    parser.add_argument(
+        "--replay-ratio", type=float, default=None,
+        help="Old conversations replayed per new one in --incremental mode (default: 1.0)",
+    )
+    parser.add_argument(
+        "--export", action="store_true",
+        help="Export frozen TorchScript inference graphs after training",
+    )
     args = parser.parse_args()
 
     logging.basicConfig(
@@ -59,7 +99,19 @@ def main() -> None:
         format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
     )
 
-    config = PipelineConfig(device=args.device)
+    config = PipelineConfig(
+        device=args.device, precision=args.precision, compile_models=args.compile,
+    )
+    if args.num_workers is not None:
+        config.data.num_workers = args.num_workers
+    if args.prefetch_factor is not None:
+        config.data.prefetch_factor = args.prefetch_factor
+    config.data.persistent_workers = args.persistent_workers
+    if args.world_size is not None:
+        config.training.world_size = args.world_size
+    config.training.concurrent_stages = args.concurrent_stages
+    if args.replay_ratio is not None:
+        config.training.replay_ratio = args.replay_ratio
 
     # Derive skip flags from --train-encoder / --train-gnn selectors
     skip_encoder = False
@@ -70,6 +122,16 @@ def main() -> None:
         skip_encoder = True
 
     try:
+        if args.incremental:
+            train_incremental(
+                config=config,
+                checkpoint_dir=args.checkpoint_dir,
+                encoder_epochs=args.encoder_epochs,
+                gnn_epochs=args.gnn_epochs,
+                skip_encoder=skip_encoder,
+                skip_gnn=skip_gnn,
+            )
+            return
         history = train_all(
             config=config,
             checkpoint_dir=args.checkpoint_dir,
@@ -81,6 +143,7 @@ def main() -> None:
             skip_gnn=skip_gnn,
             resume=args.resume,
             skip_tests=args.skip_tests,
+            export=args.export,
         )
     except FileNotFoundError as e:
         print(f"Error: Data file not found: {e}")
@@ -0,0 +1,239 @@
+import logging
+import os
+import tempfile
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Rows scored per matrix product while assigning vectors to lists
+_ASSIGN_CHUNK = 65536
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def _assign(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Index of the most similar centroid for every (normalised) row."""
+    out = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), _ASSIGN_CHUNK):
+        chunk = vectors[start:start + _ASSIGN_CHUNK]
+        out[start:start + len(chunk)] = (chunk @ centroids.T).argmax(axis=1)
+    return out
+
+
+def train_centroids(
+    vectors: np.ndarray,
+    n_lists: int,
+    n_iter: int = 10,
+    sample_per_list: int = 32,
+    seed: int = 0,
+) -> np.ndarray:
+    """Spherical k-means centroids of (a sample of) normalised *vectors*."""
+    rng = np.random.default_rng(seed)
+    sample_size = min(len(vectors), n_lists * sample_per_list)
+    sample = vectors[rng.choice(len(vectors), sample_size, replace=False)]
+    centroids = sample[rng.choice(sample_size, n_lists, replace=False)].copy()
+    for _ in range(n_iter):
+        labels = _assign(sample, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, sample)
+        # Empty lists keep their previous centroid
+        counts = np.bincount(labels, minlength=n_lists)
+        filled = counts > 0
+        centroids[filled] = _normalize(sums[filled])
+    return centroids
+
+
+class SimilarityIndex:
+    """Inverted-file (IVF) cosine-similarity index over graph embeddings.
+
+    Vectors are L2-normalised and filed under the most similar of
+    ``n_lists`` spherical k-means centroids.  A query scores the centroids,
+    then only the vectors in its ``n_probe`` best lists, so search cost is
+    ``O(n_lists + n_probe * N / n_lists)`` rather than ``O(N)``.  Inserts
+    append to the nearest list in amortised O(1); re-inserting an id
+    replaces its vector.
+
+    *fingerprint* identifies the model that produced the embeddings, so a
+    persisted index can be recognised as stale after retraining.
+    """
+
+    def __init__(self, centroids: np.ndarray, n_probe: int = 8, fingerprint: str = ""):
+        self.centroids = _normalize(centroids)
+        self.n_probe = n_probe
+        self.fingerprint = fingerprint
+        n_lists, dim = self.centroids.shape
+        # Per list: vectors and internal keys in arrays grown by doubling,
+        # valid up to ``_sizes``; key -1 marks a replaced vector
+        self._vectors = [np.empty((0, dim), dtype=np.float32) for _ in range(n_lists)]
+        self._keys = [np.empty(0, dtype=np.int64) for _ in range(n_lists)]
+        self._sizes = np.zeros(n_lists, dtype=np.int64)
+        self.ids: List[str] = []
+        self._slots: Dict[str, Tuple[int, int, int]] = {}  # id -> (key, list, position)
+
+    @classmethod
+    def build(
+        cls,
+        ids: Sequence[str],
+        vectors: np.ndarray,
+        n_lists: Optional[int] = None,
+        n_probe: int = 8,
+        fingerprint: str = "",
+        seed: int = 0,
+    ) -> "SimilarityIndex":
+        """Train centroids on *vectors* and insert them.
+
+        *n_lists* defaults to about ``2 * sqrt(N)``: list scans read vectors
+        from memory while the small centroid matrix stays cached, so shorter
+        lists win over a smaller centroid scan.
+        """
+        if len(vectors) == 0:
+            raise ValueError("Cannot build a similarity index from zero vectors")
+        vectors = _normalize(vectors)
+        if n_lists is None:
+            n_lists = int(round(2 * np.sqrt(len(vectors))))
+        n_lists = max(1, min(n_lists, len(vectors)))
+        index = cls(train_centroids(vectors, n_lists, seed=seed), n_probe, fingerprint)
+        index._add_normalized([str(i) for i in ids], vectors)
+        return index
+
+    # ── inserts ──────────────────────────────────────────────────────────
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, transcript_id: str) -> bool:
+        return str(transcript_id) in self._slots
+
+    @property
+    def dim(self) -> int:
+        return self.centroids.shape[1]
+
+    def _reserve(self, lst: int, extra: int) -> None:
+        need = int(self._sizes[lst]) + extra
+        capacity = len(self._keys[lst])
+        if need <= capacity:
+            return
+        capacity = max(need, 2 * capacity, 16)
+        vectors = np.empty((capacity, self.dim), dtype=np.float32)
+        keys = np.full(capacity, -1, dtype=np.int64)
+        size = int(self._sizes[lst])
+        vectors[:size] = self._vectors[lst][:size]
+        keys[:size] = self._keys[lst][:size]
+        self._vectors[lst], self._keys[lst] = vectors, keys
+
+    def add(self, ids: Sequence[str], vectors: np.ndarray) -> None:
+        """Insert (or replace) the embeddings of *ids*."""
+        ids = [str(i) for i in ids]
+        self._add_normalized(ids, _normalize(np.asarray(vectors).reshape(len(ids), self.dim)))
+
+    def _add_normalized(self, ids: List[str], vectors: np.ndarray) -> None:
+        last = {tid: row for row, tid in enumerate(ids)}
+        if len(last) < len(ids):  # an id repeated within one call keeps its last vector
+            rows = sorted(last.values())
+            ids, vectors = [ids[r] for r in rows], vectors[rows]
+        for tid in ids:
+            slot = self._slots.pop(tid, None)
+            if slot is not None:
+                _, lst, pos = slot
+                self._keys[lst][pos] = -1
+        self._insert(ids, vectors, _assign(vectors, self.centroids))
+
+    def _insert(self, ids: List[str], vectors: np.ndarray, lists: np.ndarray) -> None:
+        order = np.argsort(lists, kind="stable")
+        bounds = np.searchsorted(lists[order], np.arange(len(self.centroids) + 1))
+        for lst in np.nonzero(np.diff(bounds))[0]:
+            rows = order[bounds[lst]:bounds[lst + 1]]
+            self._reserve(lst, len(rows))
+            start = int(self._sizes[lst])
+            keys = np.arange(len(self.ids), len(self.ids) + len(rows))
+            self._vectors[lst][start:start + len(rows)] = vectors[rows]
+            self._keys[lst][start:start + len(rows)] = keys
+            for offset, (row, key) in enumerate(zip(rows.tolist(), keys.tolist())):
+                self.ids.append(ids[row])
+                self._slots[ids[row]] = (key, int(lst), start + offset)
+            self._sizes[lst] += len(rows)
+
+    # ── search ───────────────────────────────────────────────────────────
+
+    def vector(self, transcript_id: str) -> Optional[np.ndarray]:
+        slot = self._slots.get(str(transcript_id))
+        if slot is None:
+            return None
+        _, lst, pos = slot
+        return self._vectors[lst][pos]
+
+    def search(
+        self,
+        query: np.ndarray,
+        k: int = 10,
+        exclude: Optional[str] = None,
+    ) -> List[Tuple[str, float]]:
+        """Top-*k* ``(transcript_id, cosine similarity)`` pairs, best first."""
+        query = _normalize(np.asarray(query).reshape(self.dim))
+        n_probe = min(self.n_probe, len(self.centroids))
+        centroid_scores = self.centroids @ query
+        probe = np.argpartition(-centroid_scores, n_probe - 1)[:n_probe]
+        scores, keys = [], []
+        for lst in probe.tolist():
+            size = int(self._sizes[lst])
+            if size:
+                scores.append(self._vectors[lst][:size] @ query)
+                keys.append(self._keys[lst][:size])
+        if not scores:
+            return []
+        scores, keys = np.concatenate(scores), np.concatenate(keys)
+        scores[keys < 0] = -np.inf
+        if exclude is not None and str(exclude) in self._slots:
+            scores[keys == self._slots[str(exclude)][0]] = -np.inf
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [
+            (self.ids[keys[i]], float(scores[i]))
+            for i in top.tolist() if np.isfinite(scores[i])
+        ]
+
+    # ── persistence ──────────────────────────────────────────────────────
+
+    def save(self, path: str) -> None:
+        """Write atomically so concurrent readers never see a partial file."""
+        sizes = self._sizes.tolist()
+        keys = np.concatenate([self._keys[lst][:size] for lst, size in enumerate(sizes)])
+        lists = np.repeat(np.arange(len(sizes)), sizes)
+        live = keys >= 0
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".npz.tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(
+                    f,
+                    centroids=self.centroids,
+                    n_probe=np.asarray(self.n_probe),
+                    fingerprint=np.asarray(self.fingerprint),
+                    vectors=np.concatenate(
+                        [self._vectors[lst][:size] for lst, size in enumerate(sizes)],
+                    )[live],
+                    lists=lists[live],
+                    ids=np.asarray([self.ids[k] for k in keys[live].tolist()], dtype=str),
+                )
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path: str) -> "SimilarityIndex":
+        with np.load(path) as data:
+            index = cls(data["centroids"], int(data["n_probe"]), str(data["fingerprint"]))
+            # Saved list assignments skip re-scoring every vector
+            index._insert(data["ids"].tolist(), data["vectors"], data["lists"])
+        logger.info("Loaded similarity index with %d conversations from %s", len(index), path)
+        return index
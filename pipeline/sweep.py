@@ -0,0 +1,303 @@
+import copy
+import hashlib
+import itertools
+import json
+import logging
+import math
+import multiprocessing as mp
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import torch
+
+from .config import PipelineConfig
+from .data_processing import conversation_feature_matrix, emotion_labels
+from .graph_store import load_or_build_graph_store
+from .model_io import default_paths, save_trained_ids
+from .train import _ConversationLevelDataset, _remove_stale_exports, train_encoder, train_gnn
+
+logger = logging.getLogger(__name__)
+
+STAGES = {"encoder": train_encoder, "gnn": train_gnn}
+
+# Searched when no space is given on the command line
+DEFAULT_SPACES: Dict[str, Dict[str, List[Any]]] = {
+    "encoder": {
+        "encoder.learning_rate": [2e-5, 1e-4, 5e-4, 1e-3],
+        "encoder.dropout": [0.1, 0.3],
+    },
+    "gnn": {
+        "discourse.gnn_hidden_dim": [64, 128, 256],
+        "discourse.gnn_num_layers": [2, 3],
+        "discourse.learning_rate": [3e-4, 1e-3],
+        "discourse.dropout": [0.1, 0.3],
+    },
+}
+
+_STORE_ARRAYS = ("features", "emotion_labels", "offsets", "outcomes")
+
+
+# ── search space ─────────────────────────────────────────────────────────
+
+def expand_grid(space: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    """Cartesian product of ``{"section.field": [values]}`` as override dicts."""
+    keys = sorted(space)
+    return [dict(zip(keys, values)) for values in itertools.product(*(space[k] for k in keys))]
+
+
+def apply_overrides(config: PipelineConfig, overrides: Dict[str, Any]) -> PipelineConfig:
+    """Copy of *config* with dotted ``section.field`` overrides applied."""
+    config = copy.deepcopy(config)
+    for key, value in overrides.items():
+        section, _, name = key.rpartition(".")
+        target = getattr(config, section) if section else config
+        if not hasattr(target, name):
+            raise ValueError(f"Unknown config field: {key}")
+        setattr(target, name, value)
+    return config
+
+
+# ── shared memory-mapped feature store ───────────────────────────────────
+
+def build_feature_store(
+    records: List[dict],
+    store_dir: str,
+    max_turns: Optional[int] = None,
+) -> str:
+    """Write the encoder feature matrix and labels as ``.npy`` files in *store_dir*."""
+    os.makedirs(store_dir, exist_ok=True)
+    features, offsets = conversation_feature_matrix(records, max_turns)
+    arrays = {
+        "features": features,
+        "emotion_labels": emotion_labels(features),
+        "offsets": offsets,
+        "outcomes": np.array([rec.get("outcome_id", 0) for rec in records], dtype=np.int64),
+    }
+    for name, array in arrays.items():
+        np.save(os.path.join(store_dir, f"{name}.npy"), array)
+    logger.info("Feature store with %d turns written to %s", len(features), store_dir)
+    return store_dir
+
+
+def load_feature_store(
+    store_dir: str,
+    max_turns: int = 64,
+) -> _ConversationLevelDataset:
+    """Memory-map a feature store; pages are shared by every process reading it."""
+    arrays = {
+        # Copy-on-write maps are writable for torch.from_numpy but never
+        # dirty the shared pages.
+        name: np.load(os.path.join(store_dir, f"{name}.npy"), mmap_mode="c")
+        for name in _STORE_ARRAYS
+    }
+    return _ConversationLevelDataset.from_arrays(
+        arrays["features"], arrays["emotion_labels"],
+        np.asarray(arrays["offsets"]), np.asarray(arrays["outcomes"]), max_turns,
+    )
+
+
+# ── trial execution ──────────────────────────────────────────────────────
+
+_WORKER_STATE: Dict[str, Any] = {}
+
+
+def _init_worker(records: List[dict], store_dir: Optional[str], num_threads: int) -> None:
+    torch.set_num_threads(num_threads)
+    _WORKER_STATE["records"] = records
+    _WORKER_STATE["store_dir"] = store_dir
+
+
+def _run_trial(
+    stage: str,
+    config: PipelineConfig,
+    trial_dir: str,
+    epochs: int,
+) -> Dict[str, Any]:
+    """Train one trial up to *epochs* total, resuming from its previous rung."""
+    kwargs: Dict[str, Any] = {}
+    if stage == "encoder" and _WORKER_STATE.get("store_dir"):
+        kwargs["dataset"] = load_feature_store(
+            _WORKER_STATE["store_dir"], config.data.max_turns,
+        )
+    history = STAGES[stage](
+        config, _WORKER_STATE["records"], trial_dir,
+        epochs=epochs, verbose=False, resume=True, **kwargs,
+    )
+    best_val_loss = history.get("best_val_loss")
+    return {
+        "val_loss": best_val_loss if best_val_loss is not None else math.inf,
+        "val_accuracy": max(history["val_accuracy"], default=0.0),
+        "epochs_run": history.get("epochs_run", len(history["train_loss"])),
+        "stopped_early": history.get("stopped_early", False),
+    }
+
+
+def _trial_dir(sweep_dir: str, index: int, overrides: Dict[str, Any]) -> str:
+    """Directory of one trial, named by its index and a hash of its overrides."""
+    digest = hashlib.sha256(
+        json.dumps(overrides, sort_keys=True, default=str).encode(),
+    ).hexdigest()[:8]
+    return os.path.join(sweep_dir, f"trial_{index:03d}_{digest}")
+
+
+def _rung_budgets(min_epochs: int, max_epochs: int, eta: int) -> List[int]:
+    budgets = [min_epochs]
+    while budgets[-1] * eta < max_epochs:
+        budgets.append(budgets[-1] * eta)
+    if budgets[-1] < max_epochs:
+        budgets.append(max_epochs)
+    return budgets
+
+
+# ── successive halving ───────────────────────────────────────────────────
+
+def run_sweep(
+    config: PipelineConfig,
+    stage: str,
+    space: Optional[Dict[str, List[Any]]] = None,
+    records: Optional[List[dict]] = None,
+    sweep_dir: str = "outputs/sweep",
+    checkpoint_dir: Optional[str] = "checkpoints",
+    min_epochs: int = 1,
+    max_epochs: Optional[int] = None,
+    eta: int = 3,
+    n_workers: int = 2,
+    verbose: bool = True,
+) -> List[Dict[str, Any]]:
+    """Successive-halving sweep over *space* for one training *stage*.
+
+    Every trial trains for the first rung's budget; after each rung only the
+    best ``1 / eta`` (by best validation loss) continue, resuming from their
+    training state, until the survivors reach *max_epochs*.  Trials run
+    concurrently in *n_workers* processes (0 runs them in-process) and the
+    encoder stage reads a shared memory-mapped feature store.
+
+    Writes ``leaderboard.json`` to *sweep_dir*, copies the winning checkpoint
+    into *checkpoint_dir* (unless it is None) and returns the leaderboard.
+    """
+    if stage not in STAGES:
+        raise ValueError(f"stage must be one of {sorted(STAGES)}, got {stage!r}")
+    if records is None:
+        from .data_processing import process_dataset
+        records = process_dataset(config)
+    space = space or DEFAULT_SPACES[stage]
+    stage_cfg = config.encoder if stage == "encoder" else config.discourse
+    max_epochs = max_epochs or stage_cfg.epochs
+    budgets = _rung_budgets(min_epochs, max_epochs, eta)
+
+    os.makedirs(sweep_dir, exist_ok=True)
+    store_dir = None
+    graph_cache_dir = config.discourse.graph_cache_dir or os.path.join(sweep_dir, "graph_cache")
+    if stage == "encoder":
+        store_dir = build_feature_store(
+            records, os.path.join(sweep_dir, "feature_store"), config.data.max_turns,
+        )
+    elif config.discourse.use_graph_cache:
+        # Detect edges once here; every trial then loads the same store
+        discourse_cfg = config.discourse
+        load_or_build_graph_store(
+            records, discourse_cfg.edge_types, graph_cache_dir,
+            discourse_cfg.edge_window, discourse_cfg.speaker_edges,
+        )
+
+    trials: List[Dict[str, Any]] = []
+    for i, overrides in enumerate(expand_grid(space)):
+        trial_cfg = apply_overrides(config, overrides)
+        trial_cfg.training.world_size = 1
+        trial_cfg.discourse.graph_cache_dir = graph_cache_dir
+        trial_dir = _trial_dir(sweep_dir, i, overrides)
+        # Trials resume between rungs of this sweep only, never from the
+        # state an earlier sweep left in the same directory
+        shutil.rmtree(trial_dir, ignore_errors=True)
+        trials.append({
+            "trial": i,
+            "params": overrides,
+            "config": trial_cfg,
+            "dir": trial_dir,
+            "rung": -1,
+        })
+
+    if verbose:
+        print(f"Sweeping {len(trials)} {stage} configurations over rungs {budgets} "
+              f"(eta={eta}, workers={n_workers})")
+
+    pool = None
+    if n_workers > 0:
+        threads = max(1, (os.cpu_count() or 1) // n_workers)
+        pool = ProcessPoolExecutor(
+            max_workers=n_workers,
+            mp_context=mp.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(records, store_dir, threads),
+        )
+    else:
+        _init_worker(records, store_dir, torch.get_num_threads())
+
+    survivors = trials
+    try:
+        for rung, budget in enumerate(budgets):
+            args = [(stage, t["config"], t["dir"], budget) for t in survivors]
+            if pool is not None:
+                results = list(pool.map(_run_trial, *zip(*args)))
+            else:
+                results = [_run_trial(*a) for a in args]
+            for trial, result in zip(survivors, results):
+                trial.update(result)
+                trial["rung"] = rung
+            survivors = sorted(survivors, key=lambda t: t["val_loss"])
+            if verbose:
+                best = survivors[0]
+                print(f"  Rung {rung} ({budget} epochs): {len(survivors)} trials, "
+                      f"best val_loss={best['val_loss']:.4f} {best['params']}")
+            if rung < len(budgets) - 1:
+                survivors = survivors[: max(1, math.ceil(len(survivors) / eta))]
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    leaderboard = [
+        {k: v for k, v in t.items() if k != "config"}
+        for t in sorted(trials, key=lambda t: (-t["rung"], t["val_loss"]))
+    ]
+    winner = leaderboard[0]
+    if checkpoint_dir is not None:
+        _pin_winner(winner, stage, checkpoint_dir, records, verbose)
+        if verbose:
+            print(f"Pinned trial {winner['trial']} {winner['params']} "
+                  f"to {winner['pinned_checkpoint']}")
+
+    with open(os.path.join(sweep_dir, "leaderboard.json"), "w") as f:
+        json.dump({"stage": stage, "budgets": budgets, "trials": leaderboard},
+                  f, indent=2, default=str)
+    return leaderboard
+
+
+def _pin_winner(
+    winner: Dict[str, Any],
+    stage: str,
+    checkpoint_dir: str,
+    records: List[dict],
+    verbose: bool = False,
+) -> None:
+    """Copy the winning checkpoint into *checkpoint_dir* next to its overrides.
+
+    GNN checkpoints carry their architecture in their metadata, and loaders
+    build the model from it, so a winner with e.g. another
+    ``gnn_hidden_dim`` still loads under the default config.  As after
+    ``train_all``, the sweep's *records* become the trained transcripts and
+    the stage's now stale exported graph is removed.
+    """
+    paths = default_paths(checkpoint_dir)
+    src = default_paths(winner["dir"])[stage]
+    dst = paths[stage]
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    shutil.copyfile(src, dst)
+    save_trained_ids((rec.get("transcript_id") for rec in records), paths["trained_ids"])
+    _remove_stale_exports(checkpoint_dir, [stage], verbose)
+    with open(os.path.join(checkpoint_dir, f"sweep_winner_{stage}.json"), "w") as f:
+        json.dump({"trial": winner["trial"], "params": winner["params"],
+                   "val_loss": winner["val_loss"]}, f, indent=2)
+    winner["pinned_checkpoint"] = dst
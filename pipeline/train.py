@@ -1,33 +1,66 @@
+import copy
 import logging
 import os
 import random
+import re
+import shutil
+import sys
 import tempfile
 import time
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
 
 import numpy as np
 import torch
 import torch.nn as nn
 import torch.optim as optim
-from torch.utils.data import DataLoader, Dataset
+from torch.nn.utils.rnn import pad_sequence
+from torch.utils.data import DataLoader, Dataset, Sampler
 
-from .config import PipelineConfig
+from .compilation import compile_encoder_batch, compile_gnn
+from .config import DataConfig, PipelineConfig
 from .constants import OUTCOME_MAP
-from .data_processing import process_dataset
+from .data_processing import (
+    conversation_feature_matrix,
+    emotion_labels,
+    pad_feature_matrix,
+    process_dataset,
+    turn_embedding_matrix,
+)
 from .discourse_graph import (
     DiscourseGNN,
     DiscourseGraphLoss,
-    build_discourse_graph,
+    batch_graphs,
+)
+from .distributed import (
+    all_reduce_sum,
+    average_gradients,
+    broadcast_parameters,
+    is_main_process,
+    run_data_parallel,
+    shard_sampler,
 )
+from .export import export_checkpoints
+from .graph_store import GraphStore, load_or_build_graph_store
+from .precision import autocast
 from .model_io import (
     default_paths,
+    gnn_config_for_checkpoint,
     load_encoder as _load_encoder_ckpt,
     load_gnn as _load_gnn_ckpt,
+    load_trained_ids,
+    load_training_state,
     save_encoder,
     save_gnn,
+    save_trained_ids,
     save_training_history,
+    save_training_state,
 )
 
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
 logger = logging.getLogger(__name__)
 
 
@@ -40,17 +73,83 @@ def set_seed(seed: int = 42) -> None:
         torch.cuda.manual_seed_all(seed)
 
 
+def _capture_rng_state(shuffle_gen: torch.Generator) -> Dict[str, Any]:
+    """Snapshot every RNG that influences training, including batch shuffling."""
+    state = {
+        "python": random.getstate(),
+        "numpy": np.random.get_state(),
+        "torch": torch.get_rng_state(),
+        "shuffle": shuffle_gen.get_state(),
+    }
+    if torch.cuda.is_available():
+        state["cuda"] = torch.cuda.get_rng_state_all()
+    return state
+
+
+def _restore_rng_state(state: Dict[str, Any], shuffle_gen: torch.Generator) -> None:
+    random.setstate(state["python"])
+    np.random.set_state(state["numpy"])
+    torch.set_rng_state(state["torch"])
+    shuffle_gen.set_state(state["shuffle"])
+    if "cuda" in state and torch.cuda.is_available():
+        torch.cuda.set_rng_state_all(state["cuda"])
+
+
+def _save_resume_state(
+    path: str,
+    model: nn.Module,
+    optimizer: optim.Optimizer,
+    epoch: int,
+    history: Dict[str, Any],
+    shuffle_gen: torch.Generator,
+    scheduler: optim.lr_scheduler.ReduceLROnPlateau,
+    stopper: "_EarlyStopping",
+) -> None:
+    """Write everything needed to continue training after *epoch* epochs."""
+    save_training_state({
+        "model_state_dict": model.state_dict(),
+        "optimizer_state_dict": optimizer.state_dict(),
+        "scheduler_state_dict": scheduler.state_dict(),
+        "early_stopping": stopper.state_dict(),
+        "epoch": epoch,
+        "history": history,
+        "rng_state": _capture_rng_state(shuffle_gen),
+    }, path)
+
+
+def _load_resume_state(
+    path: str,
+    model: nn.Module,
+    optimizer: optim.Optimizer,
+    shuffle_gen: torch.Generator,
+    scheduler: optim.lr_scheduler.ReduceLROnPlateau,
+    stopper: "_EarlyStopping",
+) -> Dict[str, Any]:
+    """Restore model, optimiser, schedule, early-stopping and RNG state in place.
+
+    Returns the saved state for the epoch counter and history.
+    """
+    state = load_training_state(path)
+    model.load_state_dict(state["model_state_dict"])
+    optimizer.load_state_dict(state["optimizer_state_dict"])
+    scheduler.load_state_dict(state["scheduler_state_dict"])
+    stopper.load_state_dict(state["early_stopping"])
+    _restore_rng_state(state["rng_state"], shuffle_gen)
+    return state
+
+
 
 class _FeatureEncoder(nn.Module):
 
     def __init__(self, input_dim: int = 17, hidden_dim: int = 64,
-                 num_emotion_classes: int = 6, num_outcome_classes: int = 5):
+                 num_emotion_classes: int = 6, num_outcome_classes: int = 5,
+                 dropout: float = 0.3):
         super().__init__()
         self.hidden_dim = hidden_dim
         self.encoder = nn.Sequential(
             nn.Linear(input_dim, hidden_dim),
             nn.ReLU(),
-            nn.Dropout(0.3),
+            nn.Dropout(dropout),
             nn.Linear(hidden_dim, hidden_dim),
             nn.ReLU(),
         )
@@ -64,11 +163,11 @@ class _FeatureEncoder(nn.Module):
         self.outcome_head = nn.Sequential(
             nn.Linear(hidden_dim, hidden_dim // 2),
             nn.ReLU(),
-            nn.Dropout(0.3),
+            nn.Dropout(dropout),
             nn.Linear(hidden_dim // 2, num_outcome_classes),
         )
 
-    def forward(self, x: torch.Tensor) -> dict:
+    def forward(self, x: torch.Tensor) -> Dict[str, torch.Tensor]:
         h = self.encoder(x)
         return {
             "turn_embeddings": h,
@@ -76,7 +175,7 @@ class _FeatureEncoder(nn.Module):
             "outcome_logits": self.outcome_head(h),
         }
 
-    def forward_conversation(self, turn_features: torch.Tensor) -> dict:
+    def forward_conversation(self, turn_features: torch.Tensor) -> Dict[str, torch.Tensor]:
         """Process all turns of a conversation and predict outcome at conversation level.
 
         Args:
@@ -100,6 +199,37 @@ class _FeatureEncoder(nn.Module):
             "conversation_embedding": conv_embedding,
         }
 
+    def forward_batch(
+        self,
+        turn_features: torch.Tensor,
+        mask: torch.Tensor,
+    ) -> Dict[str, torch.Tensor]:
+        """Batched ``forward_conversation`` over padded conversations.
+
+        Args:
+            turn_features: (B, T, input_dim) zero-padded turn features
+            mask: (B, T) bool, True for real turns
+        Returns:
+            dict with turn_embeddings (B, T, H), emotion_logits (B, T, E),
+            outcome_logits (B, O) and conversation_embedding (B, H)
+        """
+        h = self.encoder(turn_features)  # (B, T, hidden_dim)
+        emotion_logits = self.emotion_head(h)  # (B, T, num_emotion_classes)
+
+        # Masked attention pooling: padded turns get zero weight
+        scores = self.attn_pool(h).squeeze(-1)  # (B, T)
+        scores = scores.masked_fill(~mask, float("-inf"))
+        attn_weights = torch.softmax(scores, dim=1).unsqueeze(-1)  # (B, T, 1)
+        conv_embedding = (attn_weights * h).sum(dim=1)  # (B, hidden_dim)
+
+        outcome_logits = self.outcome_head(conv_embedding)  # (B, num_outcome_classes)
+        return {
+            "turn_embeddings": h,
+            "emotion_logits": emotion_logits,
+            "outcome_logits": outcome_logits,
+            "conversation_embedding": conv_embedding,
+        }
+
 
 class _ConversationDataset(Dataset):
     """Dataset wrapper over processed conversation records."""
@@ -159,31 +289,285 @@ class _ConversationDataset(Dataset):
 
 
 class _ConversationLevelDataset(Dataset):
-    """Dataset that returns all turns per conversation with one outcome label."""
+    """Dataset that returns all turns per conversation with one outcome label.
+
+    Every turn lives in one contiguous float32 matrix built with a single
+    ``torch.from_numpy``; conversation *i* is the slice
+    ``features[offsets[i]:offsets[i + 1]]``.  Conversations without turns
+    are skipped.
+    """
 
     def __init__(self, records: List[dict], max_turns: int = 64):
-        self.conversations: List[Tuple[torch.Tensor, torch.Tensor, int]] = []
+        feats, offsets = conversation_feature_matrix(records, max_turns)
+        outcomes = np.array(
+            [rec.get("outcome_id", 0) for rec in records], dtype=np.int64,
+        )
+        self._set_arrays(feats, emotion_labels(feats), offsets, outcomes, max_turns)
+
+    @classmethod
+    def from_arrays(
+        cls,
+        features: np.ndarray,
+        turn_emotion_labels: np.ndarray,
+        offsets: np.ndarray,
+        outcomes: np.ndarray,
+        max_turns: int = 64,
+    ) -> "_ConversationLevelDataset":
+        """Wrap precomputed (e.g. memory-mapped) arrays without copying them."""
+        dataset = cls.__new__(cls)
+        dataset._set_arrays(features, turn_emotion_labels, offsets, outcomes, max_turns)
+        return dataset
+
+    def _set_arrays(
+        self,
+        features: np.ndarray,
+        turn_emotion_labels: np.ndarray,
+        offsets: np.ndarray,
+        outcomes: np.ndarray,
+        max_turns: int,
+    ) -> None:
         self.max_turns = max_turns
-        for rec in records:
-            turn_feats = rec.get("turn_features", [])
-            if not turn_feats:
-                continue
-            outcome_id = rec.get("outcome_id", 0)
-            # Build feature matrix and emotion labels for all turns
-            features = []
-            emotion_labels = []
-            for tf in turn_feats[:max_turns]:
-                features.append(_ConversationDataset._feature_vector(tf))
-                emotion_labels.append(_ConversationDataset._emotion_label(tf))
-            feat_tensor = torch.stack(features)  # (num_turns, 17)
-            emo_tensor = torch.tensor(emotion_labels, dtype=torch.long)
-            self.conversations.append((feat_tensor, emo_tensor, outcome_id))
+        self.features = torch.from_numpy(features)  # (total_turns, 17)
+        self.emotion_labels = torch.from_numpy(turn_emotion_labels)
+        self.offsets = offsets
+        self.outcomes = outcomes
+        self._index = np.flatnonzero(np.diff(offsets) > 0)
+
+    def subset(self, positions: Sequence[int]) -> "_ConversationLevelDataset":
+        """View over the records at *positions*, sharing the feature matrix."""
+        view = copy.copy(self)
+        positions = np.asarray(positions, dtype=np.int64)
+        view._index = positions[np.diff(self.offsets)[positions] > 0]
+        return view
 
     def __len__(self) -> int:
-        return len(self.conversations)
+        return len(self._index)
 
     def __getitem__(self, idx: int):
-        return self.conversations[idx]
+        i = self._index[idx]
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return (
+            self.features[start:end],
+            self.emotion_labels[start:end],
+            int(self.outcomes[i]),
+        )
+
+
+def _collate_conversations(
+    batch: List[Tuple[torch.Tensor, torch.Tensor, int]],
+) -> Tuple[torch.Tensor, torch.Tensor, torch.Tensor, torch.Tensor]:
+    """Pad conversations to ``(B, T, 17)`` with a ``(B, T)`` turn mask."""
+    feats = [item[0] for item in batch]
+    lengths = torch.tensor([f.shape[0] for f in feats])
+    padded = pad_sequence(feats, batch_first=True)
+    emo_labels = pad_sequence([item[1] for item in batch], batch_first=True)
+    mask = torch.arange(padded.shape[1]).unsqueeze(0) < lengths.unsqueeze(1)
+    outcomes = torch.tensor([item[2] for item in batch], dtype=torch.long)
+    return padded, emo_labels, mask, outcomes
+
+
+def _make_loader(
+    dataset: Sequence,
+    batch_size: int,
+    collate_fn,
+    device: torch.device,
+    data_cfg: Optional[DataConfig] = None,
+    generator: Optional[torch.Generator] = None,
+    sampler: Optional[Sampler] = None,
+) -> DataLoader:
+    """DataLoader honouring the worker / prefetch settings in ``DataConfig``.
+
+    Without *data_cfg* batches are loaded in the main process.  Batches are
+    shuffled when a *generator* is given; a *sampler* (e.g. this rank's
+    shard under data-parallel training) takes over ordering entirely.
+    """
+    num_workers = data_cfg.num_workers if data_cfg is not None else 0
+    worker_kwargs: Dict[str, Any] = {}
+    if num_workers > 0:
+        worker_kwargs["prefetch_factor"] = data_cfg.prefetch_factor
+        worker_kwargs["persistent_workers"] = data_cfg.persistent_workers
+    return DataLoader(
+        dataset,
+        batch_size=batch_size,
+        shuffle=generator is not None and sampler is None,
+        generator=generator,
+        sampler=sampler,
+        collate_fn=collate_fn,
+        num_workers=num_workers,
+        pin_memory=torch.device(device).type == "cuda",
+        **worker_kwargs,
+    )
+
+
+def _peak_rss_mb() -> float:
+    """Peak resident set size of this process so far, in MiB (0 if unknown)."""
+    if resource is None:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and KiB elsewhere
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 1024
+
+
+def _new_history() -> Dict[str, Any]:
+    return {
+        "train_loss": [], "val_loss": [], "val_accuracy": [], "learning_rate": [],
+        "epoch_time": [], "epoch_data_time": [], "epoch_compute_time": [],
+        "epoch_forward_time": [], "epoch_backward_time": [], "epoch_optimizer_time": [],
+        "samples_per_sec": [], "peak_rss_mb": [],
+    }
+
+
+class _EpochTimer:
+    """Splits an epoch's wall time into data wait, forward, backward and optimizer step."""
+
+    def __init__(self):
+        self.data_time = 0.0
+        self.forward_time = 0.0
+        self.backward_time = 0.0
+        self.optimizer_time = 0.0
+        self._mark = time.perf_counter()
+
+    def _lap(self) -> float:
+        now = time.perf_counter()
+        elapsed = now - self._mark
+        self._mark = now
+        return elapsed
+
+    def data_ready(self) -> None:
+        self.data_time += self._lap()
+
+    def forward_done(self) -> None:
+        self.forward_time += self._lap()
+
+    def backward_done(self) -> None:
+        self.backward_time += self._lap()
+
+    def step_done(self) -> None:
+        self.optimizer_time += self._lap()
+
+    @property
+    def compute_time(self) -> float:
+        return self.forward_time + self.backward_time + self.optimizer_time
+
+    def record(self, history: Dict[str, Any], epoch_time: float, n_samples: float) -> None:
+        """Append this epoch's timings, throughput and peak RSS to *history*."""
+        history["epoch_time"].append(epoch_time)
+        history["epoch_data_time"].append(self.data_time)
+        history["epoch_compute_time"].append(self.compute_time)
+        history["epoch_forward_time"].append(self.forward_time)
+        history["epoch_backward_time"].append(self.backward_time)
+        history["epoch_optimizer_time"].append(self.optimizer_time)
+        history["samples_per_sec"].append(n_samples / max(epoch_time, 1e-9))
+        history["peak_rss_mb"].append(_peak_rss_mb())
+
+
+class _EarlyStopping:
+    """Patience-based early stopping that keeps the best weights in memory."""
+
+    def __init__(self, patience: int):
+        self.patience = patience
+        self.best_val_loss = float("inf")
+        self.best_epoch = 0
+        self.patience_counter = 0
+        self.stopped = False
+        self.best_state: Optional[Dict[str, torch.Tensor]] = None
+
+    def step(self, val_loss: float, model: nn.Module, epoch: int) -> bool:
+        """Record one epoch's validation loss; return True when training should stop."""
+        if val_loss < self.best_val_loss:
+            self.best_val_loss = val_loss
+            self.best_epoch = epoch
+            self.patience_counter = 0
+            self.best_state = {
+                k: v.detach().cpu().clone() for k, v in model.state_dict().items()
+            }
+        else:
+            self.patience_counter += 1
+            if self.patience_counter >= self.patience:
+                self.stopped = True
+        return self.stopped
+
+    def restore_best(self, model: nn.Module) -> None:
+        if self.best_state is not None:
+            model.load_state_dict(self.best_state)
+
+    def state_dict(self) -> Dict[str, Any]:
+        return {
+            "best_val_loss": self.best_val_loss,
+            "best_epoch": self.best_epoch,
+            "patience_counter": self.patience_counter,
+            "stopped": self.stopped,
+            "best_state": self.best_state,
+        }
+
+    def load_state_dict(self, state: Dict[str, Any]) -> None:
+        self.best_val_loss = state["best_val_loss"]
+        self.best_epoch = state["best_epoch"]
+        self.patience_counter = state["patience_counter"]
+        self.stopped = state["stopped"]
+        self.best_state = state["best_state"]
+
+
+def _record_stopping(history: Dict[str, Any], stopper: _EarlyStopping) -> None:
+    """Note which epoch's weights are saved and whether training stopped early."""
+    history["epochs_run"] = len(history["train_loss"])
+    history["best_epoch"] = stopper.best_epoch or history["epochs_run"]
+    history["best_val_loss"] = (
+        stopper.best_val_loss if stopper.best_state is not None else None
+    )
+    history["stopped_early"] = stopper.stopped
+
+
+def _plateau_scheduler(
+    optimizer: optim.Optimizer,
+    factor: float,
+    patience: int,
+) -> optim.lr_scheduler.ReduceLROnPlateau:
+    return optim.lr_scheduler.ReduceLROnPlateau(
+        optimizer, mode="min", factor=factor, patience=patience,
+    )
+
+
+def _encoder_batch_loss(
+    model: _FeatureEncoder,
+    batch: Tuple[torch.Tensor, torch.Tensor, torch.Tensor, torch.Tensor],
+    emotion_loss_fn: nn.Module,
+    outcome_loss_fn: nn.Module,
+    device: torch.device,
+    precision: str = "fp32",
+    forward: Optional[Callable[..., Dict[str, torch.Tensor]]] = None,
+) -> Tuple[torch.Tensor, torch.Tensor, torch.Tensor]:
+    """Forward a padded batch; return (loss, outcome_logits, outcome_labels).
+
+    *forward* replaces ``model.forward_batch`` (e.g. a compiled version).
+    """
+    feats, emo_labels, mask, outcomes = (t.to(device) for t in batch)
+    with autocast(precision, device):
+        out = (forward or model.forward_batch)(feats, mask)
+    # Losses in fp32 regardless of the forward precision
+    emotion_logits = out["emotion_logits"].float()
+    outcome_logits = out["outcome_logits"].float()
+    # Emotion loss: per real turn
+    loss_emo = emotion_loss_fn(emotion_logits[mask], emo_labels[mask])
+    # Outcome loss: one prediction per conversation
+    loss_out = outcome_loss_fn(outcome_logits, outcomes)
+    return loss_emo + loss_out, outcome_logits, outcomes
+
+
+def _split_indices(
+    n: int, config: PipelineConfig, train_first: int = 0,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Seeded train / val / test indices over ``range(n)``.
+
+    The first *train_first* indices always go to the training split; only the
+    rest are shuffled and divided by the ``DataConfig`` fractions.
+    """
+    np.random.seed(config.data.random_seed)
+    rest = train_first + np.random.permutation(n - train_first)
+    val_split = int(len(rest) * (1 - config.data.val_size - config.data.test_size))
+    test_split = int(len(rest) * (1 - config.data.test_size))
+    train = np.concatenate([np.arange(train_first), rest[:val_split]])
+    return train, rest[val_split:test_split], rest[test_split:]
 
 
 def train_encoder(
@@ -192,8 +576,21 @@ def train_encoder(
     checkpoint_dir: str = "checkpoints",
     epochs: Optional[int] = None,
     verbose: bool = True,
+    resume: bool = False,
+    dataset: Optional[_ConversationLevelDataset] = None,
+    init_checkpoint: Optional[str] = None,
+    train_first: int = 0,
 ) -> Dict[str, Any]:
+    """Train the feature encoder.
+
+    *dataset* may supply a prebuilt ``_ConversationLevelDataset`` over
+    *records* (e.g. a memory-mapped feature store) instead of building one.
+    *init_checkpoint* warm-starts from saved encoder weights.  The first
+    *train_first* records are always trained on; validation and test come
+    from the rest.
+    """
     set_seed(config.data.random_seed)
+    verbose = verbose and is_main_process()
     device = torch.device(config.device)
     if records is None:
         records = process_dataset(config)
@@ -201,35 +598,35 @@ def train_encoder(
     lr = config.encoder.learning_rate
 
     # Train / val / test split
-    np.random.seed(config.data.random_seed)
     n = len(records)
-    indices = np.random.permutation(n)
-    val_split = int(n * (1 - config.data.val_size - config.data.test_size))
-    test_split = int(n * (1 - config.data.test_size))
-    train_records = [records[i] for i in indices[:val_split]]
-    val_records = [records[i] for i in indices[val_split:test_split]]
-    test_records = [records[i] for i in indices[test_split:]]
+    train_idx, val_idx, test_idx = _split_indices(n, config, train_first)
+    train_records = [records[i] for i in train_idx]
+    val_records = [records[i] for i in val_idx]
+    test_records = [records[i] for i in test_idx]
 
     if verbose:
         print(f"  Data split: {len(train_records)} train / "
               f"{len(val_records)} val / {len(test_records)} test "
               f"(total {n})")
 
-    # Conversation-level datasets for conversation-level outcome prediction
-    train_conv_ds = _ConversationLevelDataset(train_records)
-    val_conv_ds = _ConversationLevelDataset(val_records)
+    # Conversation-level datasets for conversation-level outcome prediction,
+    # built once over all records and split into views
+    conv_ds = dataset if dataset is not None else _ConversationLevelDataset(
+        records, config.data.max_turns,
+    )
+    train_conv_ds = conv_ds.subset(train_idx)
+    val_conv_ds = conv_ds.subset(val_idx)
+    test_conv_ds = conv_ds.subset(test_idx)
 
     # Compute class weights for balanced training
-    outcome_counts = {}
-    for rec in train_records:
-        oid = rec.get("outcome_id", 0)
-        outcome_counts[oid] = outcome_counts.get(oid, 0) + 1
-    total_samples = sum(outcome_counts.values())
     n_classes = config.encoder.num_outcome_classes
+    train_outcomes = conv_ds.outcomes[train_idx]
+    counts = np.bincount(train_outcomes, minlength=n_classes)[:n_classes]
     class_weights = torch.ones(n_classes, dtype=torch.float32)
-    for cls_id, count in outcome_counts.items():
-        if cls_id < n_classes:
-            class_weights[cls_id] = total_samples / (n_classes * max(count, 1))
+    present = counts > 0
+    class_weights[torch.from_numpy(present)] = torch.from_numpy(
+        len(train_outcomes) / (n_classes * counts[present])
+    ).float()
     class_weights = class_weights.to(device)
 
     model = _FeatureEncoder(
@@ -237,68 +634,102 @@ def train_encoder(
         hidden_dim=64,
         num_emotion_classes=config.encoder.num_emotion_classes,
         num_outcome_classes=config.encoder.num_outcome_classes,
+        dropout=config.encoder.dropout,
     ).to(device)
+    if init_checkpoint:
+        _load_encoder_ckpt(model, init_checkpoint, device=str(device))
+    broadcast_parameters(model)
+    forward = compile_encoder_batch(model, config.compile_models)
     optimizer = optim.Adam(model.parameters(), lr=lr)
     emotion_loss_fn = nn.CrossEntropyLoss()
     outcome_loss_fn = nn.CrossEntropyLoss(weight=class_weights)
 
-    history: Dict[str, list] = {"train_loss": [], "val_loss": [], "val_accuracy": []}
+    scheduler = _plateau_scheduler(
+        optimizer, config.encoder.lr_factor, config.encoder.lr_patience,
+    )
+    stopper = _EarlyStopping(config.encoder.early_stopping_patience)
+
+    history = _new_history()
+
+    batch_size = config.encoder.batch_size
+    shuffle_gen = torch.Generator().manual_seed(config.data.random_seed)
+    # Per-rank shards under data-parallel training; None otherwise
+    train_sampler = shard_sampler(train_conv_ds, True, config.data.random_seed)
+    val_sampler = shard_sampler(val_conv_ds, False, config.data.random_seed)
+    train_loader = _make_loader(
+        train_conv_ds, batch_size, _collate_conversations, device, config.data, shuffle_gen,
+        train_sampler,
+    )
+    val_loader = _make_loader(
+        val_conv_ds, batch_size, _collate_conversations, device, config.data,
+        sampler=val_sampler,
+    )
 
-    best_val_loss = float("inf")
-    patience = 5
-    patience_counter = 0
-
-    for epoch in range(n_epochs):
+    paths = default_paths(checkpoint_dir)
+    start_epoch = 0
+    if resume and os.path.exists(paths["encoder_state"]):
+        state = _load_resume_state(
+            paths["encoder_state"], model, optimizer, shuffle_gen, scheduler, stopper,
+        )
+        start_epoch = state["epoch"]
+        history = {**_new_history(), **state["history"]}
+        if verbose:
+            print(f"  Resuming encoder training after epoch {start_epoch}")
+
+    for epoch in range(start_epoch, n_epochs):
+        if stopper.stopped:
+            break
+        epoch_start = time.perf_counter()
+        if train_sampler is not None:
+            train_sampler.set_epoch(epoch)
         model.train()
         epoch_loss = 0.0
         n_convs = 0
 
-        # Train conversation by conversation for conversation-level outcome
-        for conv_feats, conv_emo_labels, outcome_id in train_conv_ds:
-            conv_feats = conv_feats.to(device)
-            conv_emo_labels = conv_emo_labels.to(device)
-            outcome_label = torch.tensor([outcome_id], dtype=torch.long, device=device)
-
+        # Mini-batches of padded conversations for conversation-level outcome
+        timer = _EpochTimer()
+        for batch in train_loader:
+            timer.data_ready()
             optimizer.zero_grad()
-            out = model.forward_conversation(conv_feats)
-
-            # Emotion loss: per-turn
-            loss_emo = emotion_loss_fn(out["emotion_logits"], conv_emo_labels)
-            # Outcome loss: conversation-level (single prediction)
-            loss_out = outcome_loss_fn(out["outcome_logits"], outcome_label)
-            loss = loss_emo + loss_out
+            loss, _, outcomes = _encoder_batch_loss(
+                model, batch, emotion_loss_fn, outcome_loss_fn, device, config.precision,
+                forward,
+            )
+            timer.forward_done()
             loss.backward()
+            average_gradients(model)
+            timer.backward_done()
             # Gradient clipping for training stability
             torch.nn.utils.clip_grad_norm_(model.parameters(), max_norm=1.0)
             optimizer.step()
-            epoch_loss += loss.item()
-            n_convs += 1
+            epoch_loss += loss.item() * len(outcomes)
+            n_convs += len(outcomes)
+            timer.step_done()
 
+        epoch_loss, n_convs = all_reduce_sum(epoch_loss, n_convs)
         avg_train_loss = epoch_loss / max(n_convs, 1)
         history["train_loss"].append(avg_train_loss)
+        history["learning_rate"].append(optimizer.param_groups[0]["lr"])
+        timer.record(history, time.perf_counter() - epoch_start, n_convs)
 
         # Validation (conversation-level)
         model.eval()
         val_loss = 0.0
         correct = 0
         total = 0
-        n_val = 0
         with torch.no_grad():
-            for conv_feats, conv_emo_labels, outcome_id in val_conv_ds:
-                conv_feats = conv_feats.to(device)
-                conv_emo_labels = conv_emo_labels.to(device)
-                outcome_label = torch.tensor([outcome_id], dtype=torch.long, device=device)
-
-                out = model.forward_conversation(conv_feats)
-                loss_emo = emotion_loss_fn(out["emotion_logits"], conv_emo_labels)
-                loss_out = outcome_loss_fn(out["outcome_logits"], outcome_label)
-                val_loss += (loss_emo + loss_out).item()
-                pred = out["outcome_logits"].argmax(dim=1)
-                correct += (pred == outcome_label).sum().item()
-                total += 1
-                n_val += 1
-
-        avg_val_loss = val_loss / max(n_val, 1)
+            for batch in val_loader:
+                loss, outcome_logits, outcomes = _encoder_batch_loss(
+                    model, batch, emotion_loss_fn, outcome_loss_fn, device, config.precision,
+                    forward,
+                )
+                val_loss += loss.item() * len(outcomes)
+                pred = outcome_logits.argmax(dim=1)
+                correct += (pred == outcomes).sum().item()
+                total += len(outcomes)
+
+        val_loss, correct, total = all_reduce_sum(val_loss, correct, total)
+        avg_val_loss = val_loss / max(total, 1)
         val_acc = correct / max(total, 1)
         history["val_loss"].append(avg_val_loss)
         history["val_accuracy"].append(val_acc)
@@ -308,29 +739,40 @@ def train_encoder(
                 f"  Encoder Epoch {epoch+1}/{n_epochs}  "
                 f"train_loss={avg_train_loss:.4f}  "
                 f"val_loss={avg_val_loss:.4f}  "
-                f"val_acc={val_acc:.4f}"
+                f"val_acc={val_acc:.4f}  "
+                f"time={history['epoch_time'][-1]:.2f}s "
+                f"(data {history['epoch_data_time'][-1]:.2f}s)  "
+                f"{history['samples_per_sec'][-1]:.0f} samples/s"
             )
 
-        # Early stopping
-        if avg_val_loss < best_val_loss:
-            best_val_loss = avg_val_loss
-            patience_counter = 0
-        else:
-            patience_counter += 1
-            if patience_counter >= patience:
-                if verbose:
-                    print(f"  Early stopping at epoch {epoch+1}")
-                break
+        # LR schedule and early stopping on validation loss; with no
+        # validation split the last epoch's weights are kept
+        if total:
+            scheduler.step(avg_val_loss)
+            if stopper.step(avg_val_loss, model, epoch + 1) and verbose:
+                print(f"  Early stopping at epoch {epoch+1} "
+                      f"(best epoch {stopper.best_epoch})")
+
+        if is_main_process() and ((epoch + 1) % config.training.checkpoint_every == 0
+                                  or stopper.stopped or epoch + 1 == n_epochs):
+            _save_resume_state(
+                paths["encoder_state"], model, optimizer, epoch + 1, history,
+                shuffle_gen, scheduler, stopper,
+            )
 
-    # Save checkpoint
+    # Save the best-validation weights rather than the last epoch's
+    stopper.restore_best(model)
+    _record_stopping(history, stopper)
     model_cpu = model.cpu()
-    paths = default_paths(checkpoint_dir)
-    save_encoder(model_cpu, paths["encoder"], metadata={
-        "epochs": n_epochs,
-        "final_train_loss": history["train_loss"][-1] if history["train_loss"] else None,
-        "final_val_accuracy": history["val_accuracy"][-1] if history["val_accuracy"] else None,
-        "device": config.device,
-    })
+    if is_main_process():
+        save_encoder(model_cpu, paths["encoder"], metadata={
+            "epochs": history["epochs_run"],
+            "best_epoch": history["best_epoch"],
+            "best_val_loss": history["best_val_loss"],
+            "final_train_loss": history["train_loss"][-1] if history["train_loss"] else None,
+            "final_val_accuracy": history["val_accuracy"][-1] if history["val_accuracy"] else None,
+            "device": config.device,
+        })
     if verbose:
         print(f"  Encoder saved to {paths['encoder']}")
     history["split"] = {
@@ -341,6 +783,7 @@ def train_encoder(
     history["_test_state"] = {
         "model": model_cpu,
         "test_records": test_records,
+        "test_dataset": test_conv_ds,
     }
     return history
 
@@ -350,26 +793,26 @@ def _evaluate_encoder_test(
     emotion_loss_fn: nn.Module,
     outcome_loss_fn: nn.Module,
     device: torch.device,
+    batch_size: int = 16,
+    test_ds: Optional[_ConversationLevelDataset] = None,
+    precision: str = "fp32",
 ) -> Dict[str, float]:
     """Evaluate the encoder on a held-out test set using conversation-level predictions."""
     model.eval()
     test_loss = 0.0
     correct = 0
     total = 0
-    test_ds = _ConversationLevelDataset(test_records)
+    if test_ds is None:
+        test_ds = _ConversationLevelDataset(test_records)
     with torch.no_grad():
-        for conv_feats, conv_emo_labels, outcome_id in test_ds:
-            conv_feats = conv_feats.to(device)
-            conv_emo_labels = conv_emo_labels.to(device)
-            outcome_label = torch.tensor([outcome_id], dtype=torch.long, device=device)
-
-            out = model.forward_conversation(conv_feats)
-            loss_emo = emotion_loss_fn(out["emotion_logits"], conv_emo_labels)
-            loss_out = outcome_loss_fn(out["outcome_logits"], outcome_label)
-            test_loss += (loss_emo + loss_out).item()
-            pred = out["outcome_logits"].argmax(dim=1)
-            correct += (pred == outcome_label).sum().item()
-            total += 1
+        for batch in _make_loader(test_ds, batch_size, _collate_conversations, device):
+            loss, outcome_logits, outcomes = _encoder_batch_loss(
+                model, batch, emotion_loss_fn, outcome_loss_fn, device, precision,
+            )
+            test_loss += loss.item() * len(outcomes)
+            pred = outcome_logits.argmax(dim=1)
+            correct += (pred == outcomes).sum().item()
+            total += len(outcomes)
     return {
         "test_loss": test_loss / max(total, 1),
         "test_accuracy": correct / max(total, 1),
@@ -377,30 +820,67 @@ def _evaluate_encoder_test(
 
 def _build_turn_embeddings(turn_features: List[dict], embed_dim: int = 32) -> torch.Tensor:
     """Build feature-based turn embeddings (same as CausalAnalysisPipeline._encode_turns)."""
-    embeddings = []
-    for tf in turn_features:
-        vec = [
-            tf.get("is_agent", 0),
-            tf.get("turn_position", 0.0),
-            tf.get("word_count", 0) / 100.0,
-            tf.get("question_marks", 0) / 5.0,
-            tf.get("exclamation_marks", 0) / 5.0,
-            tf.get("emotion_anger", 0.0),
-            tf.get("emotion_frustration", 0.0),
-            tf.get("emotion_satisfaction", 0.0),
-            tf.get("emotion_confusion", 0.0),
-            tf.get("emotion_urgency", 0.0),
-            tf.get("discourse_complaint", 0.0),
-            tf.get("discourse_denial", 0.0),
-            tf.get("discourse_delay", 0.0),
-            tf.get("discourse_apology", 0.0),
-            tf.get("discourse_clarification", 0.0),
-            tf.get("discourse_promise", 0.0),
-            tf.get("discourse_escalation_request", 0.0),
-        ]
-        vec.extend([0.0] * (embed_dim - len(vec)))
-        embeddings.append(vec[:embed_dim])
-    return torch.tensor(embeddings, dtype=torch.float32)
+    return torch.from_numpy(turn_embedding_matrix(turn_features, embed_dim))
+
+
+def _discourse_graphs(
+    records: List[dict],
+    config: PipelineConfig,
+    checkpoint_dir: str,
+    embed_dim: int = 32,
+) -> Tuple[List[dict], List[int]]:
+    """Graphs (with at least one edge) for every record with two or more turns,
+    and the index in *records* of each graph's conversation.
+
+    Edges come from the persisted graph store when
+    ``DiscourseConfig.use_graph_cache`` is set, so keyword edge detection runs
+    once per dataset and lexicon rather than once per training run; otherwise
+    an in-memory store is built for this call.
+    """
+    discourse_cfg = config.discourse
+    connectivity = {"window": discourse_cfg.edge_window, "speaker_edges": discourse_cfg.speaker_edges}
+    graphs: List[dict] = []
+    sources: List[int] = []
+    if discourse_cfg.use_graph_cache:
+        cache_dir = discourse_cfg.graph_cache_dir or default_paths(checkpoint_dir)["graph_cache"]
+        store = load_or_build_graph_store(records, discourse_cfg.edge_types, cache_dir, **connectivity)
+    else:
+        # Same CSR layout in memory, so edges are still typed in one batched pass
+        store = GraphStore.build(records, discourse_cfg.edge_types, **connectivity)
+    feats, offsets = conversation_feature_matrix(records)
+    node_feats = torch.from_numpy(pad_feature_matrix(feats, embed_dim))
+    for i in range(len(store)):
+        if store.num_nodes(i) < 2:
+            continue
+        g = store.graph(i, node_feats[offsets[i]:offsets[i + 1]])
+        if g["edge_index"].shape[1] > 0:
+            graphs.append(g)
+            sources.append(i)
+    return graphs, sources
+
+
+def _gnn_batch_loss(
+    model: DiscourseGNN,
+    batch: dict,
+    loss_fn: nn.Module,
+    device: torch.device,
+    precision: str = "fp32",
+    forward: Optional[Callable[..., Dict[str, torch.Tensor]]] = None,
+) -> Tuple[torch.Tensor, torch.Tensor, torch.Tensor]:
+    """Forward a batched graph; return (loss, edge_logits, edge_labels).
+
+    *forward* replaces ``model.forward`` (e.g. a compiled version).
+    """
+    node_feat = batch["node_features"].to(device)
+    edge_idx = batch["edge_index"].to(device)
+    edge_attr = batch["edge_attr"].to(device)
+    with autocast(precision, device):
+        out = (forward or model)(
+            node_feat, edge_idx, batch["batch"].to(device), batch["num_graphs"],
+        )
+        edge_logits = model.classify_edges(out["node_embeddings"], edge_idx)
+    edge_logits = edge_logits.float()
+    return loss_fn(edge_logits, edge_attr), edge_logits, edge_attr
 
 
 def train_gnn(
@@ -409,9 +889,19 @@ def train_gnn(
     checkpoint_dir: str = "checkpoints",
     epochs: Optional[int] = None,
     verbose: bool = True,
-    device: str = "cpu"
-
+    device: str = "cpu",
+    resume: bool = False,
+    init_checkpoint: Optional[str] = None,
+    train_first: int = 0,
 ) -> Dict[str, Any]:
+    """Train the discourse GNN on edge-type classification.
+
+    *init_checkpoint* warm-starts from saved GNN weights.  Graphs of the first
+    *train_first* records are always trained on; validation and test come
+    from the rest.
+    """
+    set_seed(config.data.random_seed)
+    verbose = verbose and is_main_process()
     if records is None:
         records = process_dataset(config)
         device = torch.device(config.device)
@@ -421,15 +911,7 @@ def train_gnn(
     embed_dim = 32
 
     # Build graph data for all conversations
-    graphs: List[dict] = []
-    for rec in records:
-        tf = rec.get("turn_features", [])
-        if len(tf) < 2:
-            continue
-        turn_emb = _build_turn_embeddings(tf, embed_dim)
-        g = build_discourse_graph(tf, turn_emb, config.discourse.edge_types)
-        if g["edge_index"].shape[1] > 0:
-            graphs.append(g)
+    graphs, sources = _discourse_graphs(records, config, checkpoint_dir, embed_dim)
 
     if not graphs:
         if verbose:
@@ -437,44 +919,91 @@ def train_gnn(
         return {"train_loss": []}
 
     # Train / val / test split
-    np.random.seed(config.data.random_seed)
-    idx = np.random.permutation(len(graphs))
-    val_split = int(len(graphs) * (1 - config.data.val_size - config.data.test_size))
-    test_split = int(len(graphs) * (1 - config.data.test_size))
-    train_graphs = [graphs[i] for i in idx[:val_split]]
-    val_graphs = [graphs[i] for i in idx[val_split:test_split]]
-    test_graphs = [graphs[i] for i in idx[test_split:]]
+    # Graphs keep record order, so those of the first train_first records lead
+    train_idx, val_idx, test_idx = _split_indices(
+        len(graphs), config, int(np.searchsorted(sources, train_first)),
+    )
+    train_graphs = [graphs[i] for i in train_idx]
+    val_graphs = [graphs[i] for i in val_idx]
+    test_graphs = [graphs[i] for i in test_idx]
 
     if verbose:
         print(f"  Data split: {len(train_graphs)} train / "
               f"{len(val_graphs)} val / {len(test_graphs)} test "
               f"(total {len(graphs)} graphs)")
 
-    model = DiscourseGNN(config.discourse, input_dim=embed_dim).to(device)
+    if init_checkpoint:
+        # Fine-tune with the architecture the checkpoint was trained with
+        model = DiscourseGNN(
+            gnn_config_for_checkpoint(config.discourse, init_checkpoint), input_dim=embed_dim,
+        ).to(device)
+        _load_gnn_ckpt(model, init_checkpoint, device=str(device))
+    else:
+        model = DiscourseGNN(config.discourse, input_dim=embed_dim).to(device)
+    broadcast_parameters(model)
+    forward = compile_gnn(model, config.compile_models)
     loss_fn = DiscourseGraphLoss()
     optimizer = optim.Adam(model.parameters(), lr=lr)
+    scheduler = _plateau_scheduler(
+        optimizer, config.discourse.lr_factor, config.discourse.lr_patience,
+    )
+    stopper = _EarlyStopping(config.discourse.early_stopping_patience)
+
+    history = _new_history()
+    batch_size = config.discourse.batch_size
+    shuffle_gen = torch.Generator().manual_seed(config.data.random_seed)
+    train_sampler = shard_sampler(train_graphs, True, config.data.random_seed)
+    val_sampler = shard_sampler(val_graphs, False, config.data.random_seed)
+    train_loader = _make_loader(
+        train_graphs, batch_size, batch_graphs, device, config.data, shuffle_gen,
+        train_sampler,
+    )
+    val_loader = _make_loader(
+        val_graphs, batch_size, batch_graphs, device, config.data, sampler=val_sampler,
+    )
 
-    history: Dict[str, list] = {"train_loss": [], "val_loss": [], "val_accuracy": []}
-
-    for epoch in range(n_epochs):
+    paths = default_paths(checkpoint_dir)
+    start_epoch = 0
+    if resume and os.path.exists(paths["gnn_state"]):
+        state = _load_resume_state(
+            paths["gnn_state"], model, optimizer, shuffle_gen, scheduler, stopper,
+        )
+        start_epoch = state["epoch"]
+        history = {**_new_history(), **state["history"]}
+        if verbose:
+            print(f"  Resuming GNN training after epoch {start_epoch}")
+
+    for epoch in range(start_epoch, n_epochs):
+        if stopper.stopped:
+            break
+        epoch_start = time.perf_counter()
+        if train_sampler is not None:
+            train_sampler.set_epoch(epoch)
         model.train()
         epoch_loss = 0.0
-        n_batches = 0
-        for g in train_graphs:
-            node_feat = g["node_features"].to(device)
-            edge_idx = g["edge_index"].to(device)
-            edge_attr = g["edge_attr"].to(device)
+        n_graphs = 0
+        # Disjoint-union mini-batches of graphs
+        timer = _EpochTimer()
+        for batch in train_loader:
+            timer.data_ready()
             optimizer.zero_grad()
-            out = model(node_feat, edge_idx)
-            edge_logits = model.classify_edges(out["node_embeddings"], edge_idx)
-            loss = loss_fn(edge_logits, edge_attr)
+            loss, _, _ = _gnn_batch_loss(
+                model, batch, loss_fn, device, config.precision, forward,
+            )
+            timer.forward_done()
             loss.backward()
+            average_gradients(model)
+            timer.backward_done()
             optimizer.step()
-            epoch_loss += loss.item()
-            n_batches += 1
+            epoch_loss += loss.item() * batch["num_graphs"]
+            n_graphs += batch["num_graphs"]
+            timer.step_done()
 
-        avg_train = epoch_loss / max(n_batches, 1)
+        epoch_loss, n_graphs = all_reduce_sum(epoch_loss, n_graphs)
+        avg_train = epoch_loss / max(n_graphs, 1)
         history["train_loss"].append(avg_train)
+        history["learning_rate"].append(optimizer.param_groups[0]["lr"])
+        timer.record(history, time.perf_counter() - epoch_start, n_graphs)
 
         # Validation
         model.eval()
@@ -483,19 +1012,17 @@ def train_gnn(
         total = 0
         n_val = 0
         with torch.no_grad():
-            for g in val_graphs:
-                node_feat = g["node_features"].to(device)
-                edge_idx = g["edge_index"].to(device)
-                edge_attr = g["edge_attr"].to(device)
-                out = model(node_feat, edge_idx)
-                edge_logits = model.classify_edges(out["node_embeddings"], edge_idx)
-                loss = loss_fn(edge_logits, edge_attr)
-                val_loss += loss.item()
+            for batch in val_loader:
+                loss, edge_logits, edge_attr = _gnn_batch_loss(
+                    model, batch, loss_fn, device, config.precision, forward,
+                )
+                val_loss += loss.item() * batch["num_graphs"]
                 preds = edge_logits.argmax(dim=1)
                 correct += (preds == edge_attr).sum().item()
                 total += len(edge_attr)
-                n_val += 1
+                n_val += batch["num_graphs"]
 
+        val_loss, correct, total, n_val = all_reduce_sum(val_loss, correct, total, n_val)
         avg_val = val_loss / max(n_val, 1)
         val_acc = correct / max(total, 1)
         history["val_loss"].append(avg_val)
@@ -506,18 +1033,41 @@ def train_gnn(
                 f"  GNN Epoch {epoch+1}/{n_epochs}  "
                 f"train_loss={avg_train:.4f}  "
                 f"val_loss={avg_val:.4f}  "
-                f"val_acc={val_acc:.4f}"
+                f"val_acc={val_acc:.4f}  "
+                f"time={history['epoch_time'][-1]:.2f}s "
+                f"(data {history['epoch_data_time'][-1]:.2f}s)  "
+                f"{history['samples_per_sec'][-1]:.0f} samples/s"
             )
 
-    # Save
+        # LR schedule and early stopping on validation loss; with no
+        # validation split the last epoch's weights are kept
+        if n_val:
+            scheduler.step(avg_val)
+            if stopper.step(avg_val, model, epoch + 1) and verbose:
+                print(f"  Early stopping at epoch {epoch+1} "
+                      f"(best epoch {stopper.best_epoch})")
+
+        if is_main_process() and ((epoch + 1) % config.training.checkpoint_every == 0
+                                  or stopper.stopped or epoch + 1 == n_epochs):
+            _save_resume_state(
+                paths["gnn_state"], model, optimizer, epoch + 1, history,
+                shuffle_gen, scheduler, stopper,
+            )
+
+    # Save the best-validation weights rather than the last epoch's
+    stopper.restore_best(model)
+    _record_stopping(history, stopper)
     model_cpu = model.cpu()
-    paths = default_paths(checkpoint_dir)
-    save_gnn(model_cpu, paths["gnn"], metadata={
-        "epochs": n_epochs,
-        "final_train_loss": history["train_loss"][-1] if history["train_loss"] else None,
-        "final_val_accuracy": history["val_accuracy"][-1] if history["val_accuracy"] else None,
-        "device": config.device,
-    })
+    if is_main_process():
+        # save_gnn records the architecture from model.config
+        save_gnn(model_cpu, paths["gnn"], metadata={
+            "epochs": history["epochs_run"],
+            "best_epoch": history["best_epoch"],
+            "best_val_loss": history["best_val_loss"],
+            "final_train_loss": history["train_loss"][-1] if history["train_loss"] else None,
+            "final_val_accuracy": history["val_accuracy"][-1] if history["val_accuracy"] else None,
+            "device": config.device,
+        })
     if verbose:
         print(f"  GNN saved to {paths['gnn']}")
 
@@ -538,33 +1088,97 @@ def _evaluate_gnn_test(
     test_graphs: List[dict],
     loss_fn: DiscourseGraphLoss,
     device: torch.device,
+    batch_size: int = 32,
+    precision: str = "fp32",
 ) -> Dict[str, float]:
     """Evaluate the GNN on a held-out test set and return loss/accuracy."""
     model.eval()
     test_loss = 0.0
     correct = 0
     total = 0
-    n_batches = 0
+    n_graphs = 0
     with torch.no_grad():
-        for g in test_graphs:
-            node_feat = g["node_features"].to(device)
-            edge_idx = g["edge_index"].to(device)
-            edge_attr = g["edge_attr"].to(device)
-            out = model(node_feat, edge_idx)
-            edge_logits = model.classify_edges(out["node_embeddings"], edge_idx)
-            loss = loss_fn(edge_logits, edge_attr)
-            test_loss += loss.item()
+        for batch in _make_loader(test_graphs, batch_size, batch_graphs, device):
+            loss, edge_logits, edge_attr = _gnn_batch_loss(
+                model, batch, loss_fn, device, precision,
+            )
+            test_loss += loss.item() * batch["num_graphs"]
             preds = edge_logits.argmax(dim=1)
             correct += (preds == edge_attr).sum().item()
             total += len(edge_attr)
-            n_batches += 1
+            n_graphs += batch["num_graphs"]
     return {
-        "test_loss": test_loss / max(n_batches, 1),
+        "test_loss": test_loss / max(n_graphs, 1),
         "test_accuracy": correct / max(total, 1),
     }
 
 
 
+def _run_stage(fn, config: PipelineConfig, *args: Any, **kwargs: Any) -> Dict[str, Any]:
+    """Run one training stage in-process or across ``world_size`` local ranks."""
+    world_size = config.training.world_size
+    if world_size > 1:
+        return run_data_parallel(
+            fn, world_size, config, *args,
+            master_port=config.training.master_port, **kwargs,
+        )
+    return fn(config, *args, **kwargs)
+
+
+def _stage_process(
+    fn,
+    config: PipelineConfig,
+    num_threads: int,
+    result_path: str,
+    args: tuple,
+    kwargs: dict,
+) -> None:
+    torch.set_num_threads(num_threads)
+    torch.save(_run_stage(fn, config, *args, **kwargs), result_path)
+
+
+def _run_stages_concurrently(
+    stages: List[Tuple[Any, tuple, dict]],
+    config: PipelineConfig,
+) -> List[Dict[str, Any]]:
+    """Run independent ``(fn, args, kwargs)`` stages in parallel processes.
+
+    Each stage gets an even share of the intra-op thread budget so the
+    stages do not oversubscribe the cores.  Returns the stage histories in
+    the order given.
+    """
+    ctx = torch.multiprocessing.get_context("spawn")
+    num_threads = max(1, torch.get_num_threads() // len(stages))
+    with tempfile.TemporaryDirectory() as tmp:
+        procs = []
+        for i, (fn, args, kwargs) in enumerate(stages):
+            result_path = os.path.join(tmp, f"stage{i}.pt")
+            proc = ctx.Process(
+                target=_stage_process,
+                args=(fn, config, num_threads, result_path, args, kwargs),
+            )
+            proc.start()
+            procs.append((fn, proc, result_path))
+        for _, proc, _ in procs:
+            proc.join()
+        failed = [fn.__name__ for fn, proc, _ in procs if proc.exitcode != 0]
+        if failed:
+            raise RuntimeError(f"Training stage(s) failed: {', '.join(failed)}")
+        return [torch.load(path, weights_only=False) for _, _, path in procs]
+
+
+def _remove_stale_exports(checkpoint_dir: str, stages, verbose: bool = False) -> None:
+    """Delete the exported graphs of *stages*, whose checkpoints were just replaced."""
+    paths = default_paths(checkpoint_dir)
+    for name in stages:
+        stale = paths[f"{name}_export"]
+        if os.path.exists(stale):
+            os.remove(stale)
+            logger.info("Removed stale exported graph %s", stale)
+            if verbose:
+                print(f"  Removed stale exported graph {stale} (re-run with --export)")
+
+
 def train_all(
     config: Optional[PipelineConfig] = None,
     checkpoint_dir: str = "checkpoints",
@@ -576,6 +1190,7 @@ def train_all(
     skip_gnn: bool = False,
     resume: bool = False,
     skip_tests: bool = False,
+    export: bool = False,
 ) -> Dict[str, Any]:
     if config is None:
         config = PipelineConfig()
@@ -586,6 +1201,10 @@ def train_all(
         print("=" * 60)
         print("TRAINING PIPELINE")
         print(f"Device: {config.device}")
+        if config.training.world_size > 1:
+            print(f"Data-parallel ranks: {config.training.world_size} (gloo)")
+        if config.training.concurrent_stages:
+            print("Encoder and GNN stages run concurrently")
         print("=" * 60)
 
     paths = default_paths(checkpoint_dir)
@@ -598,6 +1217,7 @@ def train_all(
         print(f"  Loaded {len(records)} conversation records.")
 
     # Stage 1: Encoder
+    stages: Dict[str, Tuple[Any, tuple, dict]] = {}
     enc_hist: Dict[str, Any] = {"train_loss": [], "val_loss": [], "val_accuracy": []}
     if skip_encoder:
         if verbose:
@@ -609,11 +1229,9 @@ def train_all(
             print("  Use --force-train to retrain from scratch.")
         logger.info("Encoder checkpoint exists; skipping training.")
     else:
-        if verbose:
-            print("\n[2/4] Training feature encoder...")
-        enc_hist = train_encoder(
-            config, records, checkpoint_dir,
-            epochs=encoder_epochs, verbose=verbose,
+        stages["encoder"] = (
+            train_encoder, (records, checkpoint_dir),
+            {"epochs": encoder_epochs, "verbose": verbose, "resume": resume},
         )
 
     # Stage 2: GNN
@@ -628,12 +1246,25 @@ def train_all(
             print("  Use --force-train to retrain from scratch.")
         logger.info("GNN checkpoint exists; skipping training.")
     else:
-        if verbose:
-            print("\n[3/4] Training discourse GNN...")
-        gnn_hist = train_gnn(
-            config, records, checkpoint_dir,
-            epochs=gnn_epochs, verbose=verbose,
+        stages["gnn"] = (
+            train_gnn, (records, checkpoint_dir),
+            {"epochs": gnn_epochs, "verbose": verbose, "resume": resume},
         )
+
+    # The stages share no state, so they can train side by side
+    if config.training.concurrent_stages and len(stages) > 1:
+        if verbose:
+            print("\n[2-3/4] Training feature encoder and discourse GNN concurrently...")
+        histories = dict(zip(stages, _run_stages_concurrently(list(stages.values()), config)))
+    else:
+        histories = {}
+        for name, (fn, args, kwargs) in stages.items():
+            if verbose:
+                print("\n[2/4] Training feature encoder..." if name == "encoder"
+                      else "\n[3/4] Training discourse GNN...")
+            histories[name] = _run_stage(fn, config, *args, **kwargs)
+    enc_hist = histories.get("encoder", enc_hist)
+    gnn_hist = histories.get("gnn", gnn_hist)
     device = torch.device(config.device)
 
     if not skip_tests:
@@ -649,6 +1280,9 @@ def train_all(
             enc_test = _evaluate_encoder_test(
                 enc_model, enc_test_state["test_records"],
                 emotion_loss_fn, outcome_loss_fn, device,
+                batch_size=config.encoder.batch_size,
+                test_ds=enc_test_state.get("test_dataset"),
+                precision=config.precision,
             )
             enc_hist["test_loss"] = enc_test["test_loss"]
             enc_hist["test_accuracy"] = enc_test["test_accuracy"]
@@ -662,6 +1296,8 @@ def train_all(
             gnn_loss_fn = DiscourseGraphLoss()
             gnn_test = _evaluate_gnn_test(
                 gnn_model, gnn_test_state["test_graphs"], gnn_loss_fn, device,
+                batch_size=config.discourse.batch_size,
+                precision=config.precision,
             )
             gnn_hist["test_loss"] = gnn_test["test_loss"]
             gnn_hist["test_accuracy"] = gnn_test["test_accuracy"]
@@ -693,10 +1329,150 @@ def train_all(
     }
     paths = default_paths(checkpoint_dir)
     save_training_history(combined, paths["history"])
+    if stages:
+        save_trained_ids((rec.get("transcript_id") for rec in records), paths["trained_ids"])
     if verbose:
         print(f"\n  Training history saved to {paths['history']}")
+
+    if export:
+        exported = export_checkpoints(config, checkpoint_dir)
+        if verbose:
+            for name, path in exported.items():
+                print(f"  Exported {name} inference graph to {path}")
+    else:
+        _remove_stale_exports(checkpoint_dir, stages, verbose)
+
+    if verbose:
         print("\n" + "=" * 60)
         print("TRAINING COMPLETE")
         print("=" * 60)
 
-    return combined
\ No newline at end of file
+    return combined
+
+
+# ── incremental fine-tuning ──────────────────────────────────────────────
+
+_CHECKPOINT_FILES = ("encoder", "gnn")
+
+
+def _next_version(versions_dir: str) -> int:
+    if not os.path.isdir(versions_dir):
+        return 0
+    found = [int(name[1:]) for name in os.listdir(versions_dir) if re.fullmatch(r"v\d+", name)]
+    return max(found, default=-1) + 1
+
+
+def _copy_checkpoints(src_dir: str, dst_dir: str) -> None:
+    """Copy the encoder and GNN checkpoints present in *src_dir*; each copy is atomic."""
+    src, dst = default_paths(src_dir), default_paths(dst_dir)
+    os.makedirs(dst_dir, exist_ok=True)
+    for key in _CHECKPOINT_FILES:
+        if not os.path.exists(src[key]):
+            continue
+        fd, tmp_path = tempfile.mkstemp(dir=dst_dir, suffix=".tmp")
+        os.close(fd)
+        shutil.copyfile(src[key], tmp_path)
+        os.replace(tmp_path, dst[key])
+
+
+def train_incremental(
+    config: Optional[PipelineConfig] = None,
+    checkpoint_dir: str = "checkpoints",
+    new_records: Optional[List[dict]] = None,
+    encoder_epochs: Optional[int] = None,
+    gnn_epochs: Optional[int] = None,
+    verbose: bool = True,
+    skip_encoder: bool = False,
+    skip_gnn: bool = False,
+) -> Dict[str, Any]:
+    """Warm-start the current checkpoints and fine-tune them on new transcripts.
+
+    New records are those missing from ``trained_transcripts.json`` (or
+    *new_records* when given).  They are mixed with a seeded replay sample of
+    ``replay_ratio`` old records per new one to limit forgetting, and both
+    stages train from the current weights at ``incremental_lr_scale`` times
+    their learning rate.  Every new record is trained on; the validation and
+    test splits come from the replay sample only.  The result is written to ``versions/vNNN`` and
+    promoted to ``encoder.pt`` / ``discourse_gnn.pt``; the weights it
+    replaces are archived first as ``versions/v000`` if no versions exist.
+    """
+    if config is None:
+        config = PipelineConfig()
+    paths = default_paths(checkpoint_dir)
+    if not any(os.path.exists(paths[key]) for key in _CHECKPOINT_FILES):
+        raise FileNotFoundError(
+            f"No checkpoints in {checkpoint_dir} to fine-tune; run train_all first"
+        )
+
+    records = process_dataset(config)
+    seen = load_trained_ids(paths["trained_ids"])
+    if new_records is None:
+        new_records = [rec for rec in records if str(rec.get("transcript_id")) not in seen]
+    new_ids = {str(rec.get("transcript_id")) for rec in new_records}
+    old_records = [rec for rec in records if str(rec.get("transcript_id")) not in new_ids]
+    if not new_records:
+        if verbose:
+            print("No new transcripts since the last training run; nothing to fine-tune.")
+        return {"new_records": 0}
+
+    versions_dir = paths["versions"]
+    if _next_version(versions_dir) == 0:
+        _copy_checkpoints(checkpoint_dir, os.path.join(versions_dir, "v000"))
+    version = _next_version(versions_dir)
+    version_dir = os.path.join(versions_dir, f"v{version:03d}")
+
+    rng = np.random.default_rng(config.data.random_seed + version)
+    n_replay = min(len(old_records), int(round(config.training.replay_ratio * len(new_records))))
+    replay = [old_records[i] for i in rng.choice(len(old_records), n_replay, replace=False)]
+    subset = list(new_records) + replay
+
+    ft_config = copy.deepcopy(config)
+    scale = config.training.incremental_lr_scale
+    ft_config.encoder.learning_rate *= scale
+    ft_config.discourse.learning_rate *= scale
+    # The subset changes every run, so a persisted graph store would not be reused
+    ft_config.discourse.use_graph_cache = False
+
+    if verbose:
+        print(f"Fine-tuning version v{version:03d} on {len(new_records)} new + "
+              f"{len(replay)} replayed conversations")
+
+    histories: Dict[str, Any] = {}
+    epochs = config.training.incremental_epochs
+    if not skip_encoder and os.path.exists(paths["encoder"]):
+        histories["encoder_history"] = train_encoder(
+            ft_config, subset, version_dir, epochs=encoder_epochs or epochs,
+            verbose=verbose, init_checkpoint=paths["encoder"], train_first=len(new_records),
+        )
+    if not skip_gnn and os.path.exists(paths["gnn"]):
+        histories["gnn_history"] = train_gnn(
+            ft_config, subset, version_dir, epochs=gnn_epochs or epochs,
+            verbose=verbose, init_checkpoint=paths["gnn"], train_first=len(new_records),
+        )
+    for hist in histories.values():
+        hist.pop("_test_state", None)
+
+    # Stages that were skipped carry the current weights into the version
+    os.makedirs(version_dir, exist_ok=True)
+    version_paths = default_paths(version_dir)
+    for key in _CHECKPOINT_FILES:
+        if os.path.exists(paths[key]) and not os.path.exists(version_paths[key]):
+            shutil.copyfile(paths[key], version_paths[key])
+
+    summary = {
+        "version": version,
+        "new_records": len(new_records),
+        "replay_records": len(replay),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        **histories,
+    }
+    save_training_history(summary, version_paths["history"])
+    _copy_checkpoints(version_dir, checkpoint_dir)
+    save_trained_ids(seen | new_ids, paths["trained_ids"])
+    # Frozen graphs take precedence at inference time, so keep them current
+    if os.path.exists(paths["encoder_export"]) or os.path.exists(paths["gnn_export"]):
+        export_checkpoints(config, checkpoint_dir)
+
+    if verbose:
+        print(f"Promoted v{version:03d} to {checkpoint_dir}")
+    return summary
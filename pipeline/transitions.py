@@ -0,0 +1,229 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .discourse_graph import discourse_edge_arrays
+
+# Metadata axes of every count tensor; slot 0 on each holds the total
+_AXES = ("domain", "intent", "outcome")
+
+
+class TransitionStats:
+    """Corpus-wide counts of discourse edge-type sequences.
+
+    A conversation's *chain* is the edge-type sequence of its adjacent-turn
+    edges (turn ``t -> t + 1``) in the discourse graph.  Counts are kept per
+    (domain, intent, outcome) cell in two kinds of tensors, where index 0 of
+    each metadata axis is the total over that axis:
+
+    * ``follows[d, i, o, k - 1, a, b]`` – chain positions of type *a* with
+      an edge of type *b* among the next *k* edges (``k <= max_lag``)
+    * ``ngrams[n][d, i, o, code]`` – occurrences of each length-*n* run of
+      the chain, *code* being its base-``len(edge_types)`` number
+
+    Adding a conversation touches the eight total/specific combinations of
+    its cell, so every query is a single lookup regardless of corpus size.
+    Conversations are counted once per transcript id.
+    """
+
+    def __init__(self, edge_types: List[str], max_lag: int = 4, max_ngram: int = 3):
+        if max_lag < 1 or max_ngram < 1:
+            raise ValueError(f"max_lag and max_ngram must be >= 1, got {max_lag}, {max_ngram}")
+        self.edge_types = list(edge_types)
+        self.max_lag = max_lag
+        self.max_ngram = max_ngram
+        self._type_index = {et: i for i, et in enumerate(self.edge_types)}
+        # Value -> slot per metadata axis, from 1 (slot 0 is the total)
+        self.vocab: Dict[str, Dict[str, int]] = {axis: {} for axis in _AXES}
+        n_types = len(self.edge_types)
+        self.follows = np.zeros((1, 1, 1, max_lag * n_types * n_types), dtype=np.int64)
+        self.ngrams = {
+            n: np.zeros((1, 1, 1, n_types ** n), dtype=np.int64)
+            for n in range(1, max_ngram + 1)
+        }
+        self.num_conversations = 0
+        self._seen: set = set()
+
+    def __len__(self) -> int:
+        return self.num_conversations
+
+    # ── updates ──────────────────────────────────────────────────────────
+
+    def _cell(self, domain: str, intent: str, outcome: str) -> Tuple[int, int, int]:
+        cell = []
+        for axis, value in zip(_AXES, (domain, intent, outcome)):
+            slots = self.vocab[axis]
+            if value not in slots:
+                slots[value] = len(slots) + 1
+            cell.append(slots[value])
+        self._grow()
+        return tuple(cell)
+
+    def _grow(self) -> None:
+        """Widen the metadata axes to fit the vocabularies, doubling capacity."""
+        shape = self.follows.shape[:3]
+        need = tuple(len(self.vocab[axis]) + 1 for axis in _AXES)
+        if all(n <= s for n, s in zip(need, shape)):
+            return
+        pad = [(0, max(0, max(n, 2 * s) - s) if n > s else 0) for n, s in zip(need, shape)]
+        self.follows = np.pad(self.follows, pad + [(0, 0)])
+        self.ngrams = {n: np.pad(t, pad + [(0, 0)]) for n, t in self.ngrams.items()}
+
+    def add_records(self, records: List[dict]) -> None:
+        """Count the discourse chains of featurised *records* not seen before."""
+        fresh = []
+        for rec in records:
+            tid = rec.get("transcript_id")
+            if tid is not None:
+                if str(tid) in self._seen:
+                    continue
+                self._seen.add(str(tid))
+            fresh.append(rec)
+        if not fresh:
+            return
+        # Window 1 yields exactly the adjacent-turn edges, typed as in the full graph
+        _, _, chains, _ = discourse_edge_arrays(
+            [rec.get("turn_features", []) for rec in fresh], self.edge_types, window=1,
+        )
+        lengths = np.array(
+            [max(len(rec.get("turn_features", [])) - 1, 0) for rec in fresh], dtype=np.int64,
+        )
+        cells = np.array([
+            self._cell(
+                str(rec.get("domain", "Unknown")),
+                str(rec.get("intent", "Unknown")),
+                str(rec.get("outcome", "Unknown")),
+            )
+            for rec in fresh
+        ], dtype=np.int64)
+        self._add_chains(chains, lengths, cells)
+
+    def add_graph(
+        self,
+        graph: dict,
+        domain: str = "Unknown",
+        intent: str = "Unknown",
+        outcome: str = "Unknown",
+        transcript_id: Optional[str] = None,
+    ) -> None:
+        """Count the chain of one ``build_discourse_graph`` output."""
+        if transcript_id is not None:
+            if str(transcript_id) in self._seen:
+                return
+            self._seen.add(str(transcript_id))
+        src, tgt = graph["edge_index"].cpu().numpy()
+        adjacent = np.nonzero(tgt == src + 1)[0]
+        adjacent = adjacent[np.argsort(src[adjacent], kind="stable")]
+        chain = graph["edge_attr"].cpu().numpy()[adjacent].astype(np.int64)
+        cells = np.array([self._cell(domain, intent, outcome)], dtype=np.int64)
+        self._add_chains(chain, np.array([len(chain)], dtype=np.int64), cells)
+
+    def _add_chains(self, chains: np.ndarray, lengths: np.ndarray, cells: np.ndarray) -> None:
+        n_types = len(self.edge_types)
+        conv = np.repeat(np.arange(len(lengths)), lengths)
+        pos = np.arange(len(chains)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        remaining = lengths[conv] - pos - 1  # chain edges after each position
+
+        for n, table in self.ngrams.items():
+            starts = np.nonzero(remaining >= n - 1)[0]
+            code = np.zeros(len(starts), dtype=np.int64)
+            for j in range(n):
+                code = code * n_types + chains[starts + j]
+            self._count(table, cells[conv[starts]], code)
+
+        # (position, follower type, lag) for every follower within max_lag
+        positions, followers, lags = [], [], []
+        for lag in range(1, self.max_lag + 1):
+            at = np.nonzero(remaining >= lag)[0]
+            positions.append(at)
+            followers.append(chains[at + lag])
+            lags.append(np.full(len(at), lag, dtype=np.int64))
+        positions, followers, lags = (np.concatenate(a) for a in (positions, followers, lags))
+        # Keep each follower type's nearest lag (np.unique's index is the first
+        # occurrence, and lags were appended in increasing order)
+        _, first = np.unique(positions * n_types + followers, return_index=True)
+        positions, followers, lags = positions[first], followers[first], lags[first]
+        # ... which counts towards every window k >= that lag
+        reps = self.max_lag - lags + 1
+        slot = np.repeat(lags - 1, reps) + (
+            np.arange(reps.sum()) - np.repeat(np.cumsum(reps) - reps, reps)
+        )
+        positions, followers = np.repeat(positions, reps), np.repeat(followers, reps)
+        code = (slot * n_types + chains[positions]) * n_types + followers
+        self._count(self.follows, cells[conv[positions]], code)
+        self.num_conversations += len(lengths)
+
+    @staticmethod
+    def _count(table: np.ndarray, cells: np.ndarray, code: np.ndarray) -> None:
+        """Add one to ``table[cell, code]`` for every event, and to its totals."""
+        flat = table.reshape(-1)
+        for keep in np.ndindex(2, 2, 2):
+            d, i, o = (cells[:, axis] * keep[axis] for axis in range(3))
+            np.add.at(flat, np.ravel_multi_index((d, i, o, code), table.shape), 1)
+
+    # ── queries ──────────────────────────────────────────────────────────
+
+    def _slot(self, axis: str, value: Optional[str]) -> Optional[int]:
+        return 0 if value is None else self.vocab[axis].get(str(value))
+
+    def _type(self, edge_type: str) -> int:
+        if edge_type not in self._type_index:
+            raise ValueError(f"Unknown edge type {edge_type!r}; expected one of {self.edge_types}")
+        return self._type_index[edge_type]
+
+    def follow_count(
+        self,
+        source: str,
+        target: str,
+        within: int = 1,
+        domain: Optional[str] = None,
+        intent: Optional[str] = None,
+        outcome: Optional[str] = None,
+    ) -> int:
+        """Chain positions of type *source* with a *target* edge in the next *within* edges.
+
+        ``None`` for *domain*, *intent* or *outcome* counts over all values.
+        """
+        if not 1 <= within <= self.max_lag:
+            raise ValueError(f"within must be in [1, {self.max_lag}], got {within}")
+        cell = (self._slot("domain", domain), self._slot("intent", intent),
+                self._slot("outcome", outcome))
+        if None in cell:
+            return 0
+        n_types = len(self.edge_types)
+        code = ((within - 1) * n_types + self._type(source)) * n_types + self._type(target)
+        return int(self.follows[cell + (code,)])
+
+    def ngram_count(
+        self,
+        ngram: Sequence[str],
+        domain: Optional[str] = None,
+        intent: Optional[str] = None,
+        outcome: Optional[str] = None,
+    ) -> int:
+        """Occurrences of the consecutive edge-type run *ngram*."""
+        if not 1 <= len(ngram) <= self.max_ngram:
+            raise ValueError(f"ngram length must be in [1, {self.max_ngram}], got {len(ngram)}")
+        cell = (self._slot("domain", domain), self._slot("intent", intent),
+                self._slot("outcome", outcome))
+        if None in cell:
+            return 0
+        code = 0
+        for edge_type in ngram:
+            code = code * len(self.edge_types) + self._type(edge_type)
+        return int(self.ngrams[len(ngram)][cell + (code,)])
+
+    def follow_rate(
+        self,
+        source: str,
+        target: str,
+        within: int = 1,
+        domain: Optional[str] = None,
+        intent: Optional[str] = None,
+        outcome: Optional[str] = None,
+    ) -> float:
+        """Fraction of *source* edges followed by a *target* edge within *within* edges."""
+        total = self.ngram_count([source], domain, intent, outcome)
+        if total == 0:
+            return 0.0
+        return self.follow_count(source, target, within, domain, intent, outcome) / total
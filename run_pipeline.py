@@ -26,6 +26,26 @@ def main() -> None:
         choices=["cpu", "cuda", "auto"],
         help="Device for inference: cpu, cuda, or auto (default: auto)",
     )
+    parser.add_argument(
+        "--precision", type=str, default="fp32", choices=["fp32", "bf16"],
+        help="Forward-pass precision; bf16 uses autocast (default: fp32)",
+    )
+    parser.add_argument(
+        "--compile", action="store_true",
+        help="torch.compile model forwards (shape-bucketed, eager fallback)",
+    )
+    parser.add_argument(
+        "--checkpoint-dir", type=str, default="checkpoints",
+        help="Directory holding trained/exported models (default: checkpoints)",
+    )
+    parser.add_argument(
+        "--similar", type=str, default=None, metavar="TRANSCRIPT_ID",
+        help="List the conversations most similar to this transcript",
+    )
+    parser.add_argument(
+        "--top-k", type=int, default=5,
+        help="Number of similar conversations to list (default: 5)",
+    )
     parser.add_argument(
         "--query",
         type=str,
@@ -34,8 +54,10 @@ def main() -> None:
     )
     args = parser.parse_args()
 
-    config = PipelineConfig(device=args.device)
-    pipe = CausalAnalysisPipeline(config)
+    config = PipelineConfig(
+        device=args.device, precision=args.precision, compile_models=args.compile,
+    )
+    pipe = CausalAnalysisPipeline(config, checkpoint_dir=args.checkpoint_dir)
 
     print("Loading data...")
     try:
@@ -82,6 +104,11 @@ def main() -> None:
             f"chain={' → '.join(r['causal_chain'])}"
         )
 
+    if args.similar:
+        print(f"\nConversations most similar to {args.similar}:")
+        for match in pipe.similar_conversations(args.similar, k=args.top_k):
+            print(f"  {match['transcript_id']}: similarity={match['similarity']:.4f}")
+
     # Interactive query
     if args.query:
         print(f"\nInteractive Query: {args.query}")
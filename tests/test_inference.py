@@ -4,13 +4,36 @@ Verifies that:
 - Inference does NOT trigger any training
 - No optimizer is created during inference
 - No training imports exist in the inference entrypoint
+- Exported TorchScript graphs match the eager modules and are loaded by the pipeline unless stale
+- bf16 autocast inference stays close to fp32 and returns fp32 outputs
+- Shape-bucketed compiled forwards match eager outputs, stay within the recompile limit and fall back to eager
+- The trained GNN is loaded once per process and batched graph embeddings match per-graph ones
+- GNN checkpoints of any head count, width, depth or attention mode load under the default config
+- Padded batched GNN attention matches per-graph forwards and is only used for small graphs
+- The graph-embedding similarity index finds exact neighbours, persists and goes stale with the GNN
+- Corpus transition statistics match brute-force counts per domain/intent/outcome and update incrementally
+- The chunked, vectorized causal bootstrap reproduces the per-resample loop and stays within its memory budget
+- Population causal results are computed once per dataset, CausalConfig and DAG, returned as copies, and recomputed after in-place edits once invalidated
 """
 import ast
 import inspect
 
 import pytest
+import torch
 
+from pipeline.compilation import bucket_size, compile_encoder_batch, compile_gnn
+from pipeline.config import PipelineConfig
+from pipeline.data_processing import build_conversation_features
+from pipeline.discourse_graph import DiscourseGNN, pad_graphs
+from pipeline.export import (
+    export_checkpoints,
+    export_encoder,
+    export_gnn,
+    gnn_example_inputs,
+)
 from pipeline.main import CausalAnalysisPipeline
+from pipeline.model_io import default_paths, load_gnn, save_encoder, save_gnn
+from pipeline.train import _FeatureEncoder
 
 
 class TestInferenceNoTraining:
@@ -52,3 +75,677 @@ class TestInferenceNoTraining:
         assert "Optimizer" not in source, (
             "CausalAnalysisPipeline must NOT reference Optimizer"
         )
+
+
+class TestExportedGraphs:
+    """Frozen TorchScript graphs must match the eager modules and be picked up."""
+
+    def _models(self):
+        torch.manual_seed(0)
+        config = PipelineConfig(device="cpu")
+        encoder = _FeatureEncoder().eval()
+        gnn = DiscourseGNN(config.discourse, input_dim=32).eval()
+        return config, encoder, gnn
+
+    def test_exported_outputs_match_eager(self):
+        _, encoder, gnn = self._models()
+        feats = torch.randn(7, 17)
+        node_feat, edge_index = gnn_example_inputs(9)
+        node_feat = torch.randn_like(node_feat)
+
+        with torch.no_grad():
+            eager_enc = encoder.forward_conversation(feats)
+            eager_gnn = gnn(node_feat, edge_index)
+            eager_edges = gnn.classify_edges(eager_gnn["node_embeddings"], edge_index)
+            enc_out = export_encoder(encoder)(feats)
+            gnn_out = export_gnn(gnn)(node_feat, edge_index)
+
+        assert torch.allclose(enc_out["outcome_logits"], eager_enc["outcome_logits"], atol=1e-5)
+        assert torch.allclose(gnn_out["graph_embedding"], eager_gnn["graph_embedding"], atol=1e-4)
+        assert torch.allclose(gnn_out["edge_logits"], eager_edges, atol=1e-4)
+
+    def test_pipeline_loads_exported_graphs(self, tmp_path):
+        config, encoder, gnn = self._models()
+        paths = default_paths(str(tmp_path))
+        save_encoder(encoder, paths["encoder"])
+        save_gnn(gnn, paths["gnn"])
+        exported = export_checkpoints(config, str(tmp_path))
+        assert set(exported) == {"encoder", "gnn"}
+
+        pipe = CausalAnalysisPipeline(config, checkpoint_dir=str(tmp_path))
+        assert pipe.encoder_graph is not None
+        assert pipe.gnn_graph is not None
+
+        turns = [
+            {"text": "my order is broken", "speaker": "Customer"},
+            {"text": "sorry, let me explain", "speaker": "Agent"},
+            {"text": "I want a manager", "speaker": "Customer"},
+        ]
+        record = build_conversation_features("T1", turns, "Refund Request")
+        emb = pipe._encode_turns(record["turn_features"])
+        graph = pipe._build_graph(record["turn_features"], emb)
+        num_edges = graph["edge_index"].shape[1]
+        assert graph["edge_logits"].shape == (num_edges, len(config.discourse.edge_types))
+        assert pipe._predict_outcome(emb) is not None
+
+    def test_stale_export_is_not_served(self, tmp_path):
+        import os
+
+        config, encoder, gnn = self._models()
+        paths = default_paths(str(tmp_path))
+        save_encoder(encoder, paths["encoder"])
+        save_gnn(gnn, paths["gnn"])
+        export_checkpoints(config, str(tmp_path))
+        # Retraining the GNN without re-exporting leaves an older export
+        save_gnn(DiscourseGNN(config.discourse, input_dim=32), paths["gnn"])
+        stat = os.stat(paths["gnn_export"])
+        os.utime(paths["gnn"], ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+        pipe = CausalAnalysisPipeline(config, checkpoint_dir=str(tmp_path))
+        assert pipe.encoder_graph is not None
+        assert pipe.gnn_graph is None
+
+
+class TestBf16Inference:
+    """bf16 autocast must only perturb outputs by bfloat16 rounding."""
+
+    def test_bf16_graph_outputs_close_to_fp32(self):
+        turns = [
+            {"text": "my order is broken and this is unacceptable", "speaker": "Customer"},
+            {"text": "sorry, let me explain the delay", "speaker": "Agent"},
+            {"text": "I want a manager", "speaker": "Customer"},
+        ]
+        record = build_conversation_features("T1", turns, "Refund Request")
+        outputs = {}
+        for precision in ("fp32", "bf16"):
+            torch.manual_seed(0)
+            pipe = CausalAnalysisPipeline(PipelineConfig(device="cpu", precision=precision))
+            emb = pipe._encode_turns(record["turn_features"])
+            outputs[precision] = pipe._build_graph(record["turn_features"], emb)
+
+        bf16_emb = outputs["bf16"]["node_embeddings"]
+        assert bf16_emb.dtype == torch.float32
+        assert torch.allclose(bf16_emb, outputs["fp32"]["node_embeddings"], atol=0.1)
+
+    def test_unknown_precision_rejected(self):
+        with pytest.raises(ValueError):
+            PipelineConfig(device="cpu", precision="fp16")
+
+
+# ---------------------------------------------------------------------------
+# Test: torch.compile path
+# ---------------------------------------------------------------------------
+
+def _fail_compiled(*args, **kwargs):
+    raise RuntimeError("simulated inductor failure")
+
+
+class TestCompiledForward:
+    """Bucket padding must not change outputs, and compile failures fall back to eager."""
+
+    def test_bucket_sizes(self):
+        assert [bucket_size(n) for n in (1, 8, 9, 33)] == [8, 8, 16, 64]
+
+    def test_gnn_bucketing_matches_eager_and_falls_back(self):
+        torch.manual_seed(0)
+        gnn = DiscourseGNN(PipelineConfig(device="cpu").discourse, input_dim=32).eval()
+        forward = compile_gnn(gnn, True)
+        # Run the padded inputs through the eager module instead of compiling
+        forward._compiled = _fail_compiled
+        node_feat, edge_index = gnn_example_inputs(11)
+        node_feat = torch.randn_like(node_feat)
+        with torch.no_grad():
+            expected = gnn(node_feat, edge_index)
+            out = forward(node_feat, edge_index)
+        assert not forward.compiled
+        assert out["node_embeddings"].shape == expected["node_embeddings"].shape
+        for key in ("node_embeddings", "graph_embedding"):
+            assert torch.allclose(out[key], expected[key], atol=1e-5)
+
+    def test_many_shapes_stay_within_recompile_limit(self, caplog):
+        from pipeline.discourse_graph import batch_graphs
+
+        torch.manual_seed(0)
+        gnn = DiscourseGNN(PipelineConfig(device="cpu").discourse, input_dim=32).eval()
+        forward = compile_gnn(gnn, True)
+        # Real dynamo guards and recompiles, without inductor code generation
+        forward._compiled = torch.compile(gnn, dynamic=False, backend="eager")
+        torch._dynamo.reset()
+        # 12 distinct (nodes, edges, graphs) shapes, in three size buckets
+        batches = []
+        for n_graphs in (1, 2, 3):
+            for n_nodes in (2, 3, 5, 9):
+                graphs = []
+                for _ in range(n_graphs):
+                    node_feat, edge_index = gnn_example_inputs(n_nodes)
+                    graphs.append({"node_features": torch.randn_like(node_feat),
+                                   "edge_index": edge_index,
+                                   "edge_attr": torch.zeros(edge_index.shape[1], dtype=torch.long)})
+                batches.append(batch_graphs(graphs))
+        with caplog.at_level("WARNING", logger="pipeline.compilation"), torch.no_grad():
+            for b in batches:
+                args = (b["node_features"], b["edge_index"], b["batch"], b["num_graphs"])
+                out, expected = forward(*args), gnn(*args)
+                for key in ("node_embeddings", "graph_embedding"):
+                    assert torch.allclose(out[key], expected[key], atol=1e-5)
+        assert forward.compiled
+        assert len(forward._shapes) == 3
+        assert "recompile limit" not in caplog.text
+        torch._dynamo.reset()
+
+    def test_shapes_past_recompile_limit_run_eagerly_with_warning(self, caplog, monkeypatch):
+        import pipeline.compilation as compilation
+
+        torch.manual_seed(0)
+        gnn = DiscourseGNN(PipelineConfig(device="cpu").discourse, input_dim=32).eval()
+        forward = compile_gnn(gnn, True)
+        compiled_shapes = []
+        forward._compiled = lambda x, *a: compiled_shapes.append(x.shape[0]) or gnn(x, *a)
+        monkeypatch.setattr(compilation, "_recompile_limit", lambda: 2)
+        with caplog.at_level("WARNING", logger="pipeline.compilation"), torch.no_grad():
+            for n_nodes in (3, 9, 20, 40, 9):
+                node_feat, edge_index = gnn_example_inputs(n_nodes)
+                node_feat = torch.randn_like(node_feat)
+                out, expected = forward(node_feat, edge_index), gnn(node_feat, edge_index)
+                assert torch.allclose(out["graph_embedding"], expected["graph_embedding"], atol=1e-5)
+        assert compiled_shapes == [8, 16, 16]
+        assert caplog.text.count("recompile limit") == 1
+
+    def test_encoder_bucketing_matches_eager(self):
+        torch.manual_seed(0)
+        model = _FeatureEncoder().eval()
+        forward = compile_encoder_batch(model, True)
+        forward._compiled = _fail_compiled
+        feats = torch.randn(3, 11, 17)
+        mask = torch.ones(3, 11, dtype=torch.bool)
+        mask[1, 5:] = False
+        with torch.no_grad():
+            expected = model.forward_batch(feats, mask)
+            out = forward(feats, mask)
+        for key, value in expected.items():
+            assert out[key].shape == value.shape
+            assert torch.allclose(out[key], value, atol=1e-5)
+
+
+
+# ---------------------------------------------------------------------------
+# Test: Trained GNN and batched graph inference
+# ---------------------------------------------------------------------------
+
+def _graph_records():
+    texts = [
+        ["my order is broken", "sorry, let me explain", "I want a manager"],
+        ["still waiting for my refund", "unfortunately it is delayed"],
+        ["hello", "hi, how can I help?", "my card failed", "I will fix it", "thanks"],
+    ]
+    return [
+        build_conversation_features(
+            f"T{i}",
+            [{"text": t, "speaker": "Customer" if j % 2 == 0 else "Agent"} for j, t in enumerate(conv)],
+            "Refund Request",
+        )
+        for i, conv in enumerate(texts)
+    ]
+
+
+class TestGraphInference:
+    """The pipeline serves the trained GNN, loaded once, and batches graphs."""
+
+    def test_trained_gnn_loaded_once_per_process(self, tmp_path, monkeypatch):
+        import pipeline.main as main_mod
+
+        torch.manual_seed(0)
+        config = PipelineConfig(device="cpu")
+        gnn = DiscourseGNN(config.discourse, input_dim=32).eval()
+        save_gnn(gnn, default_paths(str(tmp_path))["gnn"])
+        loads = []
+        monkeypatch.setattr(main_mod, "load_gnn", lambda *a, **kw: loads.append(1) or load_gnn(*a, **kw))
+
+        record = _graph_records()[0]
+        pipes = [CausalAnalysisPipeline(config, checkpoint_dir=str(tmp_path)) for _ in range(2)]
+        for pipe in pipes:
+            emb = pipe._encode_turns(record["turn_features"])
+            graph = pipe._build_graph(record["turn_features"], emb)
+        assert len(loads) == 1
+        assert pipes[0].discourse_gnn is pipes[1].discourse_gnn
+        with torch.no_grad():
+            expected = gnn(graph["node_features"], graph["edge_index"])
+        assert torch.allclose(graph["graph_embedding"], expected["graph_embedding"], atol=1e-6)
+
+    def test_default_config_serves_checkpoints_of_other_architectures(self, tmp_path):
+        import dataclasses
+        import os
+
+        from pipeline.export import GNN_INPUT_DIM
+
+        record = _graph_records()[0]
+        for i, (metadata, overrides, serving) in enumerate([
+            # Single-head checkpoint from before multi-head attention (no metadata)
+            (False, {"gnn_heads": 1}, {}),
+            # Narrower, shallower mean-merge model, e.g. a sweep winner
+            (True, {"gnn_heads": 2, "gnn_head_merge": "mean", "gnn_hidden_dim": 64,
+                    "gnn_num_layers": 2}, {}),
+            # Sparse-trained checkpoint served by a dense config, and vice versa
+            (True, {"sparse_attention": True}, {}),
+            (True, {}, {"sparse_attention": True}),
+            # Old checkpoints were dense, whatever the serving config says
+            (False, {}, {"sparse_attention": True}),
+        ]):
+            config = PipelineConfig(device="cpu")
+            config.discourse = dataclasses.replace(config.discourse, **serving)
+            torch.manual_seed(i)
+            gnn = DiscourseGNN(
+                dataclasses.replace(config.discourse, **{"sparse_attention": False, **overrides}),
+                input_dim=GNN_INPUT_DIM,
+            ).eval()
+            ckpt_dir = str(tmp_path / f"ckpt{i}")
+            path = default_paths(ckpt_dir)["gnn"]
+            if metadata:
+                save_gnn(gnn, path)
+            else:
+                os.makedirs(ckpt_dir)
+                torch.save({"model_state_dict": gnn.state_dict()}, path)
+
+            pipe = CausalAnalysisPipeline(config, checkpoint_dir=ckpt_dir)
+            emb = pipe._encode_turns(record["turn_features"])
+            graph = pipe._build_graph(record["turn_features"], emb)
+            with torch.no_grad():
+                expected = gnn(graph["node_features"], graph["edge_index"])
+            assert torch.allclose(graph["graph_embedding"], expected["graph_embedding"], atol=1e-5)
+            if gnn.config.sparse_attention != config.discourse.sparse_attention:
+                # The serving config's attention mode would give other embeddings
+                other = DiscourseGNN(config.discourse, input_dim=GNN_INPUT_DIM).eval()
+                other.load_state_dict(gnn.state_dict())
+                with torch.no_grad():
+                    served = other(graph["node_features"], graph["edge_index"])
+                assert not torch.allclose(
+                    served["graph_embedding"], expected["graph_embedding"], atol=1e-5,
+                )
+            assert set(export_checkpoints(config, ckpt_dir)) == {"gnn"}
+            assert torch.allclose(
+                CausalAnalysisPipeline(config, checkpoint_dir=ckpt_dir)
+                ._build_graph(record["turn_features"], emb)["graph_embedding"],
+                expected["graph_embedding"], atol=1e-5,
+            )
+
+    @pytest.mark.parametrize("padded_max_nodes", [0, 32])
+    def test_batched_embeddings_match_per_graph_and_are_cached(self, tmp_path, padded_max_nodes):
+        torch.manual_seed(0)
+        config = PipelineConfig(device="cpu")
+        config.discourse.padded_max_nodes = padded_max_nodes
+        save_gnn(DiscourseGNN(config.discourse, input_dim=32), default_paths(str(tmp_path))["gnn"])
+        records = _graph_records()
+
+        pipe = CausalAnalysisPipeline(config, checkpoint_dir=str(tmp_path))
+        pipe.embed_graphs(records, batch_size=2)
+        assert set(pipe.graph_embeddings) == {"T0", "T1", "T2"}
+
+        single = CausalAnalysisPipeline(config, checkpoint_dir=str(tmp_path))
+        for rec in records:
+            tf = rec["turn_features"]
+            expected = single._build_graph(tf, single._encode_turns(tf))
+            cached = pipe.graph_embeddings[rec["transcript_id"]]
+            for key in ("node_embeddings", "graph_embedding"):
+                assert torch.allclose(cached[key], expected[key], atol=1e-5)
+
+        # Cached transcripts never reach the GNN again
+        pipe._gnn_forward = None
+        pipe._gnn = lambda: pytest.fail("GNN rerun for a cached transcript")
+        tf = records[2]["turn_features"]
+        graph = pipe._build_graph(tf, pipe._encode_turns(tf), "T2")
+        assert graph["graph_embedding"] is pipe.graph_embeddings["T2"]["graph_embedding"]
+
+    @pytest.mark.parametrize("sparse", [False, True])
+    @pytest.mark.parametrize("merge", ["concat", "mean"])
+    def test_padded_forward_matches_per_graph(self, sparse, merge):
+        torch.manual_seed(0)
+        config = PipelineConfig(device="cpu").discourse
+        config.sparse_attention = sparse
+        config.gnn_head_merge = merge
+        gnn = DiscourseGNN(config, input_dim=32).eval()
+        graphs = []
+        for n in (3, 9, 1, 5):
+            _, edge_index = gnn_example_inputs(n)
+            graphs.append({
+                "node_features": torch.randn(n, 32),
+                "edge_index": edge_index,
+                "edge_attr": torch.zeros(edge_index.shape[1], dtype=torch.long),
+            })
+
+        x, adjacency, node_mask = pad_graphs(graphs)
+        assert x.shape == (4, 9, 32) and node_mask.sum().item() == 18
+        with torch.no_grad():
+            out = gnn.forward_padded(x, adjacency, node_mask)
+            for i, g in enumerate(graphs):
+                expected = gnn(g["node_features"], g["edge_index"])
+                n = g["node_features"].shape[0]
+                assert torch.allclose(out["node_embeddings"][i, :n], expected["node_embeddings"], atol=1e-5)
+                assert torch.allclose(out["graph_embedding"][i], expected["graph_embedding"], atol=1e-5)
+
+    def test_padded_path_only_for_small_graphs(self):
+        config = PipelineConfig(device="cpu").discourse
+        gnn = DiscourseGNN(config, input_dim=32)
+        assert gnn.use_padded([4, config.padded_max_nodes])
+        assert not gnn.use_padded([4, config.padded_max_nodes + 1])
+        assert not gnn.use_padded([])
+        config.padded_max_nodes = 0
+        assert not gnn.use_padded([4])
+
+
+# ---------------------------------------------------------------------------
+# Test: Graph-embedding similarity index
+# ---------------------------------------------------------------------------
+
+class TestSimilarityIndex:
+    """IVF search, incremental inserts, persistence and the pipeline API."""
+
+    def test_full_probe_matches_brute_force_and_round_trips(self, tmp_path):
+        import numpy as np
+
+        from pipeline.similarity import SimilarityIndex
+
+        rng = np.random.default_rng(0)
+        vectors = rng.normal(size=(500, 16)).astype(np.float32)
+        ids = [f"T{i}" for i in range(500)]
+        index = SimilarityIndex.build(ids[:400], vectors[:400], n_lists=10, n_probe=10)
+        index.add(ids[400:], vectors[400:])
+        index.add(["T0"], vectors[1:2])  # replace T0's vector
+        assert len(index) == 500
+
+        normed = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        normed[0] = normed[1]
+        query = rng.normal(size=16)
+        exact = np.argsort(-(normed @ (query / np.linalg.norm(query))))[:5]
+        assert [tid for tid, _ in index.search(query, 5)] == [ids[i] for i in exact]
+        assert [tid for tid, _ in index.search(normed[1], 2, exclude="T1")][0] == "T0"
+
+        index.save(str(tmp_path / "index.npz"))
+        loaded = SimilarityIndex.load(str(tmp_path / "index.npz"))
+        assert len(loaded) == 500
+        assert loaded.search(query, 5) == index.search(query, 5)
+
+    def test_pipeline_similar_conversations_persist_per_gnn(self, tmp_path):
+        import os
+
+        torch.manual_seed(0)
+        config = PipelineConfig(device="cpu")
+        gnn_path = default_paths(str(tmp_path))["gnn"]
+        save_gnn(DiscourseGNN(config.discourse, input_dim=32), gnn_path)
+        records = _graph_records()
+
+        pipe = CausalAnalysisPipeline(config, checkpoint_dir=str(tmp_path))
+        pipe.records = records[:2]
+        matches = pipe.similar_conversations("T0", k=5)
+        assert [m["transcript_id"] for m in matches] == ["T1"]
+        # Records loaded later are embedded and inserted on demand
+        pipe.records = records
+        assert {m["transcript_id"] for m in pipe.similar_conversations("T2", k=5)} == {"T0", "T1"}
+
+        reloaded = CausalAnalysisPipeline(config, checkpoint_dir=str(tmp_path))
+        assert len(reloaded._load_similarity_index()) == 3
+        # A retrained GNN makes the persisted embeddings stale
+        stat = os.stat(gnn_path)
+        os.utime(gnn_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        assert reloaded._load_similarity_index() is None
+
+
+# ---------------------------------------------------------------------------
+# Test: Corpus discourse transition statistics
+# ---------------------------------------------------------------------------
+
+class TestTransitionStats:
+    """Aggregated edge-type transitions and n-grams equal brute-force counts."""
+
+    @staticmethod
+    def _chain(record):
+        from pipeline.discourse_graph import detect_edge_type
+
+        tf = record["turn_features"]
+        return [
+            detect_edge_type(tf[t]["text"], tf[t + 1]["text"]) or "clarification"
+            for t in range(len(tf) - 1)
+        ]
+
+    def test_counts_match_brute_force_and_update_incrementally(self):
+        from pipeline.benchmark import synthetic_records
+        from pipeline.transitions import TransitionStats
+
+        records = synthetic_records(60, num_turns=10, seed=3)
+        for i, rec in enumerate(records):
+            rec["domain"] = ["Banking", "Retail"][i % 2]
+        config = PipelineConfig(device="cpu")
+        pipe = CausalAnalysisPipeline(config)
+        pipe.records = records[:40]
+        stats = pipe.discourse_transitions()
+        assert len(stats) == 40
+        # New records are added incrementally; repeats are not double-counted
+        assert pipe.discourse_transitions(records) is stats
+        assert len(stats) == 60
+
+        def brute(source, target, within, domain=None, outcome=None):
+            count = occurrences = 0
+            for rec in records:
+                if domain not in (None, rec["domain"]) or outcome not in (None, rec["outcome"]):
+                    continue
+                chain = self._chain(rec)
+                for p, label in enumerate(chain):
+                    if label == source:
+                        occurrences += 1
+                        count += target in chain[p + 1:p + 1 + within]
+            return count, occurrences
+
+        for source, target, within, domain, outcome in [
+            ("denial", "apology", 2, None, None),
+            ("denial", "apology", 2, "Banking", None),
+            ("delay", "apology", 1, "Retail", "escalated"),
+            ("apology", "apology", 4, None, "refunded"),
+        ]:
+            count, occurrences = brute(source, target, within, domain, outcome)
+            assert stats.follow_count(source, target, within, domain=domain, outcome=outcome) == count
+            assert stats.ngram_count([source], domain=domain, outcome=outcome) == occurrences
+        assert brute("denial", "apology", 2)[0] > 0
+
+        trigram = ["delay", "clarification", "clarification"]
+        expected = sum(
+            chain[p:p + 3] == trigram for chain in map(self._chain, records) for p in range(len(chain))
+        )
+        assert stats.ngram_count(trigram) == expected > 0
+        assert stats.ngram_count(trigram, domain="Nowhere") == 0
+        with pytest.raises(ValueError):
+            stats.follow_count("denial", "apology", within=5)
+
+    def test_graph_outputs_count_like_records(self):
+        from pipeline.discourse_graph import build_discourse_graph
+        from pipeline.transitions import TransitionStats
+
+        records = _graph_records()
+        edge_types = PipelineConfig().discourse.edge_types
+        from_records, from_graphs = TransitionStats(edge_types), TransitionStats(edge_types)
+        from_records.add_records(records)
+        for rec in records:
+            tf = rec["turn_features"]
+            graph = build_discourse_graph(tf, torch.zeros(len(tf), 4), edge_types, window=3)
+            from_graphs.add_graph(graph, rec["domain"], rec["intent"], rec["outcome"], rec["transcript_id"])
+        from_graphs.add_graph(graph, transcript_id=records[-1]["transcript_id"])
+        assert (from_records.follows == from_graphs.follows).all()
+        for n in from_records.ngrams:
+            assert (from_records.ngrams[n] == from_graphs.ngrams[n]).all()
+
+
+# ---------------------------------------------------------------------------
+# Test: Vectorized causal bootstrap
+# ---------------------------------------------------------------------------
+
+class TestBootstrap:
+    """``bootstrap_ates`` equals the per-resample loop it replaced."""
+
+    @pytest.mark.parametrize("n", [1, 2, 7, 200, 201])
+    @pytest.mark.parametrize("memory_mb", [1e-4, 256.0])
+    def test_matches_loop_for_fixed_seed(self, n, memory_mb):
+        import numpy as np
+
+        from pipeline.benchmark import _loop_bootstrap_ates
+        from pipeline.causal_model import bootstrap_ates
+
+        rng = np.random.RandomState(n)
+        # Few distinct treatment values, so medians tie often
+        t_vals = rng.randint(0, 4, size=n).astype(np.float64)
+        y_vals = rng.uniform(size=n)
+        expected = _loop_bootstrap_ates(t_vals, y_vals, 60, np.random.RandomState(60))
+        got = bootstrap_ates(t_vals, y_vals, 60, np.random.RandomState(60), memory_mb)
+        assert got.shape == (len(expected),)
+        assert np.allclose(got, expected, rtol=0, atol=1e-12)
+
+    @pytest.mark.parametrize("memory_mb", [16.0, 64.0])
+    def test_peak_allocation_within_budget(self, memory_mb):
+        import tracemalloc
+
+        import numpy as np
+
+        from pipeline.causal_model import bootstrap_ates
+
+        rng = np.random.RandomState(0)
+        t_vals, y_vals = rng.uniform(size=200_000), rng.uniform(size=200_000)
+        tracemalloc.start()
+        try:
+            bootstrap_ates(t_vals, y_vals, 40, np.random.RandomState(1), memory_mb)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        assert peak <= memory_mb * 2 ** 20
+
+    def test_estimate_causal_effect_interval(self):
+        import numpy as np
+
+        from pipeline.benchmark import _loop_bootstrap_ates
+        from pipeline.causal_model import CausalDAG, estimate_causal_effect
+        from pipeline.config import CausalConfig
+
+        config = CausalConfig()
+        rng = np.random.RandomState(0)
+        data = [
+            {"delay": float(d), "escalation": float(rng.uniform() < 0.2 + 0.1 * d)}
+            for d in rng.randint(0, 5, size=300)
+        ]
+        result = estimate_causal_effect(
+            data, "delay", "escalation", CausalDAG(config.causal_variables), config,
+        )
+        t_vals = np.array([d["delay"] for d in data])
+        y_vals = np.array([d["escalation"] for d in data])
+        boot = _loop_bootstrap_ates(
+            t_vals, y_vals, config.n_bootstrap, np.random.RandomState(config.n_bootstrap),
+        )
+        assert result["ci_lower"] == pytest.approx(np.percentile(boot, 2.5), abs=1e-12)
+        assert result["ci_upper"] == pytest.approx(np.percentile(boot, 97.5), abs=1e-12)
+
+
+# ---------------------------------------------------------------------------
+# Test: Population causal result cache
+# ---------------------------------------------------------------------------
+
+class TestCausalCache:
+    """Per-record analysis reuses the population ATE and root causes."""
+
+    def test_computed_once_and_invalidated_on_change(self, monkeypatch):
+        import pipeline.main as main_mod
+        from pipeline.benchmark import synthetic_records
+        from pipeline.causal_model import extract_causal_variables, identify_root_causes
+
+        calls = []
+        monkeypatch.setattr(
+            main_mod, "identify_root_causes",
+            lambda *a, **kw: calls.append(1) or identify_root_causes(*a, **kw),
+        )
+        records = synthetic_records(40, seed=1)
+        config = PipelineConfig(device="cpu")
+        pipe = CausalAnalysisPipeline(config)
+        pipe.records = records[:30]
+
+        first = pipe._run_causal_analysis(records[0])
+        second = pipe._run_causal_analysis(records[1])
+        assert len(calls) == 1
+        assert second["root_causes"] == first["root_causes"]
+        # Results are copies: editing one does not leak into later records
+        first["root_causes"].clear()
+        first["ate"]["ate"] = None
+        third = pipe._run_causal_analysis(records[2])
+        assert len(calls) == 1
+        assert third["root_causes"] == second["root_causes"] != []
+        assert third["ate"] == second["ate"]
+        assert second["causal_variables"] == extract_causal_variables(records[1])
+        expected = identify_root_causes(
+            [extract_causal_variables(r) for r in records[:30]],
+            config.causal.outcome, pipe.causal_dag, config.causal,
+        )
+        assert second["root_causes"] == expected
+
+        # New data, a new CausalConfig or a new DAG each recompute once
+        pipe.records.append(records[30])
+        pipe._run_causal_analysis(records[0])
+        pipe.records = records
+        pipe._run_causal_analysis(records[0])
+        assert len(calls) == 3
+        config.causal.n_bootstrap = 50
+        pipe._run_causal_analysis(records[0])
+        pipe.causal_dag = main_mod.CausalDAG(config.causal.causal_variables, edges=[])
+        pipe._run_causal_analysis(records[0])
+        assert len(calls) == 5
+        # Switching back hits the cache; an equal copy of the data does too
+        config.causal.n_bootstrap = 100
+        pipe.causal_dag = main_mod.CausalDAG(config.causal.causal_variables)
+        pipe.records = list(records)
+        pipe._run_causal_analysis(records[0])
+        assert len(calls) == 5
+
+    def test_in_place_edits_recomputed_once_invalidated(self, monkeypatch):
+        import copy
+
+        import pipeline.main as main_mod
+        from pipeline.benchmark import synthetic_records
+        from pipeline.causal_model import (
+            causal_records_fingerprint, extract_causal_variables, identify_root_causes,
+        )
+
+        calls = []
+        monkeypatch.setattr(
+            main_mod, "identify_root_causes",
+            lambda *a, **kw: calls.append(1) or identify_root_causes(*a, **kw),
+        )
+        records = copy.deepcopy(synthetic_records(30, seed=2))
+        config = PipelineConfig(device="cpu")
+        pipe = CausalAnalysisPipeline(config)
+        pipe.records = records
+        pipe._run_causal_analysis(records[0])
+        hashes = []
+        monkeypatch.setattr(
+            main_mod, "causal_records_fingerprint",
+            lambda recs: hashes.append(1) or causal_records_fingerprint(recs),
+        )
+
+        # Same list object and length, edited record field: per-record
+        # lookups never hash the corpus until the cache is invalidated
+        records[3]["has_escalation_request"] = 1 - records[3]["has_escalation_request"]
+        pipe._run_causal_analysis(records[0])
+        assert (len(calls), len(hashes)) == (1, 0)
+        pipe.invalidate_causal_cache()
+        pipe._run_causal_analysis(records[0])
+        pipe._run_causal_analysis(records[1])
+        assert (len(calls), len(hashes)) == (2, 1)
+        # ... edited turn feature
+        records[5]["turn_features"][0]["discourse_delay"] += 1.0
+        pipe.invalidate_causal_cache()
+        pipe._run_causal_analysis(records[0])
+        # ... and a record swapped for another
+        records[7] = synthetic_records(1, seed=3)[0]
+        pipe.invalidate_causal_cache()
+        latest = pipe._run_causal_analysis(records[0])
+        assert len(calls) == 4
+        expected = identify_root_causes(
+            [extract_causal_variables(r) for r in records],
+            config.causal.outcome, pipe.causal_dag, config.causal,
+        )
+        assert latest["root_causes"] == expected
+        # Invalidating unchanged records re-hashes them but reuses the results
+        pipe.invalidate_causal_cache()
+        pipe._run_causal_analysis(records[1])
+        assert len(calls) == 4
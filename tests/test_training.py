@@ -5,9 +5,28 @@ Verifies that:
 - Checkpoint-aware training skips retraining when checkpoints exist
 - --force-train overrides checkpoint skipping
 - Deterministic seeding produces reproducible results
+- Mini-batched encoder training matches per-conversation outputs
+- Batched discourse graphs give the same per-graph embeddings
+- Sparse edge attention is a per-node softmax over edges and batches like the dense path
+- Multi-head attention equals independent heads and rejects checkpoints with other head counts
+- A GNN checkpoint's architecture is read from its metadata or, for old checkpoints, its weight shapes
+- DataLoader workers are configurable and epoch time is split into data/compute
+- Epochs record forward/backward/optimizer time, throughput and peak RSS
+- Technical reports keep the sections earlier training, evaluation and benchmark runs wrote
+- Resuming an interrupted run reproduces the uninterrupted weights and history
+- Early stopping keeps and saves the best-validation weights
+- Data-parallel training across local gloo ranks checkpoints from rank 0 and counts each validation sample once
+- Concurrent encoder and GNN stages match sequential training
+- Incremental fine-tuning trains on every new transcript, holds out only replayed ones and versions checkpoints, also with stages skipped
+- bf16 autocast training keeps fp32 weights and finite fp32 losses
+- Sweeps prune trials by successive halving, start fresh when re-run and pin a loadable winner with its trained ids
+- The persisted graph store reproduces freshly built discourse graphs, edge labels included
+- Vectorized discourse edge typing matches per-pair keyword detection
+- Configurable edge windows and speaker edges match nested-loop construction
 """
 import ast
 import inspect
+import dataclasses
 import os
 import shutil
 import tempfile
@@ -16,8 +35,14 @@ import pytest
 import torch
 
 from pipeline.config import PipelineConfig
+from pipeline.discourse_graph import DiscourseGNN, batch_graphs, build_discourse_graph
 from pipeline.train import (
+    _ConversationDataset,
+    _ConversationLevelDataset,
+    _EarlyStopping,
     _FeatureEncoder,
+    _build_turn_embeddings,
+    _collate_conversations,
     train_all,
     train_encoder,
     train_gnn,
@@ -131,6 +156,264 @@ class TestEncoderTrainsOnce:
         assert len(hist["val_loss"]) == epochs
 
 
+# ---------------------------------------------------------------------------
+# Test: Mini-batched conversation training
+# ---------------------------------------------------------------------------
+
+class TestBatchedEncoder:
+    """Padded batches with masks must reproduce per-conversation outputs."""
+
+    def test_forward_batch_matches_forward_conversation(self):
+        torch.manual_seed(0)
+        model = _FeatureEncoder().eval()
+        convs = [torch.randn(n, 17) for n in (3, 7, 1)]
+        batch = [(c, torch.zeros(len(c), dtype=torch.long), 0) for c in convs]
+        feats, emo_labels, mask, outcomes = _collate_conversations(batch)
+
+        assert feats.shape == (3, 7, 17)
+        assert mask.sum(dim=1).tolist() == [3, 7, 1]
+
+        with torch.no_grad():
+            batched = model.forward_batch(feats, mask)
+            for i, conv in enumerate(convs):
+                single = model.forward_conversation(conv)
+                assert torch.allclose(
+                    batched["outcome_logits"][i], single["outcome_logits"][0], atol=1e-5,
+                )
+
+    def test_contiguous_dataset_matches_per_turn_vectors(self):
+        records = _make_dummy_records(6)
+        records[2]["turn_features"] = []
+        ds = _ConversationLevelDataset(records)
+        assert len(ds) == 5
+        feats, emo, outcome = ds[2]  # third non-empty conversation (record 3)
+        tfs = records[3]["turn_features"]
+        expected = torch.stack([_ConversationDataset._feature_vector(tf) for tf in tfs])
+        assert torch.equal(feats, expected)
+        assert emo.tolist() == [_ConversationDataset._emotion_label(tf) for tf in tfs]
+        assert outcome == records[3]["outcome_id"]
+
+        view = ds.subset([0, 2, 4])
+        assert len(view) == 2
+        assert view[1][0].data_ptr() == ds.features[ds.offsets[4]:].data_ptr()
+
+    def test_epoch_time_recorded(self):
+        config = PipelineConfig(device="cpu")
+        config.encoder.batch_size = 4
+        ckpt_dir = tempfile.mkdtemp()
+        hist = train_encoder(
+            config, _make_dummy_records(20), checkpoint_dir=ckpt_dir,
+            epochs=2, verbose=False,
+        )
+        assert len(hist["epoch_time"]) == 2
+        assert all(t > 0 for t in hist["epoch_time"])
+        shutil.rmtree(ckpt_dir)
+
+
+# ---------------------------------------------------------------------------
+# Test: Block-diagonal graph batching
+# ---------------------------------------------------------------------------
+
+class TestGraphBatching:
+    """A disjoint-union batch must give the same per-graph results."""
+
+    def test_batched_gnn_matches_single_graphs(self):
+        config = PipelineConfig(device="cpu")
+        torch.manual_seed(0)
+        model = DiscourseGNN(config.discourse, input_dim=32).eval()
+        graphs = []
+        for rec in _make_dummy_records(3):
+            tf = rec["turn_features"][: 2 + len(graphs)]
+            graphs.append(build_discourse_graph(
+                tf, _build_turn_embeddings(tf), config.discourse.edge_types,
+            ))
+
+        batch = batch_graphs(graphs)
+        assert batch["batch"].tolist() == [0, 0, 1, 1, 1, 2, 2, 2, 2]
+        assert batch["edge_index"].max().item() == 8
+
+        with torch.no_grad():
+            out = model(batch["node_features"], batch["edge_index"],
+                        batch["batch"], batch["num_graphs"])
+            assert out["graph_embedding"].shape == (3, config.discourse.gnn_hidden_dim)
+            for i, g in enumerate(graphs):
+                single = model(g["node_features"], g["edge_index"])
+                assert torch.allclose(
+                    out["graph_embedding"][i], single["graph_embedding"], atol=1e-4,
+                )
+
+    def test_sparse_attention_is_segment_softmax_over_edges(self):
+        from pipeline.discourse_graph import GraphAttentionLayer
+
+        torch.manual_seed(0)
+        layer = GraphAttentionLayer(8, 8, dropout=0.0, sparse=True)
+        x = torch.randn(5, 8)
+        edge_index = torch.tensor([[0, 0, 1, 2, 3], [1, 2, 2, 3, 4]])
+        with torch.no_grad():
+            out = layer(x, edge_index)
+            h = layer.W(x)
+            src, tgt = edge_index
+            e = layer.leaky_relu(layer.attn(torch.cat([h[src], h[tgt]], dim=-1))).squeeze(-1)
+            for i in range(5):
+                edges = src == i
+                expected = (torch.softmax(e[edges], dim=0).unsqueeze(-1) * h[tgt[edges]]).sum(0)
+                assert torch.allclose(out[i], expected, atol=1e-6)
+
+    @pytest.mark.parametrize("sparse", [False, True])
+    @pytest.mark.parametrize("merge", ["concat", "mean"])
+    def test_multi_head_matches_independent_heads(self, sparse, merge):
+        from pipeline.discourse_graph import GraphAttentionLayer
+
+        torch.manual_seed(0)
+        heads = 4
+        layer = GraphAttentionLayer(16, 16, 0.0, sparse=sparse, heads=heads, merge=merge).eval()
+        x = torch.randn(6, 16)
+        edge_index = torch.tensor([[0, 0, 1, 2, 3, 4, 1], [1, 2, 2, 3, 4, 5, 5]])
+        d = layer.head_dim
+        outputs = []
+        for k in range(heads):
+            single = GraphAttentionLayer(16, d, 0.0, sparse=sparse).eval()
+            with torch.no_grad():
+                single.W.weight.copy_(layer.W.weight[k * d:(k + 1) * d])
+                single.attn.weight.copy_(layer.attn.weight[k:k + 1])
+                outputs.append(single(x, edge_index))
+        expected = torch.cat(outputs, dim=-1) if merge == "concat" else torch.stack(outputs).mean(0)
+        with torch.no_grad():
+            assert torch.allclose(layer(x, edge_index), expected, atol=1e-5)
+
+    def test_gnn_checkpoint_with_other_head_count_rejected(self):
+        from pipeline.model_io import load_gnn, save_gnn
+
+        config = PipelineConfig(device="cpu")
+        config.discourse.gnn_heads = 1
+        with tempfile.TemporaryDirectory() as ckpt_dir:
+            path = os.path.join(ckpt_dir, "gnn.pt")
+            save_gnn(DiscourseGNN(config.discourse, input_dim=32), path)
+            load_gnn(DiscourseGNN(config.discourse, input_dim=32), path)
+            config.discourse.gnn_heads = 4
+            with pytest.raises(ValueError, match="gnn_heads=1"):
+                load_gnn(DiscourseGNN(config.discourse, input_dim=32), path)
+
+    @pytest.mark.parametrize("heads,merge,hidden,layers", [(1, "concat", 256, 3), (2, "mean", 64, 2)])
+    def test_checkpoint_architecture_read_without_metadata(self, heads, merge, hidden, layers):
+        from pipeline.model_io import gnn_architecture, gnn_config_for_checkpoint
+
+        config = PipelineConfig(device="cpu")
+        trained = dataclasses.replace(
+            config.discourse, gnn_heads=heads, gnn_head_merge=merge,
+            gnn_hidden_dim=hidden, gnn_num_layers=layers,
+        )
+        model = DiscourseGNN(trained, input_dim=32)
+        expected = {"gnn_heads": heads, "gnn_hidden_dim": hidden, "gnn_num_layers": layers,
+                    "sparse_attention": False}
+        if heads > 1:
+            expected["gnn_head_merge"] = merge
+        assert gnn_architecture(model.state_dict()) == expected
+        with tempfile.TemporaryDirectory() as ckpt_dir:
+            # A checkpoint saved before architecture metadata existed
+            path = os.path.join(ckpt_dir, "gnn.pt")
+            torch.save({"model_state_dict": model.state_dict()}, path)
+            rebuilt = gnn_config_for_checkpoint(config.discourse, path)
+            assert (rebuilt.gnn_heads, rebuilt.gnn_head_merge) == (heads, merge)
+            assert (rebuilt.gnn_hidden_dim, rebuilt.gnn_num_layers) == (hidden, layers)
+            assert config.discourse.gnn_heads == 4  # the caller's config is untouched
+
+    def test_sparse_batched_gnn_matches_single_graphs(self):
+        config = PipelineConfig(device="cpu")
+        config.discourse.sparse_attention = True
+        torch.manual_seed(0)
+        model = DiscourseGNN(config.discourse, input_dim=32).eval()
+        graphs = []
+        for rec in _make_dummy_records(3):
+            tf = rec["turn_features"][: 2 + len(graphs)]
+            graphs.append(build_discourse_graph(
+                tf, _build_turn_embeddings(tf), config.discourse.edge_types,
+            ))
+        batch = batch_graphs(graphs)
+        with torch.no_grad():
+            out = model(batch["node_features"], batch["edge_index"],
+                        batch["batch"], batch["num_graphs"])
+            for i, g in enumerate(graphs):
+                single = model(g["node_features"], g["edge_index"])
+                assert torch.allclose(
+                    out["graph_embedding"][i], single["graph_embedding"], atol=1e-4,
+                )
+
+
+# ---------------------------------------------------------------------------
+# Test: Multi-worker DataLoader pipeline
+# ---------------------------------------------------------------------------
+
+class TestDataLoaderWorkers:
+    """Both training loops run on worker processes and split epoch time."""
+
+    def test_training_with_workers_reports_data_and_compute_time(self):
+        config = PipelineConfig(device="cpu")
+        config.data.num_workers = 1
+        config.data.prefetch_factor = 2
+        config.data.persistent_workers = True
+        records = _make_dummy_records(20)
+        ckpt_dir = tempfile.mkdtemp()
+
+        enc = train_encoder(config, records, ckpt_dir, epochs=2, verbose=False)
+        gnn = train_gnn(config, records, ckpt_dir, epochs=2, verbose=False)
+
+        for hist in (enc, gnn):
+            assert len(hist["epoch_data_time"]) == 2
+            assert len(hist["epoch_compute_time"]) == 2
+            assert all(t > 0 for t in hist["epoch_compute_time"])
+        shutil.rmtree(ckpt_dir)
+
+    def test_phase_timing_and_throughput_reported(self):
+        from pipeline.report import generate_report
+
+        config = PipelineConfig(device="cpu")
+        records = _make_dummy_records(20)
+        with tempfile.TemporaryDirectory() as ckpt_dir:
+            enc = train_encoder(config, records, ckpt_dir, epochs=2, verbose=False)
+            gnn = train_gnn(config, records, ckpt_dir, epochs=2, verbose=False)
+            report = generate_report(
+                training_history={"encoder_history": enc, "gnn_history": gnn},
+                output_path=os.path.join(ckpt_dir, "report.md"),
+            )
+
+        for hist in (enc, gnn):
+            phases = [hist[f"epoch_{p}_time"] for p in ("forward", "backward", "optimizer")]
+            for epoch in range(2):
+                assert all(phase[epoch] > 0 for phase in phases)
+                assert sum(phase[epoch] for phase in phases) == pytest.approx(
+                    hist["epoch_compute_time"][epoch],
+                )
+                assert hist["samples_per_sec"][epoch] == pytest.approx(
+                    hist["split"]["train"] / hist["epoch_time"][epoch],
+                )
+            assert hist["peak_rss_mb"][-1] > 0
+        assert report.count("samples/s") == 2
+        assert report.count("Peak RSS") == 2
+
+    def test_report_sections_survive_other_runs(self, tmp_path):
+        from pipeline.report import generate_report
+
+        path = str(tmp_path / "report.md")
+        history = {"encoder_history": {"train_loss": [0.9, 0.5], "val_loss": [0.7, 0.6]}}
+        generate_report(training_history=history, output_path=path)
+        generate_report(evaluation_results={"metrics": {"id_recall": 0.75}}, output_path=path)
+        report = generate_report(
+            benchmark_results={"bootstrap": {"speedup": 1.5}}, output_path=path,
+        )
+        assert "Final training loss: 0.5000" in report
+        assert "| ID Recall (Evidence Accuracy) | 0.7500 |" in report
+        assert "| speedup | 1.5000 |" in report
+        with open(path, encoding="utf-8") as f:
+            assert f.read() == report
+        # A later run of one kind replaces only its own section
+        report = generate_report(
+            training_history={"encoder_history": {"train_loss": [0.4]}}, output_path=path,
+        )
+        assert "Final training loss: 0.4000" in report
+        assert "0.7500" in report and "| speedup |" in report
+
+
 # ---------------------------------------------------------------------------
 # Test: Checkpoint-aware training (skip when checkpoint exists)
 # ---------------------------------------------------------------------------
@@ -245,6 +528,490 @@ class TestResume:
 
         shutil.rmtree(ckpt_dir)
 
+    @pytest.mark.parametrize("stage", ["encoder", "gnn"])
+    def test_interrupted_run_matches_uninterrupted(self, stage):
+        records = _make_dummy_records(12)
+        train_fn = train_encoder if stage == "encoder" else train_gnn
+        config = PipelineConfig(device="cpu")
+
+        with tempfile.TemporaryDirectory() as full_dir, \
+                tempfile.TemporaryDirectory() as resumed_dir:
+            full = train_fn(config, records, full_dir, epochs=4, verbose=False)
+            train_fn(config, records, resumed_dir, epochs=2, verbose=False)
+            assert os.path.exists(default_paths(resumed_dir)[f"{stage}_state"])
+            resumed = train_fn(config, records, resumed_dir, epochs=4,
+                               verbose=False, resume=True)
+
+            assert resumed["train_loss"] == full["train_loss"]
+            assert resumed["val_loss"] == full["val_loss"]
+            full_state = torch.load(default_paths(full_dir)[stage], weights_only=False)
+            resumed_state = torch.load(default_paths(resumed_dir)[stage], weights_only=False)
+            for key, value in full_state["model_state_dict"].items():
+                assert torch.equal(value, resumed_state["model_state_dict"][key])
+
+
+# ---------------------------------------------------------------------------
+# Test: Early stopping and best-weight restoration
+# ---------------------------------------------------------------------------
+
+class TestEarlyStopping:
+    """Verify early stopping restores and saves the best-validation weights."""
+
+    def test_stops_after_patience_and_restores_best(self):
+        model = torch.nn.Linear(2, 1)
+        stopper = _EarlyStopping(patience=2)
+        snapshots = {}
+        for epoch, val_loss in enumerate([1.0, 0.5, 0.7, 0.8], start=1):
+            with torch.no_grad():
+                model.weight.fill_(float(epoch))
+            snapshots[epoch] = model.weight.clone()
+            stopped = stopper.step(val_loss, model, epoch)
+        assert stopped and stopper.best_epoch == 2
+        stopper.restore_best(model)
+        assert torch.equal(model.weight, snapshots[2])
+
+    def test_gnn_history_records_saved_epoch(self):
+        config = PipelineConfig(device="cpu")
+        config.discourse.early_stopping_patience = 1
+        with tempfile.TemporaryDirectory() as ckpt_dir:
+            hist = train_gnn(config, _make_dummy_records(12), ckpt_dir,
+                             epochs=6, verbose=False)
+            saved = torch.load(default_paths(ckpt_dir)["gnn"], weights_only=False)
+
+        assert hist["epochs_run"] == len(hist["val_loss"])
+        assert hist["val_loss"][hist["best_epoch"] - 1] == min(hist["val_loss"])
+        assert len(hist["learning_rate"]) == hist["epochs_run"]
+        assert saved["metadata"]["best_epoch"] == hist["best_epoch"]
+
+
+# ---------------------------------------------------------------------------
+# Test: Data-parallel training
+# ---------------------------------------------------------------------------
+
+class TestDataParallel:
+    """Verify train_all runs each stage across local gloo ranks."""
+
+    def test_two_rank_training_saves_checkpoints(self):
+        config = PipelineConfig(device="cpu")
+        config.training.world_size = 2
+        records = _make_dummy_records(16)
+
+        import pipeline.train as train_mod
+        orig_process = train_mod.process_dataset
+        train_mod.process_dataset = lambda cfg: records
+        try:
+            with tempfile.TemporaryDirectory() as ckpt_dir:
+                result = train_all(
+                    config=config,
+                    checkpoint_dir=ckpt_dir,
+                    encoder_epochs=2,
+                    gnn_epochs=2,
+                    verbose=False,
+                )
+                paths = default_paths(ckpt_dir)
+                assert os.path.exists(paths["encoder"])
+                assert os.path.exists(paths["gnn"])
+        finally:
+            train_mod.process_dataset = orig_process
+
+        for key in ("encoder_history", "gnn_history"):
+            hist = result[key]
+            assert len(hist["train_loss"]) == 2
+            assert "test_accuracy" in hist
+
+    @pytest.mark.parametrize("n", [7, 9])
+    def test_validation_shards_count_each_sample_once(self, n):
+        from pipeline.distributed import _StridedShard
+
+        shards = [list(_StridedShard(range(n), 3, rank)) for rank in range(3)]
+        assert sorted(i for shard in shards for i in shard) == list(range(n))
+        assert [len(_StridedShard(range(n), 3, rank)) for rank in range(3)] == list(map(len, shards))
+
+
+# ---------------------------------------------------------------------------
+# Test: concurrent training stages
+# ---------------------------------------------------------------------------
+
+class TestConcurrentStages:
+    """Verify train_all can train both stages in parallel processes."""
+
+    def test_concurrent_matches_sequential(self):
+        records = _make_dummy_records(16)
+
+        import pipeline.train as train_mod
+        orig_process = train_mod.process_dataset
+        train_mod.process_dataset = lambda cfg: records
+        results = {}
+        try:
+            for concurrent in (False, True):
+                config = PipelineConfig(device="cpu")
+                config.training.concurrent_stages = concurrent
+                with tempfile.TemporaryDirectory() as ckpt_dir:
+                    results[concurrent] = train_all(
+                        config=config,
+                        checkpoint_dir=ckpt_dir,
+                        encoder_epochs=2,
+                        gnn_epochs=2,
+                        verbose=False,
+                    )
+                    paths = default_paths(ckpt_dir)
+                    assert os.path.exists(paths["encoder"])
+                    assert os.path.exists(paths["gnn"])
+        finally:
+            train_mod.process_dataset = orig_process
+
+        for key in ("encoder_history", "gnn_history"):
+            sequential, concurrent = results[False][key], results[True][key]
+            assert concurrent["train_loss"] == pytest.approx(sequential["train_loss"], rel=1e-5)
+            assert concurrent["test_accuracy"] == pytest.approx(sequential["test_accuracy"])
+
+
+# ---------------------------------------------------------------------------
+# Test: incremental warm-start fine-tuning
+# ---------------------------------------------------------------------------
+
+class TestIncrementalTraining:
+    """Verify train_incremental fine-tunes on new transcripts and versions the result."""
+
+    def test_fine_tunes_new_records_and_promotes_version(self):
+        from pipeline.train import train_incremental
+
+        config = PipelineConfig(device="cpu")
+        config.training.replay_ratio = 0.5
+        records = _make_dummy_records(24)
+        corpus = records[:16]
+
+        import pipeline.train as train_mod
+        orig_process = train_mod.process_dataset
+        train_mod.process_dataset = lambda cfg: corpus
+        try:
+            with tempfile.TemporaryDirectory() as ckpt_dir:
+                train_all(config=config, checkpoint_dir=ckpt_dir, encoder_epochs=1,
+                          gnn_epochs=1, verbose=False, skip_tests=True)
+                paths = default_paths(ckpt_dir)
+                base = torch.load(paths["encoder"], weights_only=False)["model_state_dict"]
+
+                # Nothing new yet
+                assert train_incremental(config, ckpt_dir, verbose=False)["new_records"] == 0
+
+                corpus.extend(records[16:])
+                summary = train_incremental(config, ckpt_dir, verbose=False)
+                assert summary["version"] == 1
+                assert summary["new_records"] == 8
+                assert summary["replay_records"] == 4
+                n_subset = sum(summary["encoder_history"]["split"].values())
+                assert n_subset == 12
+                # New records all train; only the replay sample is held out
+                assert summary["encoder_history"]["split"]["train"] >= 8
+
+                for version in ("v000", "v001"):
+                    vpaths = default_paths(os.path.join(paths["versions"], version))
+                    assert os.path.exists(vpaths["encoder"])
+                    assert os.path.exists(vpaths["gnn"])
+                archived = torch.load(
+                    default_paths(os.path.join(paths["versions"], "v000"))["encoder"],
+                    weights_only=False,
+                )["model_state_dict"]
+                promoted = torch.load(paths["encoder"], weights_only=False)["model_state_dict"]
+                assert all(torch.equal(base[k], archived[k]) for k in base)
+                assert not all(torch.equal(base[k], promoted[k]) for k in base)
+
+                # Every transcript is now recorded as trained
+                assert train_incremental(config, ckpt_dir, verbose=False)["new_records"] == 0
+        finally:
+            train_mod.process_dataset = orig_process
+
+
+    @pytest.mark.parametrize("skip", ["encoder", "gnn", "both"])
+    def test_skipped_stages_carry_weights_into_version(self, skip):
+        from pipeline.train import train_incremental
+
+        config = PipelineConfig(device="cpu")
+        records = _make_dummy_records(20)
+        corpus = records[:14]
+
+        import pipeline.train as train_mod
+        orig_process = train_mod.process_dataset
+        train_mod.process_dataset = lambda cfg: corpus
+        try:
+            with tempfile.TemporaryDirectory() as ckpt_dir:
+                train_all(config=config, checkpoint_dir=ckpt_dir, encoder_epochs=1,
+                          gnn_epochs=1, verbose=False, skip_tests=True)
+                paths = default_paths(ckpt_dir)
+                before = {key: open(paths[key], "rb").read() for key in ("encoder", "gnn")}
+
+                corpus.extend(records[14:])
+                summary = train_incremental(
+                    config, ckpt_dir, verbose=False,
+                    skip_encoder=skip in ("encoder", "both"),
+                    skip_gnn=skip in ("gnn", "both"),
+                )
+                assert summary["version"] == 1
+                vpaths = default_paths(os.path.join(paths["versions"], "v001"))
+                for key in ("encoder", "gnn"):
+                    carried = open(vpaths[key], "rb").read()
+                    assert (carried == before[key]) == (skip in (key, "both"))
+                assert train_incremental(config, ckpt_dir, verbose=False)["new_records"] == 0
+        finally:
+            train_mod.process_dataset = orig_process
+
+    @pytest.mark.parametrize("stage", ["encoder", "gnn"])
+    def test_leading_records_never_held_out(self, stage):
+        config = PipelineConfig(device="cpu")
+        records = _make_dummy_records(20)
+        for i, rec in enumerate(records):
+            rec["transcript_id"] = f"T{i}"
+        with tempfile.TemporaryDirectory() as ckpt_dir:
+            if stage == "encoder":
+                hist = train_encoder(config, records, ckpt_dir, epochs=1, verbose=False,
+                                     train_first=12)
+                held_out = hist["_test_state"]["test_records"]
+                assert hist["split"] == {"train": 12 + 6, "val": 1, "test": 1}
+                assert not {r["transcript_id"] for r in held_out} & {f"T{i}" for i in range(12)}
+            else:
+                hist = train_gnn(config, records, ckpt_dir, epochs=1, verbose=False,
+                                 train_first=12)
+                assert hist["split"]["train"] >= 12
+                assert sum(hist["split"].values()) - hist["split"]["train"] <= 2
+
+
+# ---------------------------------------------------------------------------
+# Test: bf16 autocast training
+# ---------------------------------------------------------------------------
+
+class TestBf16Training:
+    """Verify both stages train under bf16 autocast with fp32 master weights."""
+
+    @pytest.mark.parametrize("stage", ["encoder", "gnn"])
+    def test_bf16_training_runs(self, stage):
+        train_fn = train_encoder if stage == "encoder" else train_gnn
+        config = PipelineConfig(device="cpu", precision="bf16")
+        with tempfile.TemporaryDirectory() as ckpt_dir:
+            hist = train_fn(config, _make_dummy_records(12), ckpt_dir,
+                            epochs=2, verbose=False)
+            saved = torch.load(default_paths(ckpt_dir)[stage], weights_only=False)
+
+        assert all(torch.isfinite(torch.tensor(hist["train_loss"])))
+        for value in saved["model_state_dict"].values():
+            assert value.dtype == torch.float32
+
+
+# ---------------------------------------------------------------------------
+# Test: Hyper-parameter sweep
+# ---------------------------------------------------------------------------
+
+class TestSweep:
+    """Verify the memory-mapped feature store and successive halving."""
+
+    def test_feature_store_matches_dataset(self, tmp_path):
+        from pipeline.sweep import build_feature_store, load_feature_store
+
+        records = _make_dummy_records(6)
+        built = _ConversationLevelDataset(records, max_turns=3)
+        stored = load_feature_store(build_feature_store(records, str(tmp_path), 3), 3)
+        assert len(stored) == len(built)
+        for i in range(len(built)):
+            for a, b in zip(built[i][:2], stored[i][:2]):
+                assert torch.equal(a, b)
+
+    def test_halving_prunes_and_pins_winner(self, tmp_path):
+        import json
+        from pipeline.sweep import run_sweep
+
+        records = _make_dummy_records(12)
+        space = {"discourse.gnn_hidden_dim": [16, 32, 64]}
+        leaderboard = run_sweep(
+            PipelineConfig(device="cpu"), "gnn", space, records,
+            sweep_dir=str(tmp_path / "sweep"), checkpoint_dir=str(tmp_path / "ckpt"),
+            min_epochs=1, max_epochs=3, eta=3, n_workers=0, verbose=False,
+        )
+
+        assert [entry["rung"] for entry in leaderboard] == [1, 0, 0]
+        assert leaderboard[0]["epochs_run"] == 3
+        assert os.path.exists(default_paths(str(tmp_path / "ckpt"))["gnn"])
+        with open(tmp_path / "sweep" / "leaderboard.json") as f:
+            assert len(json.load(f)["trials"]) == 3
+
+    def test_pinned_winner_loads_and_reruns_start_fresh(self, tmp_path):
+        from pipeline.export import export_checkpoints
+        from pipeline.main import CausalAnalysisPipeline
+        from pipeline.model_io import load_trained_ids, save_trained_ids
+        from pipeline.sweep import run_sweep
+
+        records = _make_dummy_records(12)
+        config = PipelineConfig(device="cpu")
+        kwargs = dict(
+            records=records, sweep_dir=str(tmp_path / "sweep"),
+            checkpoint_dir=str(tmp_path / "ckpt"), eta=3, n_workers=0, verbose=False,
+        )
+        space = {"discourse.gnn_hidden_dim": [16, 32, 64]}
+        # An earlier run's trained ids and exported graph
+        paths = default_paths(str(tmp_path / "ckpt"))
+        save_trained_ids(["OLD-1"], paths["trained_ids"])
+        with open(paths["gnn_export"], "wb") as f:
+            f.write(b"stale")
+        run_sweep(config, "gnn", space, min_epochs=1, max_epochs=3, **kwargs)
+        assert load_trained_ids(paths["trained_ids"]) == {r["transcript_id"] for r in records}
+        assert not os.path.exists(paths["gnn_export"])
+        # Re-running in the same directory with a smaller budget must not
+        # resume from the first sweep's state
+        leaderboard = run_sweep(config, "gnn", space, min_epochs=1, max_epochs=1, **kwargs)
+        assert [entry["epochs_run"] for entry in leaderboard] == [1, 1, 1]
+        # Other architectures at the same trial indices train from scratch
+        leaderboard = run_sweep(config, "gnn", {"discourse.gnn_hidden_dim": [32, 64, 128]},
+                                min_epochs=1, max_epochs=1, **kwargs)
+        assert [entry["epochs_run"] for entry in leaderboard] == [1, 1, 1]
+
+        # The default config (gnn_hidden_dim=256) serves and exports the winner
+        winner_dim = leaderboard[0]["params"]["discourse.gnn_hidden_dim"]
+        pipe = CausalAnalysisPipeline(config, checkpoint_dir=str(tmp_path / "ckpt"))
+        assert pipe._gnn() is pipe.discourse_gnn
+        assert pipe.discourse_gnn.config.gnn_hidden_dim == winner_dim
+        assert set(export_checkpoints(config, str(tmp_path / "ckpt"))) == {"gnn"}
+
+
+# ---------------------------------------------------------------------------
+# Test: Discourse-graph store
+# ---------------------------------------------------------------------------
+
+class TestGraphStore:
+    """Verify stored CSR graphs match build_discourse_graph and are keyed correctly."""
+
+    def test_store_matches_built_graphs(self, tmp_path):
+        from pipeline.graph_store import GraphStore
+
+        config = PipelineConfig(device="cpu")
+        records = _make_dummy_records(5)
+        records[2]["turn_features"][1]["text"] = "sorry for the delay, this is a problem"
+        store = GraphStore.build(records, config.discourse.edge_types)
+        store.save(str(tmp_path / "graphs.npz"))
+        loaded = GraphStore.load(str(tmp_path / "graphs.npz"))
+
+        for i, rec in enumerate(records):
+            emb = _build_turn_embeddings(rec["turn_features"])
+            built = build_discourse_graph(rec["turn_features"], emb, config.discourse.edge_types)
+            stored = loaded.graph(loaded.position(rec["transcript_id"]), emb)
+            assert torch.equal(stored["edge_index"], built["edge_index"])
+            assert torch.equal(stored["edge_attr"], built["edge_attr"])
+            assert stored["edge_labels"] == built["edge_labels"]
+
+    def test_store_round_trips_labels_outside_edge_types(self, tmp_path):
+        from pipeline.graph_store import _STORE_VERSION, load_or_build_graph_store
+
+        records = _make_dummy_records(5)
+        records[2]["turn_features"][1]["text"] = "sorry for the delay, this is a problem"
+        records[3]["turn_features"][2]["text"] = "this is unacceptable, not working"
+        # Detected relations that are not types get id 0 ("promise")
+        edge_types = ["promise", "clarification"]
+        for _ in range(2):  # built, then loaded from disk
+            store = load_or_build_graph_store(records, edge_types, str(tmp_path))
+            labels = []
+            for i, rec in enumerate(records):
+                emb = _build_turn_embeddings(rec["turn_features"])
+                built = build_discourse_graph(rec["turn_features"], emb, edge_types)
+                stored = store.graph(i, emb)
+                assert torch.equal(stored["edge_index"], built["edge_index"])
+                assert torch.equal(stored["edge_attr"], built["edge_attr"])
+                assert stored["edge_labels"] == built["edge_labels"]
+                labels += stored["edge_labels"]
+            assert {"apology", "complaint"} <= set(labels)
+        assert os.listdir(tmp_path) == [f"graphs_v{_STORE_VERSION}_{store.fingerprint}.npz"]
+
+    def test_vectorized_edge_types_match_pairwise_detection(self):
+        from pipeline.data_processing import extract_turn_features
+        from pipeline.discourse_graph import detect_edge_type, discourse_edges
+
+        texts = [
+            "hello there",
+            "it is NOT",  # "not working" only across the join with the next turn
+            "Working at all",
+            "unfortunately this is a problem",
+            "thanks",
+            "bye",
+        ]
+        turns = [extract_turn_features({"text": t, "speaker": "Agent"}, i, len(texts))
+                 for i, t in enumerate(texts)]
+        edge_types = PipelineConfig().discourse.edge_types
+
+        expected = [
+            (i, j, detect_edge_type(texts[i], texts[j]) or "clarification")
+            for i in range(len(texts)) for j in (i + 1, i + 2) if j < len(texts)
+        ]
+        for with_masks in (turns, [{"text": t} for t in texts]):
+            src, tgt, attr, labels = discourse_edges(with_masks, edge_types)
+            assert list(zip(src, tgt, labels)) == expected
+            assert attr == [edge_types.index(label) for label in labels]
+        assert expected[2][2] == "complaint" and expected[-1][2] == "clarification"
+
+    def test_window_and_speaker_edges_match_nested_loops(self, tmp_path):
+        import numpy as np
+
+        from pipeline.discourse_graph import window_pairs
+        from pipeline.graph_store import load_or_build_graph_store
+
+        sizes = [0, 1, 3, 7]
+        node_offsets = np.concatenate([[0], np.cumsum(sizes)])
+        is_agent = np.array([0, 0, 1, 0, 0, 0, 0, 1, 0, 1, 1], dtype=bool)
+        for window in (1, 2, 4):
+            for speakers in (None, is_agent):
+                expected = []
+                for start, end in zip(node_offsets[:-1], node_offsets[1:]):
+                    for i in range(start, end):
+                        targets = list(range(i + 1, min(i + window, end - 1) + 1))
+                        if speakers is not None and not speakers[i]:
+                            reply = next((j for j in range(i + 1, end) if speakers[j]), None)
+                            if reply is not None and reply - i > window:
+                                targets.append(reply)
+                        expected += [(i, j) for j in targets]
+                src, tgt = window_pairs(node_offsets, window, speakers)
+                assert list(zip(src.tolist(), tgt.tolist())) == expected
+
+        config = PipelineConfig(device="cpu")
+        records = _make_dummy_records(4)
+        for tf in records[1]["turn_features"][1:3]:
+            tf["is_agent"] = 0  # customer, customer, customer, agent
+        store = load_or_build_graph_store(
+            records, config.discourse.edge_types, str(tmp_path), window=1, speaker_edges=True,
+        )
+        for i, rec in enumerate(records):
+            emb = _build_turn_embeddings(rec["turn_features"])
+            built = build_discourse_graph(
+                rec["turn_features"], emb, config.discourse.edge_types, window=1, speaker_edges=True,
+            )
+            assert torch.equal(store.graph(i, emb)["edge_index"], built["edge_index"])
+        assert store.edges(1)[0].t().tolist() == [[0, 1], [0, 3], [1, 2], [1, 3], [2, 3]]
+        assert len(os.listdir(tmp_path)) == 1
+        load_or_build_graph_store(records, config.discourse.edge_types, str(tmp_path))
+        assert len(os.listdir(tmp_path)) == 2
+
+    def test_fingerprint_tracks_text_and_lexicon(self, monkeypatch):
+        import pipeline.graph_store as gs
+
+        config = PipelineConfig(device="cpu")
+        records = _make_dummy_records(3)
+        base = gs.graph_fingerprint(records, config.discourse.edge_types)
+        records[0]["turn_features"][0]["text"] = "changed"
+        edited = gs.graph_fingerprint(records, config.discourse.edge_types)
+        monkeypatch.setitem(gs.DISCOURSE_KEYWORDS, "delay", ["new keyword"])
+        relexed = gs.graph_fingerprint(records, config.discourse.edge_types)
+        assert len({base, edited, relexed}) == 3
+
+    def test_train_gnn_reuses_store(self, tmp_path, monkeypatch):
+        from pipeline.graph_store import GraphStore
+
+        config = PipelineConfig(device="cpu")
+        records = _make_dummy_records(8)
+        builds = []
+        original_build = GraphStore.build.__func__
+        monkeypatch.setattr(
+            GraphStore, "build",
+            classmethod(lambda cls, *a, **kw: builds.append(1) or original_build(cls, *a, **kw)),
+        )
+        for _ in range(2):
+            train_gnn(config, records, str(tmp_path), epochs=1, verbose=False)
+        assert len(builds) == 1
+        assert os.listdir(default_paths(str(tmp_path))["graph_cache"])
+
 
 # ---------------------------------------------------------------------------
 # Test: Deterministic seeding